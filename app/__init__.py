@@ -1,14 +1,16 @@
 # app/__init__.py
 import os
-from flask import Flask
+from flask import Flask, jsonify
 from flask_sqlalchemy import SQLAlchemy
-from config import get_config, build_postgres_uri, mask_db_uri, ProductionConfig, basedir, get_config_name
+from config import get_config, build_postgres_uri, build_replica_binds, mask_db_uri, ProductionConfig, basedir, get_config_name
 from flask_migrate import Migrate
 import logging
+from app.services.db_replicas import RoutingSession
 
 
 #initialize db and migrate
-db = SQLAlchemy()
+# RoutingSession sends plain reads to read replicas when any are configured
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 migrate = Migrate()
 
 
@@ -60,6 +62,12 @@ def create_app():
     env_uri = os.environ.get("DATABASE_URL") 
     if env_uri:
         app.config['SQLALCHEMY_DATABASE_URI'] = env_uri
+    # read replicas from DATABASE_REPLICA_URLS / POSTGRES_REPLICA_HOSTS
+    replica_binds = build_replica_binds()
+    if replica_binds:
+        app.config["SQLALCHEMY_BINDS"] = {**(app.config.get("SQLALCHEMY_BINDS") or {}), **replica_binds}
+        for key, uri in replica_binds.items():
+            app.logger.info("Read replica %s: %s", key, mask_db_uri(uri))
     
     app.logger.info(
         "SQLAlchemy URI set to %s", 
@@ -98,8 +106,46 @@ def create_app():
     
     
     #initialize extensions
+    # pool options adapted to the final URI + instrumented QueuePool
+    from app.services import db_pool
+    db_pool.configure(app)
     db.init_app(app)
     migrate.init_app(app, db) 
+    db_pool.init_app(app, db)
+    # round-robin read replicas with ejection + read-your-writes stickiness (no-op without replicas)
+    from app.services import db_replicas
+    db_replicas.init_app(app, db)
+    # one cursor-execute timer per engine; metrics/request_timing/query_budget read its results
+    from app.services import query_timing
+    query_timing.init_app(app, db)
+    # Prometheus /metrics: per-endpoint request counters/latency + SQL statement metrics
+    from app.services import metrics
+    metrics.init_app(app)
+    # per-request db/template/hashing time: Server-Timing header + slow-request log
+    from app.services import request_timing
+    request_timing.init_app(app)
+    # per-request SQL statement count/time headers + QUERY_BUDGET warning
+    from app.services import query_budget
+    query_budget.init_app(app)
+    # gzip/brotli for JSON/HTML by Accept-Encoding (last after_request hook registered: runs first)
+    from app.services import compression
+    compression.init_app(app)
+
+    # background CPU/memory sampler read by the dashboard
+    from app.services import system_metrics
+    system_metrics.init_app(app)
+    # bounded 1s/1min/10min metrics history (fed by the sampler and a request counter)
+    from app.services import timeseries
+    timeseries.init_app(app)
+    # concurrent, cached API health probes for the dashboard
+    from app.services import health_probes
+    health_probes.init_app(app)
+    # host facts computed once + single-flight snapshot cache
+    from app.services import dashboard
+    dashboard.init_app(app)
+    # shared producer behind the /dashboard/stream SSE endpoint
+    from app.services import dashboard_stream
+    dashboard_stream.init_app(app)
     
   
     #Import models, routes, blueprints
@@ -133,5 +179,13 @@ def create_app():
     @app.errorhandler(500)
     def server_error(_):
         return ("500 Error - Internal Server Error", 500)
+
+    # hashing pool saturated (PASSWORD_HASH_TIMEOUT): ask the client to come back
+    from app.services.hashing import HashingBusy
+
+    @app.errorhandler(HashingBusy)
+    def hashing_busy(e):
+        return jsonify({"message": "Server busy, try again shortly", "errors": {"password": str(e)}}), \
+            503, {"Retry-After": str(e.retry_after)}
     
     return app
@@ -0,0 +1,372 @@
+# app/asgi.py
+"""
+Optional ASGI mode: the hot read paths of user_bp and health_bp as async
+handlers on SQLAlchemy's async engine, with everything else served by the
+regular Flask app.
+
+Async handlers (same URLs, payloads and ETag/Last-Modified validators as
+the Flask views):
+- GET /healthz, GET /ready
+- GET /api/users (full list or keyset page; ?stream= requests fall through)
+- GET /api/users/<id>
+
+Every other request (writes, search, /ui, the dashboard and its SSE stream,
+/metrics) goes to the Flask WSGI app on a thread pool of ASGI_WSGI_THREADS
+threads. The writes are dominated by password hashing, which is CPU-bound
+and already runs on the hashing process pool, so an event loop would not
+help them. Flask's before/after_request hooks (Server-Timing, query
+budget) only see the requests that reach the Flask app; the async routes
+record http_requests_total and http_request_duration_seconds under their
+Flask endpoint names, and response compression is applied to their
+bodies here as well.
+
+Serve with a gunicorn that ships the asgi worker, or with uvicorn:
+    gunicorn --config gunicorn.conf.py -k asgi asgi:app
+    uvicorn asgi:app
+"""
+import asyncio
+import io
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timezone
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl
+
+from sqlalchemy import select, text
+from werkzeug.datastructures import MIMEAccept
+from werkzeug.http import http_date, parse_accept_header, parse_date, parse_etags, quote_etag
+
+from app.models import User
+from app.services import async_db, compression, dashboard_stream, metrics, users_service
+from app.services.db_pool import pool_stats
+
+NDJSON_MIMETYPE = "application/x-ndjson"
+
+
+class Request:
+    """The parts of an ASGI HTTP scope the handlers need."""
+
+    def __init__(self, scope):
+        self.method = scope["method"]
+        self.path = scope["path"]
+        self.args: List[Tuple[str, str]] = parse_qsl(scope["query_string"].decode("latin-1"), keep_blank_values=True)
+        self.headers: Dict[str, str] = {}
+        for name, value in scope["headers"]:
+            key = name.decode("latin-1").lower()
+            value = value.decode("latin-1")
+            self.headers[key] = f"{self.headers[key]}, {value}" if key in self.headers else value
+
+    def arg(self, name: str, default=None):
+        for key, value in self.args:
+            if key == name:
+                return value
+        return default
+
+    def int_arg(self, name: str) -> Optional[int]:
+        try:
+            return int(self.arg(name))
+        except (TypeError, ValueError):
+            return None
+
+
+class Response:
+    def __init__(self, body: bytes = b"", status: int = 200, content_type: Optional[str] = "application/json",
+                 headers: Optional[Dict[str, str]] = None):
+        self.body = body
+        self.status = status
+        self.headers = dict(headers or {})
+        if content_type:
+            self.headers["Content-Type"] = content_type
+
+    def set_validators(self, etag: str, last_modified):
+        self.headers["ETag"] = quote_etag(etag, weak=True)
+        if last_modified is not None:
+            self.headers["Last-Modified"] = http_date(last_modified)
+        return self
+
+    def encode(self, config, accept_encoding: Optional[str]):
+        """Compress the body as the Flask app would (app.services.compression)."""
+        mimetype = (self.headers.get("Content-Type") or "").split(";")[0].strip()
+        if not config.get("COMPRESS_ENABLED", True) or mimetype not in compression.COMPRESSIBLE_MIMETYPES:
+            return self
+        self.headers["Vary"] = "Accept-Encoding"
+        encoding, self.body = compression.encode_body(config, accept_encoding, mimetype, self.body)
+        if encoding is not None:
+            self.headers["Content-Encoding"] = encoding
+        return self
+
+    async def send(self, send):
+        headers = [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in self.headers.items()]
+        headers.append((b"content-length", str(len(self.body)).encode()))
+        await send({"type": "http.response.start", "status": self.status, "headers": headers})
+        await send({"type": "http.response.body", "body": self.body})
+
+
+def _http_datetime(value):
+    # SQLite hands back naive timestamps; they are stored in UTC
+    if value is not None and value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _not_modified(request: Request, etag: str, last_modified) -> Optional[Response]:
+    """304 if the request's validators still match (If-None-Match wins over If-Modified-Since)."""
+    if "if-none-match" in request.headers:
+        matched = parse_etags(request.headers["if-none-match"]).contains_weak(etag)
+    elif "if-modified-since" in request.headers and last_modified is not None:
+        since = parse_date(request.headers["if-modified-since"])
+        matched = since is not None and last_modified.replace(microsecond=0) <= since
+    else:
+        matched = False
+    if not matched:
+        return None
+    return Response(status=304, content_type=None).set_validators(etag, last_modified)
+
+
+class WSGIFallback:
+    """
+    Serve an ASGI HTTP request with a WSGI app on a worker thread. The
+    response is relayed chunk by chunk, so streaming views (SSE, NDJSON)
+    keep streaming.
+    """
+
+    def __init__(self, wsgi_app, executor: ThreadPoolExecutor):
+        self.wsgi_app = wsgi_app
+        self.executor = executor
+
+    @staticmethod
+    async def _read_body(receive) -> bytes:
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                break
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body"):
+                break
+        return b"".join(chunks)
+
+    @staticmethod
+    def environ(scope, body: bytes) -> dict:
+        server = scope.get("server") or ("localhost", 80)
+        client = scope.get("client") or ("", 0)
+        environ = {
+            "REQUEST_METHOD": scope["method"],
+            "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+            "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+            "QUERY_STRING": scope["query_string"].decode("latin-1"),
+            "SERVER_NAME": server[0],
+            "SERVER_PORT": str(server[1]),
+            "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+            "REMOTE_ADDR": client[0],
+            "wsgi.version": (1, 0),
+            "wsgi.url_scheme": scope.get("scheme", "http"),
+            "wsgi.input": io.BytesIO(body),
+            "wsgi.errors": sys.stderr,
+            "wsgi.multithread": True,
+            "wsgi.multiprocess": True,
+            "wsgi.run_once": False,
+        }
+        for name, value in scope["headers"]:
+            key = name.decode("latin-1").upper().replace("-", "_")
+            value = value.decode("latin-1")
+            if key in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+                environ[key] = value
+                continue
+            key = "HTTP_" + key
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+        # the body is already buffered: describe it as such (covers chunked uploads too)
+        environ["CONTENT_LENGTH"] = str(len(body))
+        environ.pop("HTTP_TRANSFER_ENCODING", None)
+        return environ
+
+    async def __call__(self, scope, receive, send):
+        environ = self.environ(scope, await self._read_body(receive))
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.executor, self._run, environ, send, loop)
+
+    def _run(self, environ, send, loop):
+        def relay(message):
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response["start"] = {
+                "type": "http.response.start",
+                "status": int(status.split(" ", 1)[0]),
+                "headers": [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers],
+            }
+            return lambda data: None  # the legacy write() callable is not supported
+
+        result = self.wsgi_app(environ, start_response)
+        try:
+            started = False
+            for chunk in result:
+                if not started:
+                    relay(response["start"])
+                    started = True
+                if chunk:
+                    relay({"type": "http.response.body", "body": chunk, "more_body": True})
+            if not started:
+                relay(response["start"])
+            relay({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            close = getattr(result, "close", None)
+            if close is not None:
+                close()
+
+
+class AsyncAPI:
+    """The ASGI application: async routes first, the Flask app for the rest."""
+
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        self.config = flask_app.config
+        wsgi_threads = int(self.config.get("ASGI_WSGI_THREADS", 32))
+        self.executor = ThreadPoolExecutor(max_workers=wsgi_threads, thread_name_prefix="wsgi")
+        self.fallback = WSGIFallback(flask_app, self.executor)
+        # dashboard SSE streams run on that pool too, so size their limit from it
+        broadcaster = flask_app.extensions.get(dashboard_stream.EXTENSION_KEY)
+        if broadcaster is not None:
+            broadcaster.fit_to_threads(wsgi_threads)
+        self.engine = None
+        self.session = None
+        self.metrics_enabled = self.config.get("METRICS_ENABLED", True)
+        # (method, path, handler, Flask endpoint): metrics use the endpoint of the matching Flask view
+        self.routes = [
+            ("GET", re.compile(r"/healthz"), self.healthz, "health.healthz"),
+            ("GET", re.compile(r"/ready"), self.ready, "health.ready"),
+            ("GET", re.compile(r"/api/users"), self.list_users, "user_bp.list_users_api"),
+            ("GET", re.compile(r"/api/users/(?P<user_id>\d+)"), self.get_user, "user_bp.get_user_api"),
+        ]
+
+    def _ensure_engine(self):
+        # created on first use so it belongs to the serving process (and its event loop)
+        if self.engine is None:
+            self.engine = async_db.create_engine_for(self.flask_app)
+            self.session = async_db.sessionmaker_for(self.engine)
+
+    async def aclose(self):
+        if self.engine is not None:
+            await self.engine.dispose()
+            self.engine = None
+            self.session = None
+
+    def json(self, payload, status: int = 200) -> Response:
+        # the Flask app's JSON provider, so bodies match jsonify() byte for byte
+        return Response((self.flask_app.json.dumps(payload) + "\n").encode(), status=status)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            raise RuntimeError(f"Unsupported ASGI scope type {scope['type']!r}")
+
+        request = Request(scope)
+        for method, pattern, handler, endpoint in self.routes:
+            match = pattern.fullmatch(request.path)
+            if match and request.method == method:
+                self._ensure_engine()
+                start = time.perf_counter()
+                response = await handler(request, **match.groupdict())
+                if response is not None:
+                    response = response.encode(self.config, request.headers.get("accept-encoding"))
+                    if self.metrics_enabled:
+                        metrics.observe_request(endpoint.split(".", 1)[0], endpoint, method,
+                                                response.status, time.perf_counter() - start)
+                    await response.send(send)
+                    return
+                break
+        await self.fallback(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.aclose()
+                self.executor.shutdown(wait=False, cancel_futures=True)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    # -- health_bp ---------------------------------------------------------
+
+    async def healthz(self, request):
+        return self.json({"status": "ok"})
+
+    async def ready(self, request):
+        try:
+            async with self.engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+            return self.json({"status": "ready", "pool": pool_stats(self.engine.sync_engine)})
+        except Exception as e:
+            self.flask_app.logger.warning("Readiness check failed: %s", e)
+            return self.json({"status": "not ready", "error": str(e),
+                              "pool": pool_stats(self.engine.sync_engine)}, status=503)
+
+    # -- user_bp -----------------------------------------------------------
+
+    def _wants_stream(self, request) -> bool:
+        stream = (request.arg("stream") or "").lower()
+        accept = parse_accept_header(request.headers.get("accept"), MIMEAccept)
+        return stream in ("1", "true", "ndjson", "json") or accept.best == NDJSON_MIMETYPE
+
+    async def list_users(self, request):
+        if self._wants_stream(request):
+            return None  # streamed dumps stay on the WSGI view
+
+        async with self.session() as session:
+            last_modified, count = (await session.execute(users_service.collection_state_statement())).one()
+            last_modified = _http_datetime(last_modified)
+            # ETag only, as a delete does not move max(updated_at)
+            etag = users_service.collection_etag(last_modified, count, request.args)
+            not_modified = _not_modified(request, etag, None)
+            if not_modified is not None:
+                return not_modified
+
+            paged = any(key in users_service.PAGINATION_ARGS for key, _ in request.args)
+            if self.config.get("USERS_LIST_LEGACY_FULL") and not paged:
+                users = (await session.scalars(select(User).order_by(User.username.asc()))).all()
+                response = self.json([u.to_dict() for u in users]).set_validators(etag, None)
+                response.headers["Deprecation"] = "true"
+                return response
+
+            limit, after, sort, order = users_service.page_params(
+                request.args,
+                self.config.get("USERS_PAGE_DEFAULT_LIMIT", 50),
+                self.config.get("USERS_PAGE_MAX_LIMIT", 500),
+            )
+            try:
+                stmt = users_service.page_statement(limit, after, sort, order, dialect=self.engine.dialect.name)
+            except ValueError as ve:
+                return self.json(users_service.pagination_error(ve), status=400)
+            rows = (await session.scalars(stmt)).all()
+
+        users, next_cursor = users_service.page_result(rows, limit, sort, order)
+        return self.json(users_service.page_envelope(users, limit, sort, order, next_cursor)).set_validators(etag, None)
+
+    async def get_user(self, request, user_id):
+        user_id = int(user_id)
+        not_found = self.json({"message": "User not found", "errors": {"user_id": "No user for given id"}}, status=404)
+        async with self.session() as session:
+            last_modified = (await session.execute(users_service.user_last_modified_statement(user_id))).scalar()
+            last_modified = _http_datetime(last_modified)
+            if last_modified is None:
+                return not_found
+            etag = users_service.user_etag(user_id, last_modified)
+            not_modified = _not_modified(request, etag, last_modified)
+            if not_modified is not None:
+                return not_modified
+            user = await session.get(User, user_id)
+        if user is None:
+            return not_found
+        return self.json(user.to_dict()).set_validators(etag, last_modified)
+
+
+def create_asgi_app(flask_app) -> AsyncAPI:
+    return AsyncAPI(flask_app)
@@ -5,6 +5,9 @@ from app import db
 import re
 from datetime import datetime
 from app.utils import validate_password
+from app.services import dashboard as dashboard_service
+from app.services import dashboard_stream
+from app.services import timeseries
 import logging
 
 
@@ -18,16 +21,55 @@ def index():
 
 
 #--------------------USER WEBPAGE--------------------
+def _int_arg(name, default):
+    try:
+        return int(request.args.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def user_table_context():
+    """
+    One page of the user table from ?q=&sort=&order=&per_page= and a keyset
+    cursor (?after= or ?before=); ?page= is only the label shown for it.
+    Bad values fall back to defaults (a bad cursor to the first page; this
+    is a page, not an API), and per_page is clamped to UI_PAGE_MAX_SIZE.
+    """
+    from flask import current_app
+    from app.services.users_service import SORT_ORDERS, UI_SORT_KEYS, search_users_page
+
+    q = request.args.get("q", "").strip()
+    sort = request.args.get("sort", "username")
+    sort = sort if sort in UI_SORT_KEYS else "username"
+    order = request.args.get("order", "asc")
+    order = order if order in SORT_ORDERS else "asc"
+    page = max(_int_arg("page", 1), 1)
+    per_page = _int_arg("per_page", current_app.config.get("UI_PAGE_SIZE", 25))
+    per_page = min(max(per_page, 1), current_app.config.get("UI_PAGE_MAX_SIZE", 100))
+
+    after = request.args.get("after") or None
+    before = request.args.get("before") or None
+    try:
+        users, next_cursor, prev_cursor = search_users_page(q or None, sort, order, per_page, after, before)
+    except ValueError:
+        page = 1
+        users, next_cursor, prev_cursor = search_users_page(q or None, sort, order, per_page)
+    return {
+        "users": users,
+        "table": {"q": q, "sort": sort, "order": order, "page": page if prev_cursor else 1,
+                  "per_page": per_page, "next_cursor": next_cursor, "prev_cursor": prev_cursor},
+    }
+
+
 @main.route('/ui')
 def ui():
-    
-    users = User.query.order_by(User.username.asc()).all()
-    return render_template('ui.html', title="UI Page", message="Welcome to the UI Page!", users=users)
+    return render_template('ui.html', title="UI Page", message="Welcome to the UI Page!", **user_table_context())
 
 #CREATE
 @main.route('/ui/create_user', methods=['POST'])
 def create_user_ui():
-    from werkzeug.security import generate_password_hash
+    from app.services import hashing
+    from app.services.users_service import insert_user
     
     username=request.form['username']
     email=request.form['email']
@@ -37,7 +79,7 @@ def create_user_ui():
     if not re.match(r"[^@]+@[^@]+\.[^@]+", email):
         return render_template(
             "ui.html", 
-            users=User.query.all(), 
+            **user_table_context(),
             error_message="Invalid email address.", 
             open_modal="create",
             form_data={"username": username, "email": email}   #preserve
@@ -47,23 +89,24 @@ def create_user_ui():
     if not is_valid:
         return render_template(
             "ui.html", 
-            users=User.query.all(), 
+            **user_table_context(),
             error_message=message, 
             open_modal="create",
             form_data={"username": username, "email": email}   #preserve
         )    
         
     try:
-        hashed_pwd = generate_password_hash(password)
-        new_user = User(username=username, email=email, password=hashed_pwd)
-        db.session.add(new_user)
+        hashed_pwd = hashing.hash_password(password)
+        insert_user(username, email, hashed_pwd)
         db.session.commit()
         flash('User created successfully!', 'success')
+    except hashing.HashingBusy:
+        raise
     except Exception as e:
         db.session.rollback()
         return render_template(
             "ui.html",
-            users=User.query.all(),
+            **user_table_context(),
             error_message=f'Error creating user: {str(e)}',
             open_modal="create",
             form_data={"username": username, "email": email}   #preserve
@@ -82,10 +125,9 @@ def reset_password_ui(user_id):
     # Password validation
     is_valid, message = validate_password(new_password, confirm_password)
     if not is_valid:
-        users = User.query.order_by(User.username.asc()).all()
         return render_template(
             "ui.html",
-            users=users,
+            **user_table_context(),
             error_message=message,
             open_modal_id=user.id
         )
@@ -103,10 +145,9 @@ def reset_password_ui(user_id):
         
     except ValueError as ve:
         db.session.rollback()
-        users = User.query.order_by(User.username.asc()).all()
         return render_template(
             "ui.html",
-            users=users,
+            **user_table_context(),
             error_message=str(ve),
             open_modal_id=user.id
         )  
@@ -129,144 +170,63 @@ def delete_user_ui(user_id):
 #------------------DASHBOARD WEBPAGE------------------
 @main.route('/dashboard')
 def dashboard():
-    import os, socket, time, psutil, requests
     from flask import current_app
-    from zoneinfo import ZoneInfo
-    from sqlalchemy import text
-
-    # App environment
-    env_name = current_app.config.get("ENV_NAME") or os.getenv("APP_CONFIG", "development")
-
-    # Server time
-    ist = ZoneInfo('Asia/Kolkata')
-    server_time = datetime.now(ist).strftime('%Y-%m-%d %H:%M:%S')
-    hostname = os.getenv("APP_HOSTNAME", socket.gethostname())
-
-    # Database health check (basic + latency + row count)
-    try:
-        start = time.time()
-        row_count = db.session.execute(text("SELECT COUNT(*) FROM users")).scalar()
-        latency = round((time.time() - start) * 1000, 2)  # ms
-        db_status = {"status": "Up", "latency": latency, "rows": row_count}
-    except Exception as e:
-        current_app.logger.error(f"DB connection error: {e}")
-        db_status = {"status": "Down", "latency": None, "rows": None}
-
-    # App health (static for now, self check always "Healthy")
-    app_health = "Healthy"
-
-    # Container details
-    container_id = "N/A"
-    try:
-        with open("/proc/self/cgroup", "r") as f:
-            for line in f:
-                if "docker" in line:
-                    container_id = line.strip().split("/")[-1][:12]
-    except (IndexError, AttributeError, ValueError, OSError) as exc:
-        # line didn't contain expected format — record debug information for troubleshooting
-        logger.debug("Could not parse container id from line %r: %s", line, exc)
-        container_id = None
-        
-    container_image = os.getenv("APP_IMAGE", "unknown")
-    uptime = f"{(time.time() - psutil.boot_time())/3600:.2f} hrs"
-
-    container_info = {
-        "id": container_id,
-        "image": container_image,
-        "uptime": uptime
-    }
-
-    # System usage
-    system_usage = {
-        "cpu": psutil.cpu_percent(interval=1),
-        "memory": psutil.virtual_memory().percent
-    }
 
-    # API health checks
-    api_health = {}
-    port = 8000 if str(env_name).lower().startswith("prod") else 5000
-    base_url = os.getenv("APP_BASE_URL", f"http://localhost:{port}")
-    endpoints = ["/", "/ui", "/api/users"]
-    for ep in endpoints:
-        try:
-            r = requests.get(base_url + ep, timeout=2)
-            api_health[ep] = "Healthy" if r.status_code == 200 else f"Error {r.status_code}"
-        except Exception as e:
-            api_health[ep] = f"Down ({str(e)})"
+    # shared, TTL-cached snapshot (see app/services/dashboard.py)
+    snapshot = dashboard_service.get_snapshot(current_app)
 
     return render_template(
         'dashboard.html',
-        env_name=env_name,
-        server_time=server_time,
-        hostname=hostname,
-        db_status=db_status,
-        app_health=app_health,
-        container_info=container_info,
-        system_usage=system_usage,
-        api_health=api_health
+        env_name=snapshot["env_name"],
+        server_time=snapshot["server_time"],
+        hostname=snapshot["hostname"],
+        db_status=snapshot["db_status"],
+        app_health=snapshot["app_health"],
+        container_info=snapshot["container_info"],
+        system_usage=snapshot["system_usage"],
+        api_health=snapshot["api_health"]
     )
 
 
 #------------------DASHBOARD JSON ENDPOINT------------------
 @main.route('/dashboard/data')
 def dashboard_data():
-    import os, socket, time, psutil, requests
     from flask import current_app, jsonify
-    from sqlalchemy import text
-    from zoneinfo import ZoneInfo
 
-    env_name = current_app.config.get("ENV_NAME") or os.getenv("APP_CONFIG", "development")
+    data = dashboard_service.get_snapshot(current_app)
 
-    ist = ZoneInfo('Asia/Kolkata')
-    server_time = datetime.now(ist).strftime('%Y-%m-%d %H:%M:%S')
-    hostname = os.getenv("APP_HOSTNAME", socket.gethostname())
+    # ?range=15m|1h|24h|7d adds the metrics history for charts
+    range_name = request.args.get("range")
+    if range_name:
+        store = timeseries.get_store(current_app)
+        if store is None:
+            return jsonify({"message": "Metrics history is disabled"}), 404
+        try:
+            data["history"] = store.query(range_name)
+        except ValueError as e:
+            return jsonify({"message": "Invalid range", "errors": {"range": str(e)}}), 400
 
-    try:
-        start = time.time()
-        row_count = db.session.execute(text("SELECT COUNT(*) FROM users")).scalar()
-        latency = round((time.time() - start) * 1000, 2)
-        db_status = {"status": "Up", "latency": latency, "rows": row_count}
-    except Exception as e:
-        db_status = {"status": "Down", "latency": None, "rows": None}
+    return jsonify(data)
 
-    container_id = "N/A"
-    try:
-        with open("/proc/self/cgroup", "r") as f:
-            for line in f:
-                if "docker" in line:
-                    container_id = line.strip().split("/")[-1][:12]
-    except (IndexError, AttributeError, ValueError, OSError) as exc:
-        # line didn't contain expected format — record debug information for troubleshooting
-        logger.debug("Could not parse container id from line %r: %s", line, exc)
-        
-    container_image = os.getenv("APP_IMAGE", "unknown")
-    uptime = f"{(time.time() - psutil.boot_time())/3600:.2f} hrs"
 
-    system_usage = {
-        "cpu": psutil.cpu_percent(interval=1),
-        "memory": psutil.virtual_memory().percent
-    }
+#------------------DASHBOARD PUSH (SSE) ENDPOINT------------------
+@main.route('/dashboard/stream')
+def dashboard_stream_events():
+    from flask import current_app, jsonify, Response
 
-    api_health = {}
-    port = 8000 if str(env_name).lower().startswith("prod") else 5000
-    base_url = os.getenv("APP_BASE_URL", f"http://localhost:{port}")
-    for ep in ["/", "/ui", "/api/users"]:
-        try:
-            r = requests.get(base_url + ep, timeout=2)
-            api_health[ep] = "Healthy" if r.status_code == 200 else f"Error {r.status_code}"
-        except Exception:
-            api_health[ep] = "Down"
-
-    return jsonify({
-        "env_name": env_name,
-        "server_time": server_time,
-        "hostname": hostname,
-        "db_status": db_status,
-        "container_info": {"id": container_id, "image": container_image, "uptime": uptime},
-        "system_usage": system_usage,
-        "api_health": api_health,
-        "app_health": "Healthy"
-    })
+    broadcaster = current_app.extensions[dashboard_stream.EXTENSION_KEY]
+    try:
+        events = broadcaster.stream()
+    except dashboard_stream.TooManySubscribers as e:
+        # the page falls back to polling /dashboard/data
+        return jsonify({"message": str(e)}), 503
+
+    # no stream_with_context: the generator never needs the request or a DB session
+    return Response(
+        events,
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 #------------------ABOUT WEBPAGE------------------
 @main.route('/about')
@@ -0,0 +1,132 @@
+# app/ddl.py
+"""
+Raw DDL the ORM models cannot express, kept in one place: the
+row_counters triggers and the users substring-search index.
+
+Both create_all() (the after_create listeners in app/models.py) and the
+migrations that introduced them (5c9e1b7d2f64, f3b8d1a7c925) run these
+helpers, so the two paths cannot drift. Every statement is idempotent.
+Migrations replay this module as it is today, so change a statement only
+together with a new migration that applies the change to existing
+databases.
+"""
+import logging
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+logger = logging.getLogger(__name__)
+
+# Trigger DDL for row_counters (dashboard "counter" row-count mode)
+USERS_COUNTER_DDL = {
+    "postgresql": [
+        """
+        CREATE OR REPLACE FUNCTION users_row_count_ins() RETURNS trigger AS $$
+        BEGIN
+            UPDATE row_counters SET row_count = row_count + (SELECT COUNT(*) FROM new_rows)
+            WHERE table_name = 'users';
+            RETURN NULL;
+        END $$ LANGUAGE plpgsql
+        """,
+        """
+        CREATE OR REPLACE FUNCTION users_row_count_del() RETURNS trigger AS $$
+        BEGIN
+            UPDATE row_counters SET row_count = row_count - (SELECT COUNT(*) FROM old_rows)
+            WHERE table_name = 'users';
+            RETURN NULL;
+        END $$ LANGUAGE plpgsql
+        """,
+        "DROP TRIGGER IF EXISTS users_row_count_ins ON users",
+        "DROP TRIGGER IF EXISTS users_row_count_del ON users",
+        # statement-level with transition tables: one counter update per statement, not per row
+        """
+        CREATE TRIGGER users_row_count_ins AFTER INSERT ON users
+        REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION users_row_count_ins()
+        """,
+        """
+        CREATE TRIGGER users_row_count_del AFTER DELETE ON users
+        REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION users_row_count_del()
+        """,
+    ],
+    "sqlite": [
+        """
+        CREATE TRIGGER IF NOT EXISTS users_row_count_ins AFTER INSERT ON users
+        BEGIN UPDATE row_counters SET row_count = row_count + 1 WHERE table_name = 'users'; END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS users_row_count_del AFTER DELETE ON users
+        BEGIN UPDATE row_counters SET row_count = row_count - 1 WHERE table_name = 'users'; END
+        """,
+    ],
+}
+
+SEED_USERS_COUNTER = """
+    INSERT INTO row_counters (table_name, row_count)
+    SELECT 'users', (SELECT COUNT(*) FROM users)
+    WHERE NOT EXISTS (SELECT 1 FROM row_counters WHERE table_name = 'users')
+"""
+
+
+# Substring search for GET /api/users/search. Postgres: trigram GIN indexes
+# (pg_trgm) answer lower(col) LIKE '%abc%'. SQLite: an external-content FTS5
+# table with the trigram tokenizer, kept in sync by triggers.
+USERS_SEARCH_DDL = {
+    "postgresql": [
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        "CREATE INDEX IF NOT EXISTS ix_users_username_trgm ON users USING gin (lower(username) gin_trgm_ops)",
+        "CREATE INDEX IF NOT EXISTS ix_users_email_trgm ON users USING gin (lower(email) gin_trgm_ops)",
+    ],
+    "sqlite": [
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS users_search USING fts5(
+            username, email, content='users', content_rowid='id', tokenize='trigram'
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS users_search_ins AFTER INSERT ON users BEGIN
+            INSERT INTO users_search(rowid, username, email) VALUES (new.id, new.username, new.email);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS users_search_del AFTER DELETE ON users BEGIN
+            INSERT INTO users_search(users_search, rowid, username, email)
+            VALUES ('delete', old.id, old.username, old.email);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS users_search_upd AFTER UPDATE OF username, email ON users BEGIN
+            INSERT INTO users_search(users_search, rowid, username, email)
+            VALUES ('delete', old.id, old.username, old.email);
+            INSERT INTO users_search(rowid, username, email) VALUES (new.id, new.username, new.email);
+        END
+        """,
+        # (re)index whatever is already in users
+        "INSERT INTO users_search(users_search) VALUES ('rebuild')",
+    ],
+}
+
+
+def install_row_counters(connection):
+    """Create the users row-count triggers and seed the counter (users and row_counters must exist)."""
+    for stmt in USERS_COUNTER_DDL.get(connection.dialect.name, []):
+        connection.execute(text(stmt))
+    connection.execute(text(SEED_USERS_COUNTER))
+
+
+def install_user_search(connection) -> bool:
+    """
+    Create the search index inside a savepoint. Without pg_trgm (or the
+    privilege to create it) or FTS5, log a warning and return False: search
+    then falls back to an unindexed LIKE scan.
+    """
+    statements = USERS_SEARCH_DDL.get(connection.dialect.name)
+    if not statements:
+        return False
+    try:
+        with connection.begin_nested():
+            for stmt in statements:
+                connection.execute(text(stmt))
+    except DBAPIError as exc:
+        logger.warning("User search index not installed: %s", exc)
+        return False
+    return True
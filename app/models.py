@@ -1,11 +1,19 @@
 # app/models.py
-from werkzeug.security import generate_password_hash, check_password_hash
 from app import db
+from app.services import hashing
 import re
 from sqlalchemy import Column, DateTime, func
 
+PASSWORD_POLICY_MESSAGE = (
+    "Password must be at least 8 characters long, contain one uppercase, one lowercase, one digit, and one special character."
+)
+
 class User(db.Model):
     __tablename__ = 'users'
+    __table_args__ = (
+        # keyset pagination / "newest first" listings order by (created_at, id)
+        db.Index('ix_users_created_at_id', 'created_at', 'id'),
+    )
       
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False, index=True)
@@ -13,20 +21,23 @@ class User(db.Model):
     is_root = db.Column(db.Boolean, default=False, nullable=False)
     password_hash = db.Column(db.String(255), nullable=False)
     created_at = db.Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
-    updated_at = db.Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+    updated_at = db.Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False, index=True)
     force_password_change = db.Column(db.Boolean, default=False, nullable=False)
         
     
     def set_password(self, password):
         #  Validation before hashing
         if not self.validate_password(password):
-            raise ValueError(
-                "Password must be at least 8 characters long, contain one uppercase, one lowercase, one digit, and one special character."
-            )
-        self.password_hash = generate_password_hash(password)
+            raise ValueError(PASSWORD_POLICY_MESSAGE)
+        # hashed on the shared process pool so request threads are not pinned on the KDF
+        self.password_hash = hashing.hash_password(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        ok, new_hash = hashing.verify_and_update(self.password_hash, password)
+        if new_hash:
+            # outdated method/cost: upgrade in place; only users_service.authenticate commits it
+            self.password_hash = new_hash
+        return ok
 
     @staticmethod
     def validate_password(password):
@@ -82,6 +93,18 @@ class User(db.Model):
         return f'User(id={self.id}, username={self.username}, email={self.email})'
 
 
+# Case-insensitive prefix search on /ui filters on lower(username)/lower(email).
+# text_pattern_ops lets Postgres answer LIKE 'abc%' from the index.
+db.Index(
+    'ix_users_username_lower', func.lower(User.username).label('username_lower'),
+    postgresql_ops={'username_lower': 'text_pattern_ops'},
+)
+db.Index(
+    'ix_users_email_lower', func.lower(User.email).label('email_lower'),
+    postgresql_ops={'email_lower': 'text_pattern_ops'},
+)
+
+
 from sqlalchemy import event
 
 @event.listens_for(User, "before_delete")
@@ -99,3 +122,38 @@ def prevent_root_delete(mapper, connection, target):
 
     if getattr(target, "is_root", False):
         raise RootDeletionError("Deleting the root user is not permitted")
+
+
+class RowCounter(db.Model):
+    """
+    Maintained row counts (dashboard "counter" row-count mode).
+    Kept in step by AFTER INSERT/DELETE triggers on the counted table, so
+    Core bulk inserts and bulk deletes are counted too. TRUNCATE is not.
+    """
+    __tablename__ = 'row_counters'
+
+    table_name = db.Column(db.String(64), primary_key=True)
+    row_count = db.Column(db.BigInteger, nullable=False, default=0)
+
+
+# row_counters triggers and the search index: raw DDL shared with the migrations (app/ddl.py)
+@event.listens_for(db.metadata, "after_create")
+def install_row_counters(target, connection, **kw):
+    from sqlalchemy import inspect
+    from app import ddl
+
+    if connection.dialect.name not in ddl.USERS_COUNTER_DDL:
+        return
+    tables = set(inspect(connection).get_table_names())
+    if not {"users", "row_counters"} <= tables:
+        return
+    ddl.install_row_counters(connection)
+
+
+@event.listens_for(db.metadata, "after_create")
+def install_user_search(target, connection, **kw):
+    from sqlalchemy import inspect
+    from app import ddl
+
+    if "users" in inspect(connection).get_table_names():
+        ddl.install_user_search(connection)
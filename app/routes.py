@@ -1,12 +1,16 @@
 # app/routes.py
 from flask import jsonify, Blueprint, request, render_template, flash, redirect, url_for
+from flask import Response, stream_with_context, make_response
+from datetime import timezone
+import json
 from app.services import users_service
-from sqlalchemy.exc import IntegrityError
+from app.services import hashing
 import re
 from app import db
-from app.models import User
+from app.models import User, PASSWORD_POLICY_MESSAGE
 from werkzeug.security import generate_password_hash
 from app.utils import validate_password
+from app.blueprints.main import user_table_context
 from flask import current_app
 
 
@@ -24,25 +28,203 @@ def healthz():
 
 @health_bp.route("/ready", methods=["GET"])
 def ready():
-    # readiness: quick DB check
-    db = None
+    # readiness: quick DB check (primary), plus connection pool gauges/counters
     from sqlalchemy import text
+    from app.services.db_pool import pool_stats
+    from app.services.db_replicas import replica_status
+    extra = {}
+    replicas = replica_status(current_app)
+    if replicas is not None:
+        # an ejected replica does not make the app unready: reads fall back to the primary
+        extra["replicas"] = replicas
     try:
-        # if you use Flask-SQLAlchemy: db = current_app.extensions['sqlalchemy'].db
-        # fallback: use current_app.config['SQLALCHEMY_DATABASE_URI'] indirectly via session
-        session = current_app.extensions.get("sqlalchemy").db.session
-        session.execute(text("SELECT 1"))
-        return jsonify(status="ready"), 200
+        db.session.execute(text("SELECT 1"))
+        return jsonify(status="ready", pool=pool_stats(db.engine), **extra), 200
     except Exception as e:
         current_app.logger.warning("Readiness check failed: %s", e)
-        return jsonify(status="not ready", error=str(e)), 503
+        return jsonify(status="not ready", error=str(e), pool=pool_stats(db.engine), **extra), 503
     
 
+NDJSON_MIMETYPE = "application/x-ndjson"
+
+
+def _stream_format():
+    """
+    Return 'ndjson' or 'json' when the caller asked for a streamed full dump
+    (?stream=1|ndjson|json or Accept: application/x-ndjson), else None.
+    """
+    stream = (request.args.get("stream") or "").lower()
+    if stream in ("1", "true", "ndjson"):
+        return "ndjson"
+    if stream == "json":
+        return "json"
+    if request.accept_mimetypes.best == NDJSON_MIMETYPE:
+        return "ndjson"
+    return None
+
+
+def _stream_users(fmt: str):
+    batch_size = current_app.config.get("USERS_STREAM_BATCH_SIZE", 1000)
+    users = users_service.iter_users(batch_size=batch_size)
+
+    def ndjson():
+        for user in users:
+            yield json.dumps(user.to_dict()) + "\n"
+
+    def json_array():
+        # chunked JSON array: emit one element at a time, never the whole list
+        yield "["
+        for i, user in enumerate(users):
+            yield ("," if i else "") + json.dumps(user.to_dict())
+        yield "]"
+
+    body = ndjson() if fmt == "ndjson" else json_array()
+    mimetype = NDJSON_MIMETYPE if fmt == "ndjson" else "application/json"
+    # stream_with_context keeps the app context (and DB session) alive while the
+    # generator runs; the session is released when the stream is exhausted
+    return Response(stream_with_context(body), mimetype=mimetype)
+
+
+def _http_datetime(value):
+    # SQLite hands back naive timestamps; they are stored in UTC
+    if value is not None and value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _set_validators(resp, etag, last_modified):
+    resp.set_etag(etag, weak=True)
+    if last_modified is not None:
+        resp.last_modified = last_modified
+    return resp
+
+
+def _not_modified(etag, last_modified):
+    """
+    Return a 304 response if the request's validators still match, else None.
+    If-None-Match takes precedence over If-Modified-Since (RFC 9110 13.2.2).
+    """
+    if request.if_none_match:
+        matched = request.if_none_match.contains_weak(etag)
+    elif request.if_modified_since and last_modified is not None:
+        matched = last_modified.replace(microsecond=0) <= request.if_modified_since
+    else:
+        matched = False
+    if not matched:
+        return None
+    return _set_validators(Response(status=304), etag, last_modified)
+
+
 # GET all users
+# Returns a keyset-paginated envelope driven by ?limit=&after=&sort=&order=;
+# without them the first USERS_PAGE_DEFAULT_LIMIT rows are returned. The old
+# unbounded list shape is only served when USERS_LIST_LEGACY_FULL is set, and
+# is marked with a Deprecation header.
+# ?stream=1 (or Accept: application/x-ndjson) streams every row as NDJSON.
+# Responses carry a weak ETag derived from max(updated_at) and the row count,
+# so unchanged polls get a 304 without loading any rows. There is no
+# Last-Modified (and If-Modified-Since is ignored): deleting a row leaves
+# max(updated_at) unchanged, so only the ETag notices it.
 @user_bp.route("", methods=['GET'])
 def list_users_api():
-    users = users_service.list_users()
-    return jsonify([u.to_dict() for u in users]), 200
+    last_modified, count = users_service.users_collection_state()
+    etag = users_service.collection_etag(_http_datetime(last_modified), count,
+                                         request.args.items(multi=True), _stream_format())
+    not_modified = _not_modified(etag, None)
+    if not_modified is not None:
+        return not_modified
+
+    resp = make_response(_users_listing())
+    if resp.status_code == 200:
+        _set_validators(resp, etag, None)
+    return resp
+
+
+def _users_listing():
+    fmt = _stream_format()
+    if fmt:
+        return _stream_users(fmt)
+
+    paged = any(arg in request.args for arg in users_service.PAGINATION_ARGS)
+    if current_app.config.get("USERS_LIST_LEGACY_FULL") and not paged:
+        users = users_service.list_users()
+        return jsonify([u.to_dict() for u in users]), 200, {"Deprecation": "true"}
+
+    limit, after, sort, order = users_service.page_params(
+        request.args.items(multi=True),
+        current_app.config.get("USERS_PAGE_DEFAULT_LIMIT", 50),
+        current_app.config.get("USERS_PAGE_MAX_LIMIT", 500),
+    )
+    try:
+        users, next_cursor = users_service.list_users_page(limit=limit, after=after, sort=sort, order=order)
+    except ValueError as ve:
+        return jsonify(users_service.pagination_error(ve)), 400
+    return jsonify(users_service.page_envelope(users, limit, sort, order, next_cursor)), 200
+
+# GET single user
+@user_bp.route("/<int:user_id>", methods=["GET"])
+def get_user_api(user_id):
+    last_modified = _http_datetime(users_service.user_last_modified(user_id))
+    if last_modified is None:
+        return jsonify({"message": "User not found", "errors": {"user_id": "No user for given id"}}), 404
+
+    etag = users_service.user_etag(user_id, last_modified)
+    not_modified = _not_modified(etag, last_modified)
+    if not_modified is not None:
+        return not_modified
+
+    user = db.session.get(User, user_id)
+    if user is None:
+        return jsonify({"message": "User not found", "errors": {"user_id": "No user for given id"}}), 404
+    return _set_validators(jsonify(user.to_dict()), etag, last_modified)
+
+# GET /api/users/search?q=<term>&limit=<n>
+# Ranked lookup by partial username/email: exact, then prefix, then substring
+# (substring needs at least 3 characters so the trigram index can answer it).
+@user_bp.route("/search", methods=["GET"])
+def search_users_api():
+    q = (request.args.get("q") or "").strip()
+    max_term = current_app.config.get("USERS_SEARCH_MAX_TERM", 100)
+    if not q or len(q) > max_term:
+        return jsonify({"message": "Invalid search", "errors": {"q": f"Provide a search term of 1-{max_term} characters."}}), 400
+
+    max_limit = current_app.config.get("USERS_SEARCH_MAX_LIMIT", 100)
+    limit = request.args.get("limit", type=int) or current_app.config.get("USERS_SEARCH_DEFAULT_LIMIT", 20)
+    limit = max(1, min(limit, max_limit))
+
+    matches = users_service.search_users(
+        q, limit=limit, candidates=current_app.config.get("USERS_SEARCH_CANDIDATES", 200)
+    )
+    return jsonify({
+        "q": q,
+        "limit": limit,
+        "items": [{**user.to_dict(), "match": kind} for user, kind in matches],
+    }), 200
+
+USER_FIELDS = ("username", "email", "password", "confirm_password")
+
+
+def _type_errors(data):
+    """Errors for user fields that are present but not strings (e.g. a numeric username in JSON)."""
+    return [f"{field} must be a string." for field in USER_FIELDS
+            if data.get(field) is not None and not isinstance(data.get(field), str)]
+
+
+def _field_errors(username, email, password, confirm):
+    """Field validation shared by create_user_api and bulk_create_users_api."""
+    errors = []
+    if not username:
+        errors.append("Username is required.")
+    elif not USERNAME_RE.match(username):
+        errors.append("Invalid username. Use 3-50 characters: letters, digits, . _ - only.")
+
+    if not email or '@' not in email:
+        errors.append("Invalid email address.")
+    if len(password) < 8:
+        errors.append("Password too short (min 8).")
+    if password != confirm:
+        errors.append("Passwords do not match.")
+    return errors
 
 # CREATE user
 @user_bp.route("", methods=['POST'])
@@ -52,7 +234,10 @@ def create_user_api():
     is_json = json_data is not None
 
     if is_json:
-        data = json_data
+        data = json_data if isinstance(json_data, dict) else {}
+        type_errors = _type_errors(data)
+        if type_errors:
+            return jsonify({"message": "Validation failed", "errors": type_errors}), 422
         username = (data.get('username') or '').strip()
         email = (data.get('email') or '').strip()
         password = data.get('password') or ''
@@ -71,25 +256,14 @@ def create_user_api():
         form_data = {'username': username, 'email': email or ''}
         return render_template(
             'ui.html',
-            users=User.query.order_by(User.created_at.desc()).all(),
+            **user_table_context(),
             form_data=form_data,
             error_message="Invalid username.",
             open_modal='create'
         ), 422
 
     # validations
-    errors = []
-    if not username:
-        errors.append("Username is required.")
-    elif not USERNAME_RE.match(username):
-        errors.append("Invalid username. Use 3-50 characters: letters, digits, . _ - only.")
-
-    if not email or '@' not in email:
-        errors.append("Invalid email address.")
-    if len(password) < 8:
-        errors.append("Password too short (min 8).")
-    if password != confirm:
-        errors.append("Passwords do not match.")
+    errors = _field_errors(username, email, password, confirm)
 
     if errors:
         if is_json:
@@ -97,7 +271,7 @@ def create_user_api():
         form_data = {'username': username, 'email': email}
         return render_template(
             'ui.html',
-            users=User.query.order_by(User.created_at.desc()).all(),
+            **user_table_context(),
             form_data=form_data,
             error_message=' '.join(errors),
             open_modal='create'
@@ -105,10 +279,13 @@ def create_user_api():
 
     # create user (handle model-level validation cleanly)
     try:
-        user = User(username=username, email=email)
         try:
-            # model may raise ValueError or other exception types for policy violations
-            user.password = password
+            # same policy the model enforces in set_password
+            if not User.validate_password(password):
+                raise ValueError(PASSWORD_POLICY_MESSAGE)
+            password_hash = hashing.hash_password(password)
+        except hashing.HashingBusy:
+            raise
         except Exception as ve:
             # Treat model validation errors as 422 (Unprocessable Entity)
             db.session.rollback()
@@ -118,27 +295,29 @@ def create_user_api():
             form_data = {'username': username, 'email': email}
             return render_template(
                 'ui.html',
-                users=User.query.order_by(User.created_at.desc()).all(),
+                **user_table_context(),
                 form_data=form_data,
                 error_message=msg,
                 open_modal='create'
             ), 422
 
-        db.session.add(user)
+        # single INSERT ... ON CONFLICT ... RETURNING; the colliding field comes back in the exception
+        user = users_service.insert_user(username, email, password_hash)
         db.session.commit()
-    except IntegrityError:
-        db.session.rollback()
-        msg = 'User with that username or email already exists.'
+    except users_service.UserAlreadyExists as exists:
+        msg = str(exists)
         if is_json:
-            return jsonify({"message": msg, "errors": [msg]}), 422
+            return jsonify({"message": msg, "errors": exists.errors}), 422
         form_data = {'username': username, 'email': email}
         return render_template(
             'ui.html',
-            users=User.query.order_by(User.created_at.desc()).all(),
+            **user_table_context(),
             form_data=form_data,
             error_message=msg,
             open_modal='create'
         ), 422
+    except hashing.HashingBusy:
+        raise
     except Exception as exc:
         # Unexpected error: log and return 500 for API clients
         db.session.rollback()
@@ -149,7 +328,7 @@ def create_user_api():
         form_data = {'username': username, 'email': email}
         return render_template(
             'ui.html',
-            users=User.query.order_by(User.created_at.desc()).all(),
+            **user_table_context(),
             form_data=form_data,
             error_message="Unexpected error creating user",
             open_modal='create'
@@ -170,6 +349,82 @@ def create_user_api():
 
 
 
+def _parse_bulk_body():
+    """Return the list of records from a JSON array / {"users": [...]} / NDJSON body, or None."""
+    if request.mimetype == NDJSON_MIMETYPE:
+        try:
+            return [json.loads(line) for line in request.get_data(as_text=True).splitlines() if line.strip()]
+        except ValueError:
+            return None
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get("users")
+    return data if isinstance(data, list) else None
+
+
+# BULK CREATE users
+# Every record is validated like create_user_api; confirm_password is
+# optional here and only checked when supplied.
+@user_bp.route("/bulk", methods=["POST"])
+def bulk_create_users_api():
+    records = _parse_bulk_body()
+    if not records:
+        return jsonify({"message": "Expected a JSON array of users or an NDJSON body"}), 400
+    max_records = current_app.config.get("BULK_MAX_RECORDS", 10000)
+    if len(records) > max_records:
+        return jsonify({"message": f"Too many records (max {max_records})"}), 413
+
+    results = [None] * len(records)
+    valid, valid_index = [], []
+    for i, rec in enumerate(records):
+        if not isinstance(rec, dict):
+            results[i] = {"status": "invalid", "errors": ["Record must be a JSON object."]}
+            continue
+        type_errors = _type_errors(rec)
+        if type_errors:
+            results[i] = {"status": "invalid", "errors": type_errors}
+            continue
+        username = (rec.get('username') or '').strip()
+        email = (rec.get('email') or '').strip()
+        password = rec.get('password') or ''
+        confirm = (rec.get('confirm_password') or '') if 'confirm_password' in rec else password
+
+        if username and SUSPICIOUS_USERNAME_RE.search(username):
+            errors = ["Invalid username."]
+        else:
+            errors = _field_errors(username, email, password, confirm)
+            if not errors and not User.validate_password(password):
+                errors = [PASSWORD_POLICY_MESSAGE]
+        if errors:
+            results[i] = {"status": "invalid", "errors": errors}
+            continue
+        valid.append({"username": username, "email": email, "password": password})
+        valid_index.append(i)
+
+    try:
+        outcome = users_service.bulk_create_users(
+            valid, batch_size=current_app.config.get("BULK_INSERT_BATCH_SIZE", 500)
+        )
+    except hashing.HashingBusy:
+        raise
+    except Exception:
+        current_app.logger.exception("Unexpected error in bulk user creation")
+        return jsonify({"message": "Internal error creating users"}), 500
+    for i, res in zip(valid_index, outcome):
+        results[i] = res
+
+    for i, res in enumerate(results):
+        res["index"] = i
+    summary = {status: sum(1 for r in results if r["status"] == status) for status in ("created", "duplicate", "invalid")}
+    if summary["created"] == len(results):
+        status_code = 201
+    elif summary["created"]:
+        status_code = 200
+    else:
+        status_code = 422
+    return jsonify({"summary": summary, "results": results}), status_code
+
+
 # RESET password
 @user_bp.route("/<int:user_id>/reset_password", methods=["POST"])
 def reset_password_api(user_id):
@@ -196,6 +451,9 @@ def reset_password_api(user_id):
     except ValueError as ve:
         db.session.rollback()
         return jsonify({"message": str(ve)}), 422
+    except hashing.HashingBusy:
+        db.session.rollback()
+        raise
     except Exception as e:
         current_app.logger.exception("Error resetting password")
         db.session.rollback()
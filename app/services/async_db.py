@@ -0,0 +1,79 @@
+#app/services/async_db.py
+"""
+SQLAlchemy async engine for the ASGI mode (see app/asgi.py).
+
+The async engine points at the same database as the app's sync engine,
+with the driver swapped for its asyncio counterpart: asyncpg for Postgres,
+aiosqlite for SQLite. Set ASYNC_DATABASE_URL to use another URL. Pool
+options come from SQLALCHEMY_ENGINE_OPTIONS, except the pool class:
+asyncio needs SQLAlchemy's AsyncAdaptedQueuePool.
+
+The drivers are an optional extra (requirements-asgi.txt, or
+pip install .[asgi]): the WSGI deployment does not install them. They are
+only looked up when the async engine is created, and a missing one fails
+with the install hint instead of an import error deep in SQLAlchemy.
+"""
+import importlib.util
+
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.services.db_pool import QUEUE_POOL_OPTIONS
+
+ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
+
+def require_driver(url: URL):
+    """Raise RuntimeError if the asyncio driver for url is not installed."""
+    module = url.get_driver_name()
+    if importlib.util.find_spec(module) is None:
+        raise RuntimeError(
+            f"ASGI mode needs the {module!r} driver for {url.get_backend_name()}: "
+            "pip install -r requirements-asgi.txt"
+        )
+
+
+def async_url(url) -> URL:
+    """The asyncio-driver equivalent of a sync database URL."""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend!r}; set ASYNC_DATABASE_URL")
+    url = url.set(drivername=ASYNC_DRIVERS[backend])
+    if backend == "postgresql" and "sslmode" in url.query:
+        # asyncpg spells libpq's sslmode as ssl
+        query = dict(url.query)
+        query["ssl"] = query.pop("sslmode")
+        url = url.set(query=query)
+    return url
+
+
+def _is_memory_sqlite(url: URL) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def create_engine_for(app) -> AsyncEngine:
+    """Build the async engine for app: same database as db.engine unless ASYNC_DATABASE_URL is set."""
+    url = app.config.get("ASYNC_DATABASE_URL")
+    if not url:
+        from app import db
+        with app.app_context():
+            url = db.engine.url.render_as_string(hide_password=False)
+    url = async_url(url)
+    require_driver(url)
+
+    options = dict(app.config.get("SQLALCHEMY_ENGINE_OPTIONS") or {})
+    options.pop("poolclass", None)
+    if _is_memory_sqlite(url):
+        for key in QUEUE_POOL_OPTIONS:
+            options.pop(key, None)
+    else:
+        # aiosqlite file databases would otherwise get a NullPool
+        options["poolclass"] = AsyncAdaptedQueuePool
+    return create_async_engine(url, **options)
+
+
+def sessionmaker_for(engine: AsyncEngine) -> async_sessionmaker:
+    # handlers serialise rows after commit/close; keep the loaded attributes
+    return async_sessionmaker(engine, expire_on_commit=False)
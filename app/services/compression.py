@@ -0,0 +1,178 @@
+#app/services/compression.py
+"""
+gzip / brotli response compression, negotiated from Accept-Encoding.
+
+The after_request hook compresses text-like bodies (COMPRESSIBLE_MIMETYPES:
+JSON, NDJSON, HTML, CSS, JS, ...) when the client accepts it:
+- brotli (COMPRESS_BR_LEVEL) if the brotli package is installed, COMPRESS_BROTLI
+  is on and the client prefers it at least as much as gzip; else gzip (COMPRESS_LEVEL);
+- buffered bodies below COMPRESS_MIN_SIZE bytes are left alone: the
+  framing overhead would eat the saving;
+- streamed bodies (the NDJSON/JSON user dumps) are compressed as they are
+  produced, with a sync flush every STREAM_FLUSH_BYTES of input so the
+  client keeps receiving complete chunks;
+- anything already encoded, images/archives (not in the list), SSE,
+  file downloads (direct passthrough), partial content and
+  Cache-Control: no-transform responses are passed through.
+
+Compressed responses get Vary: Accept-Encoding and a weak ETag (the bytes
+differ from the identity representation). Buffered compression time is
+recorded as the "zip" phase of app.services.request_timing.
+
+The same negotiation covers the async routes of app/asgi.py
+(AsyncAPI calls encode_body()).
+"""
+import zlib
+from typing import Iterable, Iterator, Optional, Tuple
+
+from flask import request
+from werkzeug.http import parse_accept_header
+
+from app.services import request_timing
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = frozenset({
+    "application/json", "application/x-ndjson", "application/javascript", "application/xml",
+    "image/svg+xml", "text/html", "text/css", "text/plain", "text/csv", "text/javascript", "text/xml",
+})
+STREAM_FLUSH_BYTES = 16 * 1024
+
+
+class GzipEncoder:
+    def __init__(self, level: int = 6):
+        self._z = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)  # +16: gzip framing
+
+    def compress(self, data: bytes) -> bytes:
+        return self._z.compress(data)
+
+    def flush(self) -> bytes:
+        return self._z.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._z.flush(zlib.Z_FINISH)
+
+
+class BrotliEncoder:
+    def __init__(self, level: int = 4):
+        self._c = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._c.process(data)
+
+    def flush(self) -> bytes:
+        return self._c.flush()
+
+    def finish(self) -> bytes:
+        return self._c.finish()
+
+
+def brotli_available(config) -> bool:
+    return brotli is not None and config.get("COMPRESS_BROTLI", True)
+
+
+def negotiate(accept_encoding: Optional[str], use_brotli: bool = True) -> Optional[str]:
+    """'br', 'gzip' or None (identity) for an Accept-Encoding header value."""
+    if not accept_encoding:
+        return None
+    accept = parse_accept_header(accept_encoding)
+    candidates = ("br", "gzip") if use_brotli and brotli is not None else ("gzip",)
+    best = max(candidates, key=accept.quality)  # ties keep the first: br
+    return best if accept.quality(best) > 0 else None
+
+
+def make_encoder(encoding: str, config):
+    if encoding == "br":
+        return BrotliEncoder(int(config.get("COMPRESS_BR_LEVEL", 4)))
+    return GzipEncoder(int(config.get("COMPRESS_LEVEL", 6)))
+
+
+def compress(data: bytes, encoding: str, config) -> bytes:
+    encoder = make_encoder(encoding, config)
+    return encoder.compress(data) + encoder.finish()
+
+
+def iter_compressed(chunks: Iterable, encoder) -> Iterator[bytes]:
+    """Compress a body iterable chunk by chunk; closes the source iterable when done."""
+    try:
+        pending = 0
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode()
+            out = encoder.compress(chunk)
+            pending += len(chunk)
+            if pending >= STREAM_FLUSH_BYTES:
+                out += encoder.flush()
+                pending = 0
+            if out:
+                yield out
+        yield encoder.finish()
+    finally:
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            close()
+
+
+def encode_body(config, accept_encoding: Optional[str], mimetype: Optional[str],
+                body: bytes) -> Tuple[Optional[str], bytes]:
+    """(encoding, body) for a buffered response; encoding is None when it is sent as is."""
+    if not config.get("COMPRESS_ENABLED", True) or mimetype not in COMPRESSIBLE_MIMETYPES:
+        return None, body
+    if len(body) < int(config.get("COMPRESS_MIN_SIZE", 500)):
+        return None, body
+    encoding = negotiate(accept_encoding, brotli_available(config))
+    if encoding is None:
+        return None, body
+    with request_timing.phase("zip"):
+        return encoding, compress(body, encoding, config)
+
+
+def _skip(response) -> bool:
+    return (
+        response.status_code < 200 or response.status_code in (204, 206, 304)
+        or request.method == "HEAD"
+        or response.direct_passthrough
+        or "Content-Encoding" in response.headers
+        or "no-transform" in (response.headers.get("Cache-Control") or "")
+        or response.mimetype not in COMPRESSIBLE_MIMETYPES
+    )
+
+
+def _make_after_request(app):
+    config = app.config
+
+    def _after_request(response):
+        if not config.get("COMPRESS_ENABLED", True) or _skip(response):
+            return response
+        # the representation depends on Accept-Encoding even when this one goes out uncompressed
+        response.vary.add("Accept-Encoding")
+
+        if response.is_streamed:
+            encoding = negotiate(request.headers.get("Accept-Encoding"), brotli_available(config))
+            if encoding is None:
+                return response
+            response.response = iter_compressed(response.response, make_encoder(encoding, config))
+            response.headers.pop("Content-Length", None)
+        else:
+            encoding, body = encode_body(config, request.headers.get("Accept-Encoding"),
+                                         response.mimetype, response.get_data())
+            if encoding is None:
+                return response
+            response.set_data(body)
+
+        response.headers["Content-Encoding"] = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+    return _after_request
+
+
+def init_app(app):
+    # registered last so it runs before the other after_request hooks (Flask runs
+    # them in reverse): its time is part of the Server-Timing total
+    app.after_request(_make_after_request(app))
@@ -0,0 +1,147 @@
+#app/services/dashboard.py
+"""
+Dashboard snapshot: the single place that collects what /dashboard and
+/dashboard/data show.
+
+Static host facts (container id, image, hostname, environment) are read
+once in init_app(). The dynamic part (DB check, system usage, API probes)
+is built by build_snapshot() and cached for DASHBOARD_SNAPSHOT_TTL seconds
+behind a single-flight guard: when the cache is stale, one request
+rebuilds it while concurrent callers wait for that result.
+"""
+import logging
+import os
+import socket
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import text
+
+from app import db
+from app.services import db_pool, health_probes, row_counts, system_metrics, timeseries
+
+logger = logging.getLogger(__name__)
+
+EXTENSION_KEY = "dashboard"
+SERVER_TZ = ZoneInfo('Asia/Kolkata')
+
+
+def read_container_id(path: str = "/proc/self/cgroup") -> str:
+    """Short docker container id from the cgroup file, "N/A" outside docker."""
+    container_id = "N/A"
+    try:
+        with open(path, "r") as f:
+            for line in f:
+                if "docker" in line:
+                    container_id = line.strip().split("/")[-1][:12]
+    except (IndexError, AttributeError, ValueError, OSError) as exc:
+        logger.debug("Could not parse container id from %s: %s", path, exc)
+    return container_id
+
+
+def host_facts(app) -> Dict[str, str]:
+    return {
+        "env_name": app.config.get("ENV_NAME") or os.getenv("APP_CONFIG", "development"),
+        "hostname": os.getenv("APP_HOSTNAME", socket.gethostname()),
+        "container_id": read_container_id(),
+        "container_image": os.getenv("APP_IMAGE", "unknown"),
+    }
+
+
+class SingleFlightCache:
+    """TTL cache for one value where concurrent misses share a single build."""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._value: Any = None
+        self._built_at = 0.0
+        self._inflight: Optional[Future] = None
+
+    def get(self, build: Callable[[], Any]) -> Any:
+        with self._lock:
+            if self._value is not None and time.monotonic() - self._built_at < self.ttl:
+                return self._value
+            inflight = self._inflight
+            if inflight is None:
+                inflight = self._inflight = Future()
+                leader = True
+            else:
+                leader = False
+        if not leader:
+            return inflight.result()
+
+        try:
+            value = build()
+        except BaseException as exc:
+            with self._lock:
+                self._inflight = None
+            inflight.set_exception(exc)
+            raise
+        with self._lock:
+            self._value, self._built_at, self._inflight = value, time.monotonic(), None
+        inflight.set_result(value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._value = None
+
+
+def db_status(app) -> Dict[str, Any]:
+    # latency is timed on a trivial round trip; the row count comes from the
+    # configured provider (exact / estimated / counter)
+    try:
+        start = time.time()
+        db.session.execute(text("SELECT 1"))
+        latency = round((time.time() - start) * 1000, 2)  # ms
+        timeseries.record(app, "db_latency_ms", latency)
+        row_count, rows_source = row_counts.count_rows(
+            "users", app.config.get("DASHBOARD_ROW_COUNT_MODE", "exact")
+        )
+        return {"status": "Up", "latency": latency, "rows": row_count, "rows_source": rows_source}
+    except Exception as e:
+        app.logger.error(f"DB connection error: {e}")
+        return {"status": "Down", "latency": None, "rows": None, "rows_source": None}
+
+
+def build_snapshot(app) -> Dict[str, Any]:
+    """Collect the dynamic dashboard data. Needs an app context (DB session)."""
+    facts = app.extensions[EXTENSION_KEY]["facts"]
+    usage = system_metrics.current_usage(app)
+    return {
+        "env_name": facts["env_name"],
+        "hostname": facts["hostname"],
+        "db_status": db_status(app),
+        "container_info": {
+            "id": facts["container_id"],
+            "image": facts["container_image"],
+            "uptime": f"{usage['uptime_hours']:.2f} hrs",
+        },
+        "system_usage": {"cpu": usage["cpu"], "memory": usage["memory"]},
+        "api_health": health_probes.api_health(app),
+        # App health (static for now, self check always "Healthy")
+        "app_health": "Healthy",
+    }
+
+
+def get_snapshot(app) -> Dict[str, Any]:
+    """Cached snapshot plus a fresh server_time and live pool stats (both free to read)."""
+    cache = app.extensions[EXTENSION_KEY]["cache"]
+    snapshot = cache.get(lambda: build_snapshot(app))
+    return {
+        **snapshot,
+        "db_pool": db_pool.pool_stats(db.engine),
+        "server_time": datetime.now(SERVER_TZ).strftime('%Y-%m-%d %H:%M:%S'),
+    }
+
+
+def init_app(app):
+    app.extensions[EXTENSION_KEY] = {
+        "facts": host_facts(app),
+        "cache": SingleFlightCache(ttl=float(app.config.get("DASHBOARD_SNAPSHOT_TTL", 5))),
+    }
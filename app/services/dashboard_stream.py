@@ -0,0 +1,193 @@
+#app/services/dashboard_stream.py
+"""
+Server-Sent Events channel for the live dashboard.
+
+One producer thread per process builds the dashboard snapshot every
+DASHBOARD_STREAM_INTERVAL seconds and publishes it; every connected client
+reads the same published object and is sent only the top-level keys that
+changed since its last event. The producer runs only while someone is
+subscribed, and each stream ends after DASHBOARD_STREAM_MAX_DURATION
+seconds (EventSource reconnects on its own), so idle or abandoned streams
+never pin a worker thread or a DB connection. The stream generator itself
+never touches the database.
+
+An open stream does hold a worker thread for up to MAX_DURATION seconds,
+so the client limit follows the threads a worker serves requests with:
+threads - DASHBOARD_STREAM_THREAD_HEADROOM, leaving the rest for ordinary
+requests (GUNICORN_THREADS at init; gunicorn.conf.py resizes it from the
+running config in post_fork, and asgi.py from ASGI_WSGI_THREADS). Setting
+DASHBOARD_STREAM_MAX_CLIENTS pins the limit instead. A worker with no
+spare thread (sync, or gthread with 1 thread) serves no streams; the
+dashboard gets a 503 and polls.
+"""
+import os
+import json
+import logging
+import threading
+import time
+from typing import Any, Dict, Iterator, Optional
+
+from app.services import dashboard
+
+logger = logging.getLogger(__name__)
+
+EXTENSION_KEY = "dashboard_stream"
+
+
+class TooManySubscribers(Exception):
+    ...
+
+
+def format_event(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def clients_for_threads(threads: int, headroom: int = 1) -> int:
+    """Streams a worker with `threads` request threads can hold and still serve `headroom` requests."""
+    return max(0, int(threads) - int(headroom))
+
+
+def diff(previous: Optional[Dict[str, Any]], current: Dict[str, Any]) -> Dict[str, Any]:
+    """Top-level keys of current whose values differ from previous."""
+    if previous is None:
+        return dict(current)
+    return {k: v for k, v in current.items() if previous.get(k) != v}
+
+
+class EventStream:
+    """
+    Response body for one client. The WSGI server calls close() when the
+    client goes away; that releases the subscription even if iteration never
+    started (closing an unstarted generator skips its finally block).
+    """
+
+    def __init__(self, broadcaster: "SnapshotBroadcaster"):
+        self._broadcaster = broadcaster
+        self._events = broadcaster._events()
+        self._closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        try:
+            return next(self._events)
+        except StopIteration:
+            self.close()
+            raise
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self._events.close()
+            self._broadcaster._unsubscribe()
+
+
+class SnapshotBroadcaster:
+    def __init__(self, app, interval: float = 5.0, max_duration: float = 300.0,
+                 heartbeat: float = 15.0, max_clients: int = 20, headroom: Optional[int] = None):
+        self.app = app
+        self.interval = interval
+        self.max_duration = max_duration
+        self.heartbeat = heartbeat
+        self.max_clients = max_clients
+        # None: max_clients was pinned by config and fit_to_threads leaves it alone
+        self.headroom = headroom
+        self._cond = threading.Condition()
+        self._subscribers = 0
+        self._version = 0
+        self._latest: Optional[Dict[str, Any]] = None
+        self._producer: Optional[threading.Thread] = None
+
+    @property
+    def subscribers(self) -> int:
+        return self._subscribers
+
+    def fit_to_threads(self, threads: int):
+        """Size the client limit for a server with `threads` request threads per process."""
+        if self.headroom is not None:
+            self.max_clients = clients_for_threads(threads, self.headroom)
+
+    def _produce(self):
+        while True:
+            with self._cond:
+                if self._subscribers == 0:
+                    self._producer = None
+                    return
+            try:
+                # a short-lived app context: the DB connection goes back to the pool every tick
+                with self.app.app_context():
+                    snapshot = dashboard.get_snapshot(self.app)
+            except Exception:
+                logger.exception("Dashboard stream producer failed to build a snapshot")
+                snapshot = None
+            with self._cond:
+                if snapshot is not None:
+                    self._latest = snapshot
+                    self._version += 1
+                    self._cond.notify_all()
+                self._cond.wait(self.interval)
+
+    def _subscribe(self):
+        with self._cond:
+            if self._subscribers >= self.max_clients:
+                raise TooManySubscribers(f"dashboard stream is limited to {self.max_clients} clients")
+            self._subscribers += 1
+            if self._producer is None or not self._producer.is_alive():
+                self._producer = threading.Thread(target=self._produce, name="dashboard-stream", daemon=True)
+                self._producer.start()
+
+    def _unsubscribe(self):
+        with self._cond:
+            self._subscribers -= 1
+            # wake the producer so it can exit promptly when the last client leaves
+            self._cond.notify_all()
+
+    def stream(self) -> EventStream:
+        """
+        Event stream for one client. Raises TooManySubscribers up front
+        (before the response starts) when the client limit is reached.
+        """
+        self._subscribe()
+        return EventStream(self)
+
+    def _events(self) -> Iterator[str]:
+        seen_version, sent = 0, None
+        deadline = time.monotonic() + self.max_duration
+        last_write = time.monotonic()
+        yield f"retry: {int(self.interval * 1000)}\n\n"
+        while time.monotonic() < deadline:
+            with self._cond:
+                if self._version == seen_version:
+                    self._cond.wait(min(self.heartbeat, max(0.0, deadline - time.monotonic())))
+                version, latest = self._version, self._latest
+            if version != seen_version and latest is not None:
+                changes = diff(sent, latest)
+                seen_version, sent = version, latest
+                if changes:
+                    yield format_event("snapshot" if len(changes) == len(latest) else "delta", changes)
+                    last_write = time.monotonic()
+                    continue
+            if time.monotonic() - last_write >= self.heartbeat:
+                # comment line: keeps proxies from timing out and surfaces dead clients
+                yield ": keepalive\n\n"
+                last_write = time.monotonic()
+
+
+def init_app(app):
+    max_clients = app.config.get("DASHBOARD_STREAM_MAX_CLIENTS")
+    headroom = None
+    if max_clients is None:
+        headroom = int(app.config.get("DASHBOARD_STREAM_THREAD_HEADROOM", 1))
+        # same default as gunicorn.conf.py; post_fork corrects it from the live config
+        max_clients = clients_for_threads(int(os.getenv("GUNICORN_THREADS", "2")), headroom)
+    broadcaster = SnapshotBroadcaster(
+        app,
+        interval=float(app.config.get("DASHBOARD_STREAM_INTERVAL", 5)),
+        max_duration=float(app.config.get("DASHBOARD_STREAM_MAX_DURATION", 300)),
+        heartbeat=float(app.config.get("DASHBOARD_STREAM_HEARTBEAT", 15)),
+        max_clients=int(max_clients),
+        headroom=headroom,
+    )
+    app.extensions[EXTENSION_KEY] = broadcaster
+    return broadcaster
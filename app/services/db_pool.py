@@ -0,0 +1,153 @@
+#app/services/db_pool.py
+"""
+Connection pool configuration and instrumentation.
+
+Pool sizing/recycling comes from SQLALCHEMY_ENGINE_OPTIONS (see
+config.engine_options). configure() adapts those options to the database
+URI and swaps in InstrumentedQueuePool, a QueuePool that records how long
+callers waited for a connection, how long new connections took to open,
+checkout timeouts and invalidations. pool_stats() reports those numbers
+together with the pool's live size/checked-out/overflow counts for
+/dashboard/data and /ready.
+"""
+import threading
+import time
+from typing import Any, Dict
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from sqlalchemy.pool import QueuePool
+
+# options only QueuePool understands
+QUEUE_POOL_OPTIONS = ("pool_size", "max_overflow", "pool_timeout")
+
+
+class PoolStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.wait_ms_total = 0.0
+        self.wait_ms_max = 0.0
+        self.timeouts = 0
+        self.connects = 0
+        self.connect_ms_total = 0.0
+        self.connect_ms_max = 0.0
+        self.invalidations = 0
+
+    def record_wait(self, ms: float):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_ms_total += ms
+            self.wait_ms_max = max(self.wait_ms_max, ms)
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def record_connect(self, ms: float):
+        with self._lock:
+            self.connects += 1
+            self.connect_ms_total += ms
+            self.connect_ms_max = max(self.connect_ms_max, ms)
+
+    def record_invalidation(self):
+        with self._lock:
+            self.invalidations += 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "wait_ms_avg": round(self.wait_ms_total / self.checkouts, 3) if self.checkouts else 0.0,
+                "wait_ms_max": round(self.wait_ms_max, 3),
+                "timeouts": self.timeouts,
+                "connects": self.connects,
+                "connect_ms_avg": round(self.connect_ms_total / self.connects, 3) if self.connects else 0.0,
+                "connect_ms_max": round(self.connect_ms_max, 3),
+                "invalidations": self.invalidations,
+            }
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that times checkout waits and new connections into a PoolStats."""
+
+    def __init__(self, *args, stats: PoolStats = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = stats or PoolStats()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeout:
+            self.stats.record_timeout()
+            raise
+        self.stats.record_wait((time.perf_counter() - start) * 1000)
+        return conn
+
+    def _create_connection(self):
+        start = time.perf_counter()
+        record = super()._create_connection()
+        self.stats.record_connect((time.perf_counter() - start) * 1000)
+        return record
+
+    def recreate(self):
+        # engine.dispose() recreates the pool; keep the counters
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+def configure(app):
+    """
+    Adapt SQLALCHEMY_ENGINE_OPTIONS to the database URI before db.init_app():
+    in-memory SQLite keeps its single shared connection (no QueuePool
+    options); everything else gets InstrumentedQueuePool.
+    """
+    options = dict(app.config.get("SQLALCHEMY_ENGINE_OPTIONS") or {})
+    uri = app.config.get("SQLALCHEMY_DATABASE_URI")
+    url = make_url(uri) if uri else None
+    if url is not None and url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        for key in QUEUE_POOL_OPTIONS:
+            options.pop(key, None)
+    else:
+        options.setdefault("poolclass", InstrumentedQueuePool)
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = options
+
+
+def init_app(app, db):
+    """Count invalidated connections (stale after a failover, failed pre-ping)."""
+    with app.app_context():
+        engines = list(db.engines.values())  # primary plus any read replicas
+
+    for engine in engines:
+        event.listen(engine, "invalidate", _make_invalidate_listener(engine))
+
+
+def _make_invalidate_listener(engine):
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        stats = getattr(engine.pool, "stats", None)
+        if stats is not None:
+            stats.record_invalidation()
+    return _on_invalidate
+
+
+def pool_stats(engine) -> Dict[str, Any]:
+    """Live pool gauges plus the instrumented counters (when available)."""
+    pool = engine.pool
+    data: Dict[str, Any] = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        data.update({
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            # negative while the pool is still filling up to pool_size
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": pool._max_overflow,
+            "timeout": pool.timeout(),
+        })
+    stats = getattr(pool, "stats", None)
+    if stats is not None:
+        data.update(stats.as_dict())
+    return data
@@ -0,0 +1,202 @@
+#app/services/db_replicas.py
+"""
+Read-replica routing for db.session.
+
+Replicas are SQLALCHEMY_BINDS entries whose key starts with "replica"
+(create_app adds them from DATABASE_REPLICA_URLS or POSTGRES_REPLICA_HOSTS,
+see config.build_replica_binds). When any are configured, RoutingSession
+sends plain SELECTs to a replica and everything else to the primary:
+- INSERT/UPDATE/DELETE, flushes, SELECT ... FOR UPDATE and raw text()
+  statements always use the primary;
+- once a session has written, the rest of it reads from the primary too;
+- non-GET requests are pinned to the primary for their whole duration;
+- after a request that wrote, the client gets a short-lived cookie
+  (REPLICA_STICKY_SECONDS) that keeps its next requests on the primary,
+  so it reads its own writes while the replicas catch up.
+
+Replicas are used round-robin. One that raises a connection error
+(a disconnect, or a connection-class SQLSTATE; not a statement or lock
+timeout) is ejected for REPLICA_EJECT_SECONDS and is re-admitted only once a SELECT 1
+succeeds; with every replica out, reads fall back to the primary. The
+request that hit the failure still fails; later ones avoid the replica.
+"""
+import itertools
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+import sqlalchemy as sa
+from flask import current_app, has_app_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, text
+from sqlalchemy.exc import DBAPIError
+
+logger = logging.getLogger(__name__)
+
+EXTENSION_KEY = "db_replicas"
+REPLICA_PREFIX = "replica"
+# session.info flags
+PRIMARY_ONLY = "db_primary_only"
+WROTE = "db_wrote"
+
+
+class ReplicaRouter:
+    """Round-robin over replica engines, skipping the ejected ones."""
+
+    def __init__(self, engines: Dict[str, sa.engine.Engine], eject_seconds: float = 30.0):
+        self.engines = dict(engines)
+        self.eject_seconds = eject_seconds
+        self._names: List[str] = sorted(self.engines)
+        self._cycle = itertools.cycle(self._names)
+        self._lock = threading.Lock()
+        self._ejected_until: Dict[str, float] = {}
+        self.reads: Dict[str, int] = {name: 0 for name in self._names}
+
+    def eject(self, name: str, reason: str):
+        with self._lock:
+            self._ejected_until[name] = time.monotonic() + self.eject_seconds
+        logger.warning("Replica %s ejected for %ss: %s", name, self.eject_seconds, reason)
+
+    def _healthy(self, name: str) -> bool:
+        until = self._ejected_until.get(name)
+        if until is None:
+            return True
+        if time.monotonic() < until:
+            return False
+        # ejection expired: probe before taking reads again
+        try:
+            with self.engines[name].connect() as conn:
+                conn.execute(text("SELECT 1"))
+        except DBAPIError as e:
+            self.eject(name, f"still failing: {e.__class__.__name__}")
+            return False
+        with self._lock:
+            self._ejected_until.pop(name, None)
+        logger.info("Replica %s re-admitted", name)
+        return True
+
+    def pick(self) -> Optional[sa.engine.Engine]:
+        """Next healthy replica, or None when all are ejected."""
+        for _ in range(len(self._names)):
+            with self._lock:
+                name = next(self._cycle)
+            if self._healthy(name):
+                with self._lock:
+                    self.reads[name] += 1
+                return self.engines[name]
+        return None
+
+    def status(self) -> Dict[str, Dict]:
+        now = time.monotonic()
+        return {
+            name: {
+                "healthy": self._ejected_until.get(name, 0) <= now,
+                "ejected_for_s": round(max(self._ejected_until.get(name, 0) - now, 0), 1),
+                "reads": self.reads[name],
+            }
+            for name in self._names
+        }
+
+
+def _is_read(clause) -> bool:
+    """Only ORM/Core SELECTs without FOR UPDATE are safe to send to a replica."""
+    return isinstance(clause, (sa.Select, sa.CompoundSelect)) and clause._for_update_arg is None
+
+
+class RoutingSession(Session):
+    """Flask-SQLAlchemy session that sends plain reads to a replica (see module docstring)."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        engine = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        if bind is not None or not has_app_context():
+            return engine
+        router = current_app.extensions.get(EXTENSION_KEY)
+        if router is None or engine is not self._db.engines.get(None):
+            return engine
+        if isinstance(clause, sa.UpdateBase):
+            self.info[PRIMARY_ONLY] = self.info[WROTE] = True
+        if self._flushing or self.info.get(PRIMARY_ONLY) or not _is_read(clause):
+            return engine
+        return router.pick() or engine
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _after_flush(session, flush_context):
+    session.info[PRIMARY_ONLY] = session.info[WROTE] = True
+
+
+# SQLSTATE classes that mean "this server cannot be talked to": 08xxx connection
+# exceptions and 57P01-57P0x (admin/crash shutdown, cannot connect now, database dropped).
+# Not 57014 (statement timeout) or 55P03 (lock timeout): the replica is fine, the query was slow.
+CONNECTION_SQLSTATE_PREFIXES = ("08", "57P0")
+
+
+def is_connection_failure(context) -> bool:
+    """True when a handle_error context says the server is unreachable, not that one statement failed."""
+    if context.is_disconnect:
+        return True
+    orig = context.original_exception
+    code = getattr(orig, "pgcode", None) or getattr(orig, "sqlstate", None)
+    if code:
+        return code.startswith(CONNECTION_SQLSTATE_PREFIXES)
+    # SQLite has no SQLSTATE; a file it cannot open is its "unreachable"
+    return "unable to open database file" in str(orig)
+
+
+def _make_ejector(router: ReplicaRouter, name: str):
+    def _on_error(context):
+        if is_connection_failure(context):
+            router.eject(name, str(context.original_exception))
+    return _on_error
+
+
+def _make_request_hooks(app, db):
+    cookie = app.config.get("REPLICA_STICKY_COOKIE", "db_primary_until")
+    sticky_seconds = float(app.config.get("REPLICA_STICKY_SECONDS", 5))
+
+    def _before_request():
+        try:
+            sticky_until = float(request.cookies.get(cookie, 0))
+        except ValueError:
+            sticky_until = 0
+        info = db.session.info
+        info[WROTE] = False
+        info[PRIMARY_ONLY] = request.method not in ("GET", "HEAD", "OPTIONS") or sticky_until > time.time()
+
+    def _after_request(response):
+        if db.session.info.pop(WROTE, False) and sticky_seconds > 0:
+            response.set_cookie(cookie, str(int(time.time() + sticky_seconds)),
+                                max_age=int(sticky_seconds) or 1, httponly=True, samesite="Lax")
+        return response
+
+    return _before_request, _after_request
+
+
+def init_app(app, db):
+    """Build the router from the replica binds; a no-op when none are configured."""
+    with app.app_context():
+        engines = {key: engine for key, engine in db.engines.items()
+                   if key and key.startswith(REPLICA_PREFIX)}
+    if not engines:
+        return None
+    # replicas mirror the primary's tables and have none of their own: keep
+    # create_all()/drop_all() (which walk db.metadatas) off them
+    for key in engines:
+        db.metadatas.pop(key, None)
+    router = ReplicaRouter(engines, eject_seconds=float(app.config.get("REPLICA_EJECT_SECONDS", 30)))
+    app.extensions[EXTENSION_KEY] = router
+
+    for name, engine in engines.items():
+        event.listen(engine, "handle_error", _make_ejector(router, name))
+
+    before, after = _make_request_hooks(app, db)
+    app.before_request(before)
+    app.after_request(after)
+    logger.info("Routing reads to %d replica(s): %s", len(engines), ", ".join(sorted(engines)))
+    return router
+
+
+def replica_status(app) -> Optional[Dict[str, Dict]]:
+    router = app.extensions.get(EXTENSION_KEY)
+    return router.status() if router is not None else None
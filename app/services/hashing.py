@@ -0,0 +1,182 @@
+#app/services/hashing.py
+"""
+Password hashing off the request thread.
+
+Password KDFs are CPU-bound and hold the GIL, so threads do not help; a
+process pool lets many hashes run on separate cores. The pool is created
+lazily with the "spawn" start method: forking a threaded gunicorn worker is
+not safe, and the children only need werkzeug.
+
+A hash that waits longer than PASSWORD_HASH_TIMEOUT means the pool is
+saturated; hashing inline then would only pile more CPU onto the worker,
+so HashingBusy is raised instead and the app answers 503 with Retry-After.
+"""
+import atexit
+import functools
+import logging
+import math
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FuturesTimeout
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional
+
+from flask import current_app, has_app_context
+from werkzeug.security import generate_password_hash, check_password_hash
+
+from app.services import request_timing
+
+logger = logging.getLogger(__name__)
+
+# werkzeug's own defaults, used when there is no app config to read
+DEFAULT_METHOD = "scrypt"
+DEFAULT_SALT_LENGTH = 16
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+class HashingBusy(Exception):
+    """A hash did not finish within PASSWORD_HASH_TIMEOUT; retry after retry_after seconds."""
+
+    def __init__(self, timeout: float):
+        super().__init__(f"Password hashing did not finish within {timeout:g}s")
+        self.retry_after = max(1, math.ceil(timeout))
+
+
+def default_workers() -> int:
+    """Pool size when PASSWORD_HASH_WORKERS is unset: one process per core."""
+    return os.cpu_count() or 1
+
+
+def _config(key, default=None):
+    return current_app.config.get(key, default) if has_app_context() else default
+
+
+def _configured_workers() -> int:
+    if not has_app_context():
+        # one-off hashes from scripts/migrations are not worth spawning a pool for
+        return 0
+    workers = _config("PASSWORD_HASH_WORKERS")
+    return default_workers() if workers is None else int(workers)
+
+
+def get_executor() -> Optional[ProcessPoolExecutor]:
+    """Return the shared pool, or None when hashing should run inline (workers == 0)."""
+    global _executor
+    workers = _configured_workers()
+    if workers <= 0:
+        return None
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                logger.info("Starting password hashing pool with %s workers", workers)
+                _executor = ProcessPoolExecutor(
+                    max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+                )
+    return _executor
+
+
+@atexit.register
+def shutdown_executor():
+    """Stop the pool (tests, worker exit). A new one is created on next use."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True, cancel_futures=True)
+            _executor = None
+
+
+def _run(fn, *args):
+    """
+    Run fn(*args) on the pool and wait for it. The calling thread blocks
+    without holding the GIL, so cheap requests on the same worker keep moving.
+    Falls back to running inline when no pool is configured or it broke,
+    and raises HashingBusy when PASSWORD_HASH_TIMEOUT runs out.
+    Time spent here counts as the request's "hash" phase.
+    """
+    with request_timing.phase("hash"):
+        executor = get_executor()
+        if executor is None:
+            return fn(*args)
+        timeout = _config("PASSWORD_HASH_TIMEOUT")
+        try:
+            future = executor.submit(fn, *args)
+            return future.result(timeout=timeout)
+        except FuturesTimeout:
+            # still queued: drop it; already running: its result is discarded
+            future.cancel()
+            logger.warning("Password hash timed out after %ss; pool saturated", timeout)
+            raise HashingBusy(timeout)
+        except BrokenProcessPool:
+            logger.exception("Password hashing pool died; restarting it and hashing inline")
+            shutdown_executor()
+            return fn(*args)
+
+
+def _hash_params():
+    """(method, salt_length) from PASSWORD_HASH_METHOD / PASSWORD_SALT_LENGTH."""
+    return (
+        _config("PASSWORD_HASH_METHOD") or DEFAULT_METHOD,
+        int(_config("PASSWORD_SALT_LENGTH") or DEFAULT_SALT_LENGTH),
+    )
+
+
+@functools.lru_cache(maxsize=8)
+def _canonical_method(method: str) -> str:
+    """
+    Expand a method spec to the prefix werkzeug stores in the hash, e.g.
+    'scrypt' -> 'scrypt:32768:8:1'. Costs one hash per method per process.
+    """
+    return generate_password_hash("x", method=method, salt_length=1).split("$", 1)[0]
+
+
+def needs_rehash(pw_hash: str) -> bool:
+    """True if pw_hash was made with a different method/cost or a shorter salt than configured."""
+    try:
+        stored_method, salt, _ = pw_hash.split("$", 2)
+    except (AttributeError, ValueError):
+        return False
+    method, salt_length = _hash_params()
+    return stored_method != _canonical_method(method) or len(salt) < salt_length
+
+
+def hash_password(password: str) -> str:
+    """generate_password_hash() with the configured method, on the hashing pool."""
+    method, salt_length = _hash_params()
+    return _run(generate_password_hash, password, method, salt_length)
+
+
+def check_password(pw_hash: str, password: str) -> bool:
+    """check_password_hash() on the hashing pool."""
+    return _run(check_password_hash, pw_hash, password)
+
+
+def verify_and_update(pw_hash: str, password: str):
+    """
+    Verify password against pw_hash. When it matches but the hash uses
+    outdated parameters (and PASSWORD_REHASH_ON_VERIFY is on), also return a
+    fresh hash for the caller to store. Returns (ok, new_hash_or_None).
+    """
+    ok = check_password(pw_hash, password)
+    if ok and _config("PASSWORD_REHASH_ON_VERIFY", True) and needs_rehash(pw_hash):
+        return ok, hash_password(password)
+    return ok, None
+
+
+def hash_many(passwords: List[str]) -> List[str]:
+    """Hash a list of passwords, fanned out across the pool when one is configured."""
+    method, salt_length = _hash_params()
+    hash_one = functools.partial(generate_password_hash, method=method, salt_length=salt_length)
+    with request_timing.phase("hash"):
+        executor = get_executor()
+        if executor is None or len(passwords) < 2:
+            return [hash_one(p) for p in passwords]
+        chunksize = max(1, len(passwords) // (_configured_workers() * 4))
+        try:
+            return list(executor.map(hash_one, passwords, chunksize=chunksize))
+        except BrokenProcessPool:
+            logger.exception("Password hashing pool died; restarting it and hashing inline")
+            shutdown_executor()
+            return [hash_one(p) for p in passwords]
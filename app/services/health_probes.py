@@ -0,0 +1,113 @@
+#app/services/health_probes.py
+"""
+API health probes for the dashboard.
+
+All endpoints are checked concurrently under one shared deadline, and the
+result is cached for DASHBOARD_PROBE_TTL seconds. In the default
+"inprocess" mode each probe is dispatched straight into the WSGI app via
+the test client, so a probe never needs a network hop or a second gunicorn
+worker. "http" mode keeps the old behaviour of calling APP_BASE_URL.
+
+In-process probes are tagged with PROBE_ENVIRON_KEY so the request
+metrics, the request-rate history and the slow-request log can leave them
+out (is_probe_request()); otherwise the dashboard would count its own polls.
+The default endpoints are cheap: the API is probed for a single row.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, List, Optional
+
+from flask import has_request_context, request
+
+logger = logging.getLogger(__name__)
+
+EXTENSION_KEY = "health_probes"
+DEFAULT_ENDPOINTS = ["/", "/ui", "/api/users?limit=1"]
+PROBE_ENVIRON_KEY = "app.health_probe"
+
+
+def is_probe_request() -> bool:
+    """True while serving a request dispatched by an in-process probe."""
+    return has_request_context() and bool(request.environ.get(PROBE_ENVIRON_KEY))
+
+
+def _status(code: int) -> str:
+    return "Healthy" if code == 200 else f"Error {code}"
+
+
+class ProbeEngine:
+    def __init__(self, app, endpoints: List[str], mode: str = "inprocess",
+                 base_url: Optional[str] = None, deadline: float = 2.0, ttl: float = 15.0):
+        if mode not in ("inprocess", "http"):
+            raise ValueError(f"Unknown probe mode {mode!r}; use 'inprocess' or 'http'")
+        self.app = app
+        self.endpoints = list(endpoints)
+        self.mode = mode
+        self.base_url = base_url
+        self.deadline = deadline
+        self.ttl = ttl
+        self._executor = ThreadPoolExecutor(max_workers=max(1, len(self.endpoints)), thread_name_prefix="probe")
+        self._lock = threading.Lock()
+        self._cached: Optional[Dict[str, str]] = None
+        self._cached_at = 0.0
+
+    def _probe_inprocess(self, endpoint: str) -> str:
+        with self.app.test_client() as client:
+            return _status(client.get(endpoint, environ_base={PROBE_ENVIRON_KEY: True}).status_code)
+
+    def _probe_http(self, endpoint: str) -> str:
+        import requests
+        return _status(requests.get(self.base_url + endpoint, timeout=self.deadline).status_code)
+
+    def run(self) -> Dict[str, str]:
+        """Probe every endpoint concurrently; anything not done by the deadline is reported Down."""
+        probe = self._probe_inprocess if self.mode == "inprocess" else self._probe_http
+        futures = {ep: self._executor.submit(probe, ep) for ep in self.endpoints}
+        wait(futures.values(), timeout=self.deadline)
+
+        results = {}
+        for ep, fut in futures.items():
+            if not fut.done():
+                fut.cancel()
+                results[ep] = "Down (timeout)"
+                continue
+            try:
+                results[ep] = fut.result()
+            except Exception as exc:
+                logger.debug("Probe of %s failed: %s", ep, exc)
+                results[ep] = f"Down ({exc})"
+        return results
+
+    def results(self) -> Dict[str, str]:
+        """Cached probe results, refreshed at most once per TTL."""
+        now = time.monotonic()
+        if self._cached is not None and now - self._cached_at < self.ttl:
+            return self._cached
+        with self._lock:
+            # another thread may have refreshed while we waited for the lock
+            if self._cached is None or time.monotonic() - self._cached_at >= self.ttl:
+                self._cached = self.run()
+                self._cached_at = time.monotonic()
+            return self._cached
+
+
+def init_app(app):
+    env_name = str(app.config.get("ENV_NAME", ""))
+    port = 8000 if env_name.lower().startswith("prod") else 5000
+    base_url = app.config.get("APP_BASE_URL") or f"http://localhost:{port}"
+    engine = ProbeEngine(
+        app,
+        endpoints=app.config.get("DASHBOARD_PROBE_ENDPOINTS") or DEFAULT_ENDPOINTS,
+        mode=app.config.get("DASHBOARD_PROBE_MODE", "inprocess"),
+        base_url=base_url,
+        deadline=float(app.config.get("DASHBOARD_PROBE_DEADLINE", 2.0)),
+        ttl=float(app.config.get("DASHBOARD_PROBE_TTL", 15.0)),
+    )
+    app.extensions[EXTENSION_KEY] = engine
+    return engine
+
+
+def api_health(app) -> Dict[str, str]:
+    return app.extensions[EXTENSION_KEY].results()
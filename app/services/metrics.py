@@ -0,0 +1,429 @@
+#app/services/metrics.py
+"""
+Prometheus text-format metrics for GET /metrics.
+
+A small in-house registry (Counter / Histogram with labels) instead of a
+client library: every metric is created once at import time, a labelled
+child is created on first use and then reused, and recording takes a
+per-child lock just long enough to bump a few numbers; nothing is held
+across I/O.
+
+Instrumented:
+- http_requests_total{blueprint,endpoint,method,status}
+- http_request_duration_seconds{blueprint,endpoint,method} (histogram)
+- db_queries_total{operation} and db_query_duration_seconds{operation}
+- db_queries_per_request{blueprint,endpoint} (histogram)
+
+Each process records into its own registry. Without METRICS_MULTIPROC_DIR
+a scrape therefore only sees the gunicorn worker that answered it. With it,
+a SnapshotWriter thread in every worker writes that worker's numbers to
+<dir>/metrics_<pid>.json once per METRICS_FLUSH_INTERVAL, and /metrics
+merges the other workers' files with its own live numbers. When a worker
+exits, the master folds its file into metrics_archive.json (see
+gunicorn.conf.py), so counters do not drop when max_requests recycles a
+worker.
+"""
+import abc
+import bisect
+import json
+import math
+import os
+import re
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from flask import Response, g, request
+
+from app.services import health_probes, query_timing, request_timing
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+SNAPSHOT_FILE_RE = re.compile(r"metrics_(\d+)\.json")
+ARCHIVE_FILE = "metrics_archive.json"
+# exited pids remembered by the archive; a scrape racing the fold skips their files
+ARCHIVE_PID_HISTORY = 1024
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100, 250)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _CounterChild:
+    __slots__ = ("_lock", "value")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+    def snapshot(self) -> float:
+        return self.value
+
+
+class _HistogramChild:
+    __slots__ = ("_lock", "_upper_bounds", "counts", "sum")
+
+    def __init__(self, upper_bounds: Tuple[float, ...]):
+        self._lock = threading.Lock()
+        self._upper_bounds = upper_bounds
+        self.counts = [0] * len(upper_bounds)  # per bucket, not cumulative
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        i = bisect.bisect_left(self._upper_bounds, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+
+    def snapshot(self) -> Tuple[List[int], float]:
+        with self._lock:
+            return list(self.counts), self.sum
+
+
+# {label values: child snapshot}, and {metric name: that} for a whole registry
+Samples = Dict[Tuple[str, ...], object]
+Snapshot = Dict[str, Samples]
+
+
+class _Metric(abc.ABC):
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    @abc.abstractmethod
+    def _new_child(self):
+        """A fresh child for one combination of label values."""
+
+    @staticmethod
+    @abc.abstractmethod
+    def merge(a, b):
+        """Combine two snapshots of one child taken in different processes."""
+
+    def labels(self, *values) -> object:
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _items(self):
+        with self._lock:
+            return list(self._children.items())
+
+    def snapshot(self) -> Samples:
+        return {key: child.snapshot() for key, child in self._items()}
+
+    def merge_samples(self, samples: Samples, others: Iterable[Samples]) -> Samples:
+        merged = dict(samples)
+        for other in others:
+            for key, value in other.items():
+                merged[key] = self.merge(merged[key], value) if key in merged else value
+        return merged
+
+    def render(self, others: Iterable[Samples] = ()) -> List[str]:
+        """Exposition lines for this process's children plus the snapshots of other processes."""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._render_samples(self.merge_samples(self.snapshot(), others)))
+        return lines
+
+    @abc.abstractmethod
+    def _render_samples(self, samples: Samples) -> List[str]:
+        """Exposition lines for {label values: child snapshot}."""
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    @staticmethod
+    def merge(a, b):
+        return a + b
+
+    def _render_samples(self, samples):
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in samples.items()
+        ]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.upper_bounds = tuple(sorted(buckets)) + (math.inf,)
+
+    def _new_child(self):
+        return _HistogramChild(self.upper_bounds)
+
+    @staticmethod
+    def merge(a, b):
+        # (per-bucket counts, sum); every process has the same buckets
+        return [x + y for x, y in zip(a[0], b[0])], a[1] + b[1]
+
+    def _render_samples(self, samples):
+        lines = []
+        for key, (counts, total) in samples.items():
+            cumulative = 0
+            for bound, count in zip(self.upper_bounds, counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def snapshot(self) -> Snapshot:
+        return {metric.name: metric.snapshot() for metric in self._metrics}
+
+    def merge(self, a: Snapshot, b: Snapshot) -> Snapshot:
+        """a + b for snapshots of this registry; metrics it does not know are dropped."""
+        return {metric.name: metric.merge_samples(a.get(metric.name, {}), [b.get(metric.name, {})])
+                for metric in self._metrics}
+
+    def render(self, others: Iterable[Snapshot] = ()) -> str:
+        """This process's metrics, merged with snapshots from other processes."""
+        others = list(others)
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render([other.get(metric.name, {}) for other in others]))
+        return "\n".join(lines) + "\n"
+
+
+def _encode(snapshot: Snapshot) -> dict:
+    # label tuples are not JSON keys, so each metric is a list of [labels, value]
+    return {name: [[list(key), value] for key, value in samples.items()] for name, samples in snapshot.items()}
+
+
+def _parse(data) -> Snapshot:
+    return {name: {tuple(key): value for key, value in samples} for name, samples in data.items()}
+
+
+def _read_json(path: str) -> Optional[dict]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        # gone (folded into the archive) or not ours; files are replaced atomically
+        return None
+
+
+def _write_json(path: str, raw: str):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        f.write(raw)
+    os.replace(tmp, path)
+
+
+def _read_archive(directory: str) -> dict:
+    return _read_json(os.path.join(directory, ARCHIVE_FILE)) or {"pids": [], "metrics": {}}
+
+
+class SnapshotWriter:
+    """
+    Writes this process's registry snapshot to <directory>/metrics_<pid>.json
+    every interval seconds from a daemon thread, and reads the other
+    processes' snapshots back for a scrape. The thread does not survive a
+    fork, so each worker starts its own on its first request.
+    """
+
+    def __init__(self, registry: Registry, directory: str, interval: float = 1.0):
+        self.registry = registry
+        self.directory = directory
+        self.interval = interval
+        self.after_fork()
+
+    def after_fork(self):
+        """Reset the thread state inherited from the parent in a forked child."""
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._written = None
+
+    def running(self) -> bool:
+        return self._pid == os.getpid() and self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        with self._lock:
+            if self.running():
+                return
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="metrics-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    def path(self, pid: int) -> str:
+        return os.path.join(self.directory, f"metrics_{pid}.json")
+
+    def flush(self):
+        """Write this process's snapshot unless it is unchanged since the last write."""
+        with self._flush_lock:
+            raw = json.dumps(_encode(self.registry.snapshot()), sort_keys=True)
+            if raw != self._written:
+                _write_json(self.path(os.getpid()), raw)
+                self._written = raw
+
+    def collect(self) -> List[Snapshot]:
+        """Snapshots of every other process: live workers' files, then the archive of exited ones."""
+        own = os.getpid()
+        live = []
+        # files first: a worker is added to the archive before its file is removed
+        for name in os.listdir(self.directory):
+            match = SNAPSHOT_FILE_RE.fullmatch(name)
+            if match and int(match.group(1)) != own:
+                data = _read_json(os.path.join(self.directory, name))
+                if data is not None:
+                    live.append((int(match.group(1)), _parse(data)))
+        archive = _read_archive(self.directory)
+        folded = set(archive["pids"])
+        return [snapshot for pid, snapshot in live if pid not in folded] + [_parse(archive["metrics"])]
+
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.register(Counter(
+    "http_requests_total", "HTTP requests handled.", ("blueprint", "endpoint", "method", "status")))
+HTTP_LATENCY = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency in seconds.", ("blueprint", "endpoint", "method")))
+DB_QUERIES = REGISTRY.register(Counter(
+    "db_queries_total", "SQL statements executed.", ("operation",)))
+DB_LATENCY = REGISTRY.register(Histogram(
+    "db_query_duration_seconds", "SQL statement execution time in seconds.", ("operation",)))
+DB_QUERIES_PER_REQUEST = REGISTRY.register(Histogram(
+    "db_queries_per_request", "SQL statements issued per HTTP request.", ("blueprint", "endpoint"),
+    buckets=QUERY_COUNT_BUCKETS))
+
+
+def archive_process(directory: str, pid: int, registry: Registry = REGISTRY):
+    """
+    Fold an exited process's snapshot into the archive and remove its file.
+    Called by the gunicorn master for each exited worker, one at a time.
+    """
+    path = os.path.join(directory, f"metrics_{pid}.json")
+    data = _read_json(path)
+    if data is None:
+        return
+    archive = _read_archive(directory)
+    merged = registry.merge(_parse(archive["metrics"]), _parse(data))
+    pids = (archive["pids"] + [pid])[-ARCHIVE_PID_HISTORY:]
+    _write_json(os.path.join(directory, ARCHIVE_FILE), json.dumps({"pids": pids, "metrics": _encode(merged)}))
+    os.remove(path)
+
+
+def reset_directory(directory: str):
+    """Start from empty: drop the snapshots a previous run left behind."""
+    os.makedirs(directory, exist_ok=True)
+    for name in os.listdir(directory):
+        if SNAPSHOT_FILE_RE.fullmatch(name) or name == ARCHIVE_FILE or name.endswith(".tmp"):
+            os.remove(os.path.join(directory, name))
+
+
+# set by init_app when METRICS_MULTIPROC_DIR is configured
+_writer: Optional[SnapshotWriter] = None
+
+
+def snapshot_writer() -> Optional[SnapshotWriter]:
+    return _writer
+
+
+def _operation(statement: str) -> str:
+    word = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+    return word if word in ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH") else "OTHER"
+
+
+def _observe_query(conn, statement, seconds):
+    op = _operation(statement)
+    DB_QUERIES.labels(op).inc()
+    DB_LATENCY.labels(op).observe(seconds)
+
+
+def observe_request(blueprint: str, endpoint: str, method: str, status: int, seconds: float):
+    """Record one served request; also used by the async routes of app.asgi."""
+    writer = _writer
+    if writer is not None and not writer.running():
+        writer.start()
+    HTTP_REQUESTS.labels(blueprint, endpoint, method, status).inc()
+    HTTP_LATENCY.labels(blueprint, endpoint, method).observe(seconds)
+
+
+def _before_request():
+    g.metrics_start = time.perf_counter()
+
+
+def _after_request(response):
+    start = g.pop("metrics_start", None)
+    if start is None or health_probes.is_probe_request():
+        return response
+    # endpoint, not path: bounded label cardinality (unknown URLs are "unmatched")
+    endpoint = request.endpoint or "unmatched"
+    blueprint = request.blueprint or "app"
+    observe_request(blueprint, endpoint, request.method, response.status_code, time.perf_counter() - start)
+    # statement count from request_timing's "db" phase (its after_request hook has already run)
+    DB_QUERIES_PER_REQUEST.labels(blueprint, endpoint).observe(request_timing.usage("db")[1])
+    return response
+
+
+def metrics_view():
+    others = _writer.collect() if _writer is not None else ()
+    return Response(REGISTRY.render(others), content_type=CONTENT_TYPE)
+
+
+def init_app(app):
+    """Register request hooks, the SQL statement observer and the /metrics route."""
+    global _writer
+    if not app.config.get("METRICS_ENABLED", True):
+        return
+    directory = app.config.get("METRICS_MULTIPROC_DIR")
+    _writer = None
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        _writer = SnapshotWriter(REGISTRY, directory, float(app.config.get("METRICS_FLUSH_INTERVAL", 1.0)))
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    # statements are timed once by app.services.query_timing
+    query_timing.add_observer(_observe_query)
+    app.add_url_rule(app.config.get("METRICS_PATH", "/metrics"), "metrics", metrics_view, methods=["GET"])
@@ -0,0 +1,87 @@
+#app/services/query_budget.py
+"""
+Per-request SQL statement budget and an N+1 guard for tests.
+
+The statement count and total SQL time per request come from the "db"
+phase of app.services.request_timing, fed by the shared statement timer in
+app.services.query_timing. After each request:
+- QUERY_HEADERS_ENABLED (off in production) adds X-DB-Query-Count and
+  X-DB-Query-Time-Ms to the response;
+- a request issuing more than QUERY_BUDGET statements is logged as a
+  warning with its endpoint, so a route that slides into N+1 shows up in
+  the production logs.
+
+Tests pin query counts with assert_max_queries(n), also exposed as the
+`assert_max_queries` fixture in tests/conftest.py.
+"""
+import logging
+from contextlib import contextmanager
+from typing import List
+
+from flask import request
+
+from app.services import query_timing, request_timing
+
+logger = logging.getLogger(__name__)
+
+COUNT_HEADER = "X-DB-Query-Count"
+TIME_HEADER = "X-DB-Query-Time-Ms"
+
+
+class QueryCounter:
+    """Collects the statements executed on an engine while active."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements: List[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def _record(self, conn, statement, seconds):
+        if conn.engine is self.engine:
+            self.statements.append(statement)
+
+
+@contextmanager
+def assert_max_queries(n: int, engine=None):
+    """
+    Fail with the offending statements if the block runs more than n SQL
+    statements on engine (the app's engine by default).
+    """
+    if engine is None:
+        from app import db
+        engine = db.engine
+    counter = QueryCounter(engine)
+    query_timing.instrument(engine)
+    query_timing.add_observer(counter._record)
+    try:
+        yield counter
+    finally:
+        query_timing.remove_observer(counter._record)
+    if counter.count > n:
+        listing = "\n".join(f"  {i}. {s}" for i, s in enumerate(counter.statements, 1))
+        raise AssertionError(f"expected at most {n} queries, {counter.count} executed:\n{listing}")
+
+
+def _make_after_request(app):
+    def _after_request(response):
+        ms, count = request_timing.usage("db")
+        if app.config.get("QUERY_HEADERS_ENABLED", False):
+            response.headers[COUNT_HEADER] = str(count)
+            response.headers[TIME_HEADER] = f"{ms:.1f}"
+        budget = app.config.get("QUERY_BUDGET")
+        if budget is not None and count > int(budget):
+            logger.warning(
+                "Query budget exceeded: %s %s (%s) ran %d statements in %.1f ms (budget %s)",
+                request.method, request.path, request.endpoint or "unmatched", count, ms, budget,
+            )
+        return response
+
+    return _after_request
+
+
+def init_app(app):
+    """Register the after_request check; relies on request_timing's SQL listeners."""
+    app.after_request(_make_after_request(app))
@@ -0,0 +1,66 @@
+#app/services/query_timing.py
+"""
+The one SQL statement timer.
+
+A single pair of before/after_cursor_execute listeners per engine times
+every statement once and hands the result to each registered observer as
+observer(conn, statement, seconds):
+- app.services.request_timing adds it to the request's "db" phase, which
+  feeds Server-Timing, the slow-request log and app.services.query_budget;
+- app.services.metrics records db_queries_total / db_query_duration_seconds;
+- query_budget.assert_max_queries collects statements while it is active.
+"""
+import threading
+import time
+from typing import Callable, List
+
+from sqlalchemy import event
+
+Observer = Callable[[object, str, float], None]
+
+_observers: List[Observer] = []
+_observers_lock = threading.Lock()
+
+
+def add_observer(observer: Observer):
+    """Call observer(conn, statement, seconds) after every timed statement (added once)."""
+    global _observers
+    with _observers_lock:
+        if observer not in _observers:
+            # copy-on-write: the listener iterates without taking the lock
+            _observers = _observers + [observer]
+
+
+def remove_observer(observer: Observer):
+    global _observers
+    with _observers_lock:
+        _observers = [o for o in _observers if o != observer]
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # one cursor executes at a time per connection; a failed statement is simply overwritten
+    conn.info["query_timing_start"] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = conn.info.pop("query_timing_start", None)
+    if start is None:
+        return
+    elapsed = time.perf_counter() - start
+    for observer in _observers:
+        observer(conn, statement, elapsed)
+
+
+def instrument(engine):
+    """Attach the timer to engine unless it already has it."""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def init_app(app, db):
+    """Time statements on every engine of the app: primary plus any read replicas."""
+    with app.app_context():
+        engines = list(db.engines.values())
+    for engine in engines:
+        instrument(engine)
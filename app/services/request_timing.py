@@ -0,0 +1,135 @@
+#app/services/request_timing.py
+"""
+Per-request phase timing: where did this request's time go?
+
+Phases are accumulated on flask.g while the request runs:
+- db:   SQL statements (timed by app.services.query_timing)
+- tpl:  Jinja rendering (Flask's before_render_template / template_rendered)
+- hash: password hashing (app.services.hashing wraps its work in phase("hash"))
+- zip:  response compression of buffered bodies (app.services.compression)
+
+The breakdown goes out as a Server-Timing header (visible in browser
+devtools) when SERVER_TIMING_ENABLED is on, and requests slower than
+SLOW_REQUEST_MS are logged as one JSON line with the same breakdown.
+"""
+import json
+import logging
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+from flask import before_render_template, g, has_request_context, request, template_rendered
+
+from app.services import health_probes, query_timing
+
+logger = logging.getLogger(__name__)
+
+PHASES = ("db", "tpl", "hash", "zip")
+DESCRIPTIONS = {"db": "Database", "tpl": "Template render", "hash": "Password hashing",
+                "zip": "Response compression"}
+
+
+def _phases() -> Dict[str, List[float]]:
+    """{phase: [total_ms, count]} for the current request."""
+    phases = g.get("timing_phases")
+    if phases is None:
+        phases = g.timing_phases = {name: [0.0, 0] for name in PHASES}
+    return phases
+
+
+def record(name: str, ms: float):
+    """Add ms to a phase of the current request (no-op outside a request)."""
+    if not has_request_context():
+        return
+    entry = _phases()[name]
+    entry[0] += ms
+    entry[1] += 1
+
+
+def usage(name: str) -> Tuple[float, int]:
+    """(total_ms, count) of a phase so far in the current request."""
+    if not has_request_context() or "timing_phases" not in g:
+        return 0.0, 0
+    ms, count = g.timing_phases[name]
+    return ms, count
+
+
+@contextmanager
+def phase(name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, (time.perf_counter() - start) * 1000)
+
+
+def _observe_query(conn, statement, seconds):
+    record("db", seconds * 1000)
+
+
+def _before_render(sender, template, context, **extra):
+    if has_request_context():
+        g.setdefault("timing_render_starts", []).append(time.perf_counter())
+
+
+def _after_render(sender, template, context, **extra):
+    starts = g.get("timing_render_starts") if has_request_context() else None
+    if starts:
+        # nested renders (render_template inside a template) are counted once, by the outer one
+        start = starts.pop()
+        if not starts:
+            record("tpl", (time.perf_counter() - start) * 1000)
+
+
+def _before_request():
+    # reset: a request inside an already-pushed app context shares its g
+    g.timing_phases = {name: [0.0, 0] for name in PHASES}
+    g.timing_render_starts = []
+    g.timing_start = time.perf_counter()
+
+
+def server_timing_header(phases: Dict[str, List[float]], total_ms: float) -> str:
+    parts = [
+        f'{name};dur={ms:.1f};desc="{DESCRIPTIONS[name]} ({count})"'
+        for name, (ms, count) in phases.items() if count
+    ]
+    parts.append(f"total;dur={total_ms:.1f}")
+    return ", ".join(parts)
+
+
+def _make_after_request(app):
+    def _after_request(response):
+        start = g.pop("timing_start", None)
+        if start is None:
+            return response
+        total_ms = (time.perf_counter() - start) * 1000
+        phases = _phases()
+        if app.config.get("SERVER_TIMING_ENABLED", False):
+            response.headers["Server-Timing"] = server_timing_header(phases, total_ms)
+
+        threshold = app.config.get("SLOW_REQUEST_MS")
+        # dashboard probes are bounded by their own deadline; don't log them as slow traffic
+        if threshold is not None and total_ms >= float(threshold) and not health_probes.is_probe_request():
+            entry = {
+                "event": "slow_request",
+                "method": request.method,
+                "path": request.path,
+                "endpoint": request.endpoint,
+                "status": response.status_code,
+                "total_ms": round(total_ms, 1),
+                **{f"{name}_ms": round(ms, 1) for name, (ms, _) in phases.items()},
+                **{f"{name}_count": count for name, (_, count) in phases.items()},
+            }
+            logger.warning("slow request %s", json.dumps(entry, sort_keys=True), extra={"timing": entry})
+        return response
+
+    return _after_request
+
+
+def init_app(app):
+    """Register the timing hooks and the SQL statement observer."""
+    app.before_request(_before_request)
+    app.after_request(_make_after_request(app))
+    before_render_template.connect(_before_render, app)
+    template_rendered.connect(_after_render, app)
+    query_timing.add_observer(_observe_query)
@@ -0,0 +1,95 @@
+#app/services/row_counts.py
+"""
+Row-count providers for the dashboard.
+
+COUNT(*) is a full scan on Postgres, so the dashboard can pick a cheaper
+source with DASHBOARD_ROW_COUNT_MODE:
+- "exact":     SELECT COUNT(*) (today's behaviour)
+- "estimated": planner statistics (pg_class.reltuples); the counter elsewhere
+- "counter":   the trigger-maintained row_counters table
+
+When the cheaper source has nothing to offer (no estimate because the table
+was never analyzed, which is also true of a freshly bulk-loaded one; no
+counter row), they fall back to the counter and then to an exact count that
+is reused for DASHBOARD_ROW_COUNT_CACHE_TTL seconds, so a missing statistic
+never turns every dashboard refresh into a full scan.
+
+Every provider returns (count, source) where source names the mode that
+actually produced the number, so fallbacks are visible on the dashboard.
+"""
+import threading
+import time
+from typing import Callable, Dict, Tuple
+
+from flask import current_app, has_app_context
+from sqlalchemy import func, select, table, text
+from sqlalchemy.exc import SQLAlchemyError
+
+from app import db
+from app.models import RowCounter
+
+# (database url, table) -> (monotonic time, count) for the fallback exact counts
+_exact_cache: Dict[Tuple[str, str], Tuple[float, int]] = {}
+_exact_cache_lock = threading.Lock()
+
+
+def exact_count(table_name: str) -> Tuple[int, str]:
+    return db.session.execute(select(func.count()).select_from(table(table_name))).scalar(), "exact"
+
+
+def cached_exact_count(table_name: str) -> Tuple[int, str]:
+    """exact_count(), reused for DASHBOARD_ROW_COUNT_CACHE_TTL seconds."""
+    ttl = float(current_app.config.get("DASHBOARD_ROW_COUNT_CACHE_TTL", 60)) if has_app_context() else 0.0
+    key = (str(db.session.get_bind().url), table_name)
+    now = time.monotonic()
+    with _exact_cache_lock:
+        hit = _exact_cache.get(key)
+    if hit is not None and now - hit[0] < ttl:
+        return hit[1], "exact"
+    count, source = exact_count(table_name)
+    with _exact_cache_lock:
+        _exact_cache[key] = (now, count)
+    return count, source
+
+
+def estimated_count(table_name: str) -> Tuple[int, str]:
+    if db.session.get_bind().dialect.name != "postgresql":
+        # SQLite keeps no planner row estimate worth reading
+        return counter_count(table_name)
+    estimate = db.session.execute(
+        text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:t)"), {"t": table_name}
+    ).scalar()
+    if estimate is None or estimate <= 0:
+        # -1 / 0: never analyzed, which says nothing about its size (think bulk loads)
+        return counter_count(table_name)
+    return int(estimate), "estimated"
+
+
+def counter_count(table_name: str) -> Tuple[int, str]:
+    try:
+        value = db.session.execute(
+            select(RowCounter.row_count).where(RowCounter.table_name == table_name)
+        ).scalar()
+    except SQLAlchemyError:
+        # row_counters missing (migration not applied yet)
+        db.session.rollback()
+        value = None
+    if value is None:
+        # counter not installed/seeded for this table
+        return cached_exact_count(table_name)
+    return int(value), "counter"
+
+
+PROVIDERS: Dict[str, Callable[[str], Tuple[int, str]]] = {
+    "exact": exact_count,
+    "estimated": estimated_count,
+    "counter": counter_count,
+}
+
+
+def count_rows(table_name: str = "users", mode: str = "exact") -> Tuple[int, str]:
+    try:
+        provider = PROVIDERS[mode]
+    except KeyError:
+        raise ValueError(f"Unknown row count mode {mode!r}; use one of {', '.join(PROVIDERS)}")
+    return provider(table_name)
@@ -0,0 +1,129 @@
+#app/services/system_metrics.py
+"""
+Background sampler for the dashboard's system usage figures.
+
+psutil.cpu_percent(interval=1) sleeps the calling thread for a second, so
+instead a daemon thread samples CPU, memory and uptime every
+SYSTEM_SAMPLE_INTERVAL seconds into a bounded ring buffer and request
+handlers just read the newest entry.
+
+The thread is not started while the app is being created: under gunicorn
+preload that happens in the master, and a fork taken while the sampler
+holds a lock (its own, or the history store's via a listener) would hand
+the worker a lock nobody will release. Each process starts its sampler on
+its first request, or in gunicorn's post_fork hook after after_fork().
+"""
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+EXTENSION_KEY = "system_sampler"
+
+
+def take_sample() -> Dict[str, float]:
+    """One non-blocking reading; cpu is the usage since the previous call."""
+    return {
+        "ts": time.time(),
+        "cpu": psutil.cpu_percent(interval=None),
+        "memory": psutil.virtual_memory().percent,
+        "uptime_hours": round((time.time() - psutil.boot_time()) / 3600, 2),
+    }
+
+
+class SystemSampler:
+    def __init__(self, interval: float = 5.0, history: int = 720):
+        self.interval = interval
+        self._samples = deque(maxlen=history)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+        # called with every new sample (e.g. the dashboard history store)
+        self.listeners: List[Callable[[Dict[str, float]], None]] = []
+
+    def running(self) -> bool:
+        """True if this process's sampler thread is alive (lock-free: checked on every request)."""
+        thread = self._thread
+        return thread is not None and thread.is_alive() and self._pid == os.getpid()
+
+    def after_fork(self):
+        """Reset the thread state inherited from the parent in a forked child (before start())."""
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            # threads do not survive fork (gunicorn preload), so each process starts its own
+            self._pid = os.getpid()
+            self._stop.clear()
+            psutil.cpu_percent(interval=None)  # prime the cpu counter
+            self._thread = threading.Thread(target=self._run, name="system-sampler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                sample = take_sample()
+                self._samples.append(sample)
+                for listener in self.listeners:
+                    listener(sample)
+            except Exception:
+                logger.exception("System metrics sampling failed")
+            self._stop.wait(self.interval)
+
+    def latest(self) -> Optional[Dict[str, float]]:
+        """Newest sample, or None before the first one lands."""
+        if self._pid is not None and self._pid != os.getpid():
+            self.start()
+        try:
+            return self._samples[-1]
+        except IndexError:
+            return None
+
+    def history(self) -> List[Dict[str, float]]:
+        return list(self._samples)
+
+
+def init_app(app):
+    """
+    Create the sampler for this app; unless SYSTEM_SAMPLER_ENABLED is off it
+    starts on the first request of each process (see module docstring).
+    """
+    sampler = SystemSampler(
+        interval=float(app.config.get("SYSTEM_SAMPLE_INTERVAL", 5)),
+        history=int(app.config.get("SYSTEM_SAMPLE_HISTORY", 720)),
+    )
+    app.extensions[EXTENSION_KEY] = sampler
+
+    @app.before_request
+    def _start_sampler():
+        if not sampler.running() and app.config.get("SYSTEM_SAMPLER_ENABLED", True):
+            sampler.start()
+
+    return sampler
+
+
+def current_usage(app) -> Dict[str, float]:
+    """Latest sample from the app's sampler, or a one-off non-blocking reading if none is available."""
+    sampler = app.extensions.get(EXTENSION_KEY)
+    sample = None
+    if sampler is not None and app.config.get("SYSTEM_SAMPLER_ENABLED", True):
+        sample = sampler.latest()
+    return sample or take_sample()
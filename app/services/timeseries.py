@@ -0,0 +1,167 @@
+#app/services/timeseries.py
+"""
+In-process metrics history for the dashboard (no external TSDB).
+
+Every metric is kept at three resolutions, each in a fixed-size ring of
+buckets: 1 s for the last 15 minutes, 1 min for the last day and 10 min
+for the last week. record() writes the value straight into the current
+bucket of every tier (a few array stores per tier), so recording costs
+the same no matter how much history exists, and memory is fixed when the
+store is created.
+
+Gauges (cpu, memory, db_latency_ms) keep sum and count per bucket and are
+reported as the bucket average. Counters (requests) keep the sum and
+are reported as a per-second rate.
+"""
+import threading
+import time
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+EXTENSION_KEY = "timeseries"
+
+GAUGES = ("cpu", "memory", "db_latency_ms")
+COUNTERS = ("requests",)
+
+# (resolution seconds, number of buckets)
+TIERS: Tuple[Tuple[int, int], ...] = ((1, 900), (60, 1440), (600, 1008))
+
+# range name -> (span seconds, tier resolution used to answer it)
+RANGES: Dict[str, Tuple[int, int]] = {
+    "15m": (900, 1),
+    "1h": (3600, 60),
+    "24h": (86400, 600),
+    "7d": (604800, 600),
+}
+
+
+class _Ring:
+    """Fixed-size ring of aggregation buckets for one metric at one resolution."""
+
+    __slots__ = ("resolution", "size", "epoch", "count", "total")
+
+    def __init__(self, resolution: int, size: int):
+        self.resolution = resolution
+        self.size = size
+        # epoch is the bucket number (ts // resolution) the slot currently holds; -1 = empty
+        self.epoch = array("q", [-1]) * size
+        self.count = array("q", [0]) * size
+        self.total = array("d", [0.0]) * size
+
+    def add(self, ts: float, value: float):
+        bucket = int(ts // self.resolution)
+        slot = bucket % self.size
+        if self.epoch[slot] != bucket:
+            # slot still holds an older bucket: reuse it
+            self.epoch[slot] = bucket
+            self.count[slot] = 1
+            self.total[slot] = value
+            return
+        self.count[slot] += 1
+        self.total[slot] += value
+
+    def buckets(self, first: int, last: int) -> Iterable[Tuple[int, float]]:
+        """(count, total) for bucket numbers first..last, count 0 where empty."""
+        for bucket in range(first, last + 1):
+            slot = bucket % self.size
+            if self.epoch[slot] == bucket:
+                yield self.count[slot], self.total[slot]
+            else:
+                yield 0, 0.0
+
+
+class MetricsStore:
+    def __init__(self, gauges: Iterable[str] = GAUGES, counters: Iterable[str] = COUNTERS,
+                 tiers: Iterable[Tuple[int, int]] = TIERS):
+        self.gauges = tuple(gauges)
+        self.counters = tuple(counters)
+        self.tiers = tuple(tiers)
+        self._rings: Dict[str, Tuple[_Ring, ...]] = {
+            name: tuple(_Ring(res, size) for res, size in self.tiers)
+            for name in self.gauges + self.counters
+        }
+        self._lock = threading.Lock()
+
+    def after_fork(self):
+        """New lock in a forked child: the parent's may have been held at fork time."""
+        self._lock = threading.Lock()
+
+    def record(self, name: str, value: float, ts: Optional[float] = None):
+        """Add one observation (gauge reading or counter increment)."""
+        ts = time.time() if ts is None else ts
+        rings = self._rings[name]
+        with self._lock:
+            for ring in rings:
+                ring.add(ts, value)
+
+    def incr(self, name: str, amount: float = 1, ts: Optional[float] = None):
+        self.record(name, amount, ts)
+
+    def query(self, range_name: str, now: Optional[float] = None) -> Dict[str, object]:
+        """
+        Column-oriented series for the range: {"range", "resolution", "t", "series"}.
+        Empty buckets are None so charts show gaps instead of zeros.
+        """
+        try:
+            span, resolution = RANGES[range_name]
+        except KeyError:
+            raise ValueError(f"Unknown range {range_name!r}; use one of {', '.join(RANGES)}")
+        tier = next(i for i, (res, _) in enumerate(self.tiers) if res == resolution)
+        now = time.time() if now is None else now
+        last = int(now // resolution)
+        first = last - min(span // resolution, self.tiers[tier][1]) + 1
+
+        series: Dict[str, List[Optional[float]]] = {}
+        with self._lock:
+            for name, rings in self._rings.items():
+                points = []
+                for count, total in rings[tier].buckets(first, last):
+                    if name in self.counters:
+                        points.append(round(total / resolution, 3))
+                    else:
+                        points.append(round(total / count, 2) if count else None)
+                series[name] = points
+        return {
+            "range": range_name,
+            "resolution": resolution,
+            "t": [bucket * resolution for bucket in range(first, last + 1)],
+            "series": series,
+        }
+
+
+def get_store(app) -> Optional[MetricsStore]:
+    return app.extensions.get(EXTENSION_KEY)
+
+
+def record(app, name: str, value: float):
+    """record() on the app's store; a no-op when history is disabled."""
+    store = app.extensions.get(EXTENSION_KEY)
+    if store is not None:
+        store.record(name, value)
+
+
+def init_app(app):
+    """Create the store, feed it from the system sampler and count requests."""
+    if not app.config.get("METRICS_HISTORY_ENABLED", True):
+        return None
+    store = MetricsStore()
+    app.extensions[EXTENSION_KEY] = store
+
+    from app.services import health_probes, system_metrics
+
+    sampler = app.extensions.get(system_metrics.EXTENSION_KEY)
+    if sampler is not None:
+        def _record_sample(sample):
+            store.record("cpu", sample["cpu"], sample["ts"])
+            store.record("memory", sample["memory"], sample["ts"])
+
+        sampler.listeners.append(_record_sample)
+
+    @app.teardown_request
+    def _count_request(exc=None):
+        # teardown also runs for requests that ended in an unhandled error;
+        # the dashboard's own probes are not traffic
+        if not health_probes.is_probe_request():
+            store.incr("requests")
+
+    return store
@@ -1,32 +1,537 @@
 #app/services/users_service.py
-from app.models import User
+from app.models import User, PASSWORD_POLICY_MESSAGE
 from app import db
-from werkzeug.security import generate_password_hash, check_password_hash
-from typing import Union, Dict, Any
+from app.services import hashing
+from typing import Union, Dict, Any, Iterable, Optional, List, Tuple
+from datetime import datetime
+from sqlalchemy import and_, or_, func, select, text
+from sqlalchemy.exc import IntegrityError
+import base64
+import binascii
+import hashlib
+import json
+import weakref
 
 # Custom Exceptions for error handling
-class UserAlreadyExists(Exception):...
+class UserAlreadyExists(Exception):
+    def __init__(self, message: str = "Username or email already exists.", errors: Optional[Dict[str, str]] = None):
+        super().__init__(message)
+        # field -> message, e.g. {"email": "Email already exists."}
+        self.errors = errors or {}
 class UserNotFound(Exception):...
 class RootDeletionError(Exception):...
 
 
+# Sort keys accepted by list_users_page(); each one is backed by an index
+# (ix_users_username, the primary key, ix_users_created_at_id).
+SORT_KEYS = ("username", "created_at", "id")
+SORT_ORDERS = ("asc", "desc")
+# Query args of GET /api/users that select a keyset page
+PAGINATION_ARGS = ("limit", "after", "sort", "order")
+# Sortable columns of the /ui table (ix_users_username, ix_users_email, ix_users_created_at_id)
+UI_SORT_KEYS = ("username", "email", "created_at")
+
+
 def list_users():
     return User.query.order_by(User.username.asc()).all()
 
+
+def iter_users(batch_size: int = 1000):
+    """
+    Yield every user ordered by id without loading the table into memory.
+    yield_per streams rows through a server-side cursor on Postgres
+    (psycopg2 named cursor) and fetches in batches on SQLite.
+    """
+    stmt = select(User).order_by(User.id.asc()).execution_options(yield_per=batch_size)
+    for user in db.session.execute(stmt).scalars():
+        yield user
+
+
+def users_collection_state() -> Tuple[Optional[datetime], int]:
+    """
+    Return (max(updated_at), row count) for the users table.
+    Used as a cheap collection validator: max() is answered from
+    ix_users_updated_at and neither value needs ORM objects hydrated.
+    """
+    last_modified, count = db.session.execute(collection_state_statement()).one()
+    return last_modified, count
+
+
+def collection_state_statement():
+    return select(func.max(User.updated_at), func.count(User.id))
+
+
+def user_last_modified(user_id: int) -> Optional[datetime]:
+    """Return a single user's updated_at (None if the user does not exist)."""
+    return db.session.execute(user_last_modified_statement(user_id)).scalar()
+
+
+def user_last_modified_statement(user_id: int):
+    return select(User.updated_at).where(User.id == user_id)
+
+
+def encode_cursor(sort: str, order: str, user) -> str:
+    """Build the opaque ``after`` cursor pointing just past ``user``."""
+    value = getattr(user, sort)
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps({"s": sort, "o": order, "v": value, "id": user.id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str, order: str) -> Tuple[Any, int]:
+    """
+    Decode a cursor produced by encode_cursor().
+    Returns (last_sort_value, last_id). Raises ValueError if the cursor is
+    malformed or was issued for a different sort/order.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        last_value, last_id = data["v"], int(data["id"])
+        if data.get("s") == "created_at":
+            last_value = datetime.fromisoformat(last_value)
+        elif data.get("s") in ("username", "email") and not isinstance(last_value, str):
+            raise TypeError(f"{data['s']} cursor value must be a string")
+    except (ValueError, KeyError, TypeError, binascii.Error, UnicodeDecodeError):
+        raise ValueError("Malformed cursor.")
+    if data.get("s") != sort or data.get("o") != order:
+        raise ValueError("Cursor does not match the requested sort order.")
+    return last_value, last_id
+
+
+def _keyset_filter(sort: str, order: str, last_value, last_id: int, dialect: str):
+    """WHERE clause selecting rows strictly after (last_value, last_id)."""
+    column = getattr(User, sort)
+    ascending = order == "asc"
+    if sort == "id":
+        return User.id > last_id if ascending else User.id < last_id
+
+    if sort == "created_at" and dialect == "sqlite":
+        # SQLite keeps server_default timestamps as text ('YYYY-MM-DD HH:MM:SS')
+        # while bound datetimes carry microseconds, so compare as julian days.
+        column = func.julianday(column)
+        last_value = func.julianday(last_value.isoformat(sep=" "))
+
+    if ascending:
+        return or_(column > last_value, and_(column == last_value, User.id > last_id))
+    return or_(column < last_value, and_(column == last_value, User.id < last_id))
+
+
+def list_users_page(limit: int, after: Optional[str] = None, sort: str = "username",
+                    order: str = "asc") -> Tuple[List[User], Optional[str]]:
+    """
+    Keyset-paginated user listing.
+    Returns (users, next_cursor); next_cursor is None on the last page.
+    Raises ValueError for unknown sort keys/orders or an invalid cursor.
+    """
+    stmt = page_statement(limit, after, sort, order, dialect=db.session.get_bind().dialect.name)
+    return page_result(db.session.scalars(stmt).all(), limit, sort, order)
+
+
+def page_statement(limit: int, after: Optional[str], sort: str, order: str, dialect: str):
+    """
+    SELECT for one keyset page; shared by list_users_page() and the async
+    API. It fetches limit + 1 rows so page_result() can tell whether another
+    page exists without a COUNT(*). Raises ValueError like list_users_page().
+    """
+    if sort not in SORT_KEYS:
+        raise ValueError(f"Unsupported sort key {sort!r}; use one of {', '.join(SORT_KEYS)}.")
+    if order not in SORT_ORDERS:
+        raise ValueError(f"Unsupported order {order!r}; use asc or desc.")
+    if limit < 1:
+        raise ValueError("limit must be a positive integer.")
+
+    column = getattr(User, sort)
+    if order == "asc":
+        ordering = [column.asc(), User.id.asc()] if sort != "id" else [User.id.asc()]
+    else:
+        ordering = [column.desc(), User.id.desc()] if sort != "id" else [User.id.desc()]
+
+    stmt = select(User)
+    if after:
+        last_value, last_id = decode_cursor(after, sort, order)
+        stmt = stmt.where(_keyset_filter(sort, order, last_value, last_id, dialect))
+    return stmt.order_by(*ordering).limit(limit + 1)
+
+
+def page_result(rows: List[User], limit: int, sort: str, order: str) -> Tuple[List[User], Optional[str]]:
+    """(users, next_cursor) from the rows page_statement() returned."""
+    users = rows[:limit]
+    next_cursor = encode_cursor(sort, order, users[-1]) if len(rows) > limit else None
+    return users, next_cursor
+
+
+def collection_etag(last_modified: Optional[datetime], count: int,
+                    args: Iterable[Tuple[str, str]], stream_format: Optional[str] = None) -> str:
+    """
+    ETag for GET /api/users, shared by the Flask view and the async API so
+    both modes agree on validators. The representation also depends on the
+    paging/stream query args, so every (name, value) pair is folded in.
+    """
+    raw = f"{last_modified.isoformat() if last_modified else ''}|{count}|{sorted(args)}|{stream_format}"
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def user_etag(user_id: int, last_modified: datetime) -> str:
+    """ETag for GET /api/users/<id>, shared like collection_etag()."""
+    return hashlib.sha1(f"{user_id}|{last_modified.isoformat()}".encode()).hexdigest()
+
+
+def page_params(args: Iterable[Tuple[str, str]], default_limit: int,
+                max_limit: int) -> Tuple[int, Optional[str], str, str]:
+    """
+    (limit, after, sort, order) from GET /api/users query args. A missing or
+    non-integer limit falls back to default_limit and the result is clamped
+    to 1..max_limit; sort and order are checked by page_statement().
+    """
+    values: Dict[str, str] = {}
+    for name, value in args:
+        values.setdefault(name, value)  # first one wins, like MultiDict.get()
+    try:
+        limit = int(values["limit"])
+    except (KeyError, ValueError):
+        limit = default_limit
+    limit = max(1, min(limit, max_limit))
+    return limit, values.get("after") or None, values.get("sort", "username"), values.get("order", "asc").lower()
+
+
+def page_envelope(users: List[User], limit: int, sort: str, order: str,
+                  next_cursor: Optional[str]) -> Dict[str, Any]:
+    return {
+        "items": [u.to_dict() for u in users],
+        "limit": limit,
+        "sort": sort,
+        "order": order,
+        "next_cursor": next_cursor,
+    }
+
+
+def pagination_error(exc: ValueError) -> Dict[str, Any]:
+    """400 body for a ValueError from page_statement()."""
+    return {"message": "Invalid pagination parameters", "errors": {"pagination": str(exc)}}
+
+
+# SQLite's built-in lower() folds A-Z only
+ASCII_LOWER = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+
+
+def _prefix_filter(column, prefix: str):
+    """
+    Case-insensitive "column starts with prefix", written so the lower()
+    expression indexes (ix_users_username_lower / ix_users_email_lower) apply.
+    On SQLite, lower() folds ASCII only, so the prefix is folded the same way
+    and matching is case-insensitive for A-Z and exact for other letters.
+    """
+    lowered = func.lower(column)
+    if db.session.get_bind().dialect.name == "postgresql":
+        # LIKE 'abc%' is index-assisted through the text_pattern_ops opclass
+        prefix = prefix.lower()
+        escaped = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        return lowered.like(escaped + "%", escape="\\")
+    # SQLite only optimises LIKE on plain columns; a half-open range on the
+    # expression index is equivalent under the default BINARY collation
+    prefix = prefix.translate(ASCII_LOWER)
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return and_(lowered >= prefix, lowered < upper)
+
+
+def search_users_page(prefix: Optional[str] = None, sort: str = "username", order: str = "asc",
+                      per_page: int = 25, after: Optional[str] = None, before: Optional[str] = None
+                      ) -> Tuple[List[User], Optional[str], Optional[str]]:
+    """
+    One page of users whose username or email starts with ``prefix``
+    (case-insensitive), for the /ui table. Keyset-paged like
+    list_users_page(): ``after`` is a next_cursor, ``before`` a prev_cursor.
+    Returns (users, next_cursor, prev_cursor); a cursor is None when there
+    is no page that way. The extra row fetched replaces a COUNT(*).
+    Raises ValueError for unknown sort keys/orders, a non-positive per_page
+    or an invalid cursor.
+    """
+    if sort not in UI_SORT_KEYS:
+        raise ValueError(f"Unsupported sort key {sort!r}; use one of {', '.join(UI_SORT_KEYS)}.")
+    if order not in SORT_ORDERS:
+        raise ValueError(f"Unsupported order {order!r}; use asc or desc.")
+    if per_page < 1:
+        raise ValueError("per_page must be a positive integer.")
+
+    # a "before" page is read backwards from the cursor, then flipped
+    backwards = bool(before) and not after
+    walk = ("desc" if order == "asc" else "asc") if backwards else order
+    column = getattr(User, sort)
+    ordering = [column.asc(), User.id.asc()] if walk == "asc" else [column.desc(), User.id.desc()]
+
+    stmt = select(User)
+    if prefix:
+        stmt = stmt.where(or_(_prefix_filter(User.username, prefix), _prefix_filter(User.email, prefix)))
+    cursor = before if backwards else after
+    if cursor:
+        last_value, last_id = decode_cursor(cursor, sort, order)
+        dialect = db.session.get_bind().dialect.name
+        stmt = stmt.where(_keyset_filter(sort, walk, last_value, last_id, dialect))
+
+    rows = db.session.scalars(stmt.order_by(*ordering).limit(per_page + 1)).all()
+    users, more = rows[:per_page], len(rows) > per_page
+    if not users:
+        return [], None, None
+    if backwards:
+        users.reverse()
+        has_next, has_prev = True, more
+    else:
+        has_next, has_prev = more, bool(after)
+    next_cursor = encode_cursor(sort, order, users[-1]) if has_next else None
+    prev_cursor = encode_cursor(sort, order, users[0]) if has_prev else None
+    return users, next_cursor, prev_cursor
+
+
+# shortest term the trigram indexes (pg_trgm / FTS5 trigram) can answer
+SEARCH_MIN_SUBSTRING = 3
+
+
+# engine -> whether its users_search FTS5 table exists; looked up once per engine
+_fts_index = weakref.WeakKeyDictionary()
+
+
+def _has_fts_index(engine) -> bool:
+    """True if the SQLite FTS5 search table was installed (see app/ddl.py)."""
+    found = _fts_index.get(engine)
+    if found is None:
+        with engine.connect() as conn:
+            found = conn.execute(text(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'users_search'"
+            )).first() is not None
+        _fts_index[engine] = found
+    return found
+
+
+def _substring_filter(term: str):
+    """username or email contains term (case-insensitive), via the search index."""
+    from sqlalchemy import Integer, column
+
+    bind = db.session.get_bind()
+    if bind.dialect.name == "sqlite" and _has_fts_index(bind):
+        fts = text("SELECT rowid FROM users_search WHERE users_search MATCH :m").columns(column("rowid", Integer))
+        match = '"' + term.replace('"', '""') + '"'
+        return User.id.in_(fts.bindparams(m=match))
+    # Postgres (pg_trgm indexes the LIKE if installed) or SQLite without FTS5: plain LIKE
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    pattern = "%" + escaped + "%"
+    return or_(func.lower(User.username).like(pattern, escape="\\"),
+               func.lower(User.email).like(pattern, escape="\\"))
+
+
+def _match_rank(user, term: str) -> Tuple[int, int, int, str]:
+    """Sort key: exact < username prefix < email prefix < substring, then match position, length."""
+    username, email = user.username.lower(), user.email.lower()
+    if term in (username, email):
+        kind = 0
+    elif username.startswith(term):
+        kind = 1
+    elif email.startswith(term):
+        kind = 2
+    else:
+        kind = 3
+    positions = [p for p in (username.find(term), email.find(term)) if p >= 0]
+    return kind, min(positions, default=0), len(username), username
+
+
+MATCH_KINDS = ("exact", "prefix", "prefix", "substring")
+
+
+def search_users(term: str, limit: int = 20, candidates: int = 200) -> List[Tuple[User, str]]:
+    """
+    Ranked username/email search: exact matches, then prefixes, then substrings.
+    Returns [(user, match_kind)]. Every query is an index lookup capped at
+    ``candidates`` rows, so latency does not grow with the table; ranking
+    happens on that bounded candidate set.
+    Raises ValueError for an empty term or non-positive limit.
+    """
+    term = (term or "").strip().lower()
+    if not term:
+        raise ValueError("q must not be empty.")
+    if limit < 1:
+        raise ValueError("limit must be a positive integer.")
+    candidates = max(candidates, limit)
+
+    found: Dict[int, User] = {}
+    # exact hits first so they always survive the candidate cap
+    exact = or_(func.lower(User.username) == term, func.lower(User.email) == term)
+    prefix = or_(_prefix_filter(User.username, term), _prefix_filter(User.email, term))
+    filters = [exact, prefix]
+    if len(term) >= SEARCH_MIN_SUBSTRING:
+        filters.append(_substring_filter(term))
+
+    for condition in filters:
+        if len(found) >= candidates:
+            break
+        query = User.query.filter(condition)
+        if found:
+            query = query.filter(User.id.notin_(list(found)))
+        for user in query.limit(candidates - len(found)).all():
+            found[user.id] = user
+
+    ranked = sorted(((_match_rank(user, term), user) for user in found.values()), key=lambda r: r[0])
+    return [(user, MATCH_KINDS[rank[0]]) for rank, user in ranked[:limit]]
+
 def create_user(username:str, email:str, password:str):
     raw_password = password
     if not username or not email or not raw_password:
         raise ValueError("username, email, password are required")
-    if User.query.filter((User.username == username) | (User.email == email)).first():
-        raise UserAlreadyExists("Username or email already exists.")
-    
-    new_user = User(username=username, email=email)
-    new_user.set_password(raw_password)
-    db.session.add(new_user)
+    if not User.validate_password(raw_password):
+        raise ValueError(PASSWORD_POLICY_MESSAGE)
+
+    new_user = insert_user(username, email, hashing.hash_password(raw_password))
     db.session.commit()
     return new_user
 
 
+CONFLICT_MESSAGES = {
+    "username": "Username already exists.",
+    "email": "Email already exists.",
+}
+
+
+def _is_unique_violation(orig) -> bool:
+    """SQLSTATE 23505 (Postgres) / 'UNIQUE constraint failed' (SQLite); not NOT NULL or CHECK failures."""
+    code = getattr(orig, "pgcode", None) or getattr(orig, "sqlstate", None)
+    if code is not None:
+        return code == "23505"
+    return str(orig).startswith("UNIQUE constraint failed")
+
+
+def _conflict_field(exc: IntegrityError) -> Optional[str]:
+    """Which unique column an IntegrityError is about, read from the driver error (no query)."""
+    if not _is_unique_violation(exc.orig):
+        return None
+    diag = getattr(exc.orig, "diag", None)  # psycopg2: constraint/index name, e.g. ix_users_email
+    detail = (getattr(diag, "constraint_name", None) or str(exc.orig)).lower()
+    for field in ("email", "username"):
+        if field in detail:
+            return field
+    return None
+
+
+def insert_user(username: str, email: str, password_hash: str, **columns) -> User:
+    """
+    Create a user in one round trip and return it (not committed).
+
+    INSERT ... ON CONFLICT (username) DO NOTHING RETURNING users.*: an empty
+    result means the username is taken; an email collision surfaces as a
+    unique violation naming the index. Either way UserAlreadyExists carries
+    the field, without a check-then-insert race or an extra SELECT.
+    """
+    row = {"username": username, "email": email.lower(), "password_hash": password_hash, **columns}
+    stmt = (
+        _insert_ignoring_conflicts([row], index_elements=[User.username])
+        .returning(User)
+    )
+    try:
+        # savepoint: a collision undoes this INSERT only, not the caller's unit of work
+        with db.session.begin_nested():
+            user = db.session.scalars(stmt).first()
+    except IntegrityError as exc:
+        field = _conflict_field(exc)
+        if field is None:
+            raise
+        raise UserAlreadyExists(CONFLICT_MESSAGES[field], {field: CONFLICT_MESSAGES[field]}) from exc
+    if user is None:
+        raise UserAlreadyExists(CONFLICT_MESSAGES["username"], {"username": CONFLICT_MESSAGES["username"]})
+    return user
+
+
+def _insert_ignoring_conflicts(rows: List[Dict[str, Any]], index_elements=None):
+    """INSERT ... ON CONFLICT [(index_elements)] DO NOTHING for the current dialect."""
+    dialect = db.session.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"bulk insert is not supported on {dialect}")
+    return insert(User).values(rows).on_conflict_do_nothing(index_elements=index_elements)
+
+
+def _conflict_errors(records: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+    """Name the colliding field(s) for records the INSERT skipped (one query per batch)."""
+    usernames = [r["username"] for r in records]
+    emails = [r["email"] for r in records]
+    taken = db.session.execute(
+        select(User.username, User.email).where(or_(User.username.in_(usernames), User.email.in_(emails)))
+    ).all()
+    taken_usernames = {row.username for row in taken}
+    taken_emails = {row.email for row in taken}
+    errors = []
+    for r in records:
+        err = {}
+        if r["username"] in taken_usernames:
+            err["username"] = "Username already exists."
+        if r["email"] in taken_emails:
+            err["email"] = "Email already exists."
+        errors.append(err or {"user": "User with that username or email already exists."})
+    return errors
+
+
+def bulk_create_users(records: List[Dict[str, Any]], batch_size: int = 500) -> List[Dict[str, Any]]:
+    """
+    Create many users at once. `records` must already be validated and hold
+    username/email/password. Passwords are hashed across the hashing pool,
+    then each batch is written with a single INSERT ... ON CONFLICT DO
+    NOTHING RETURNING, so duplicates are reported instead of aborting.
+    Returns one result dict per record, in input order:
+    {"status": "created", "id": ...} or {"status": "duplicate", "errors": {...}}.
+    """
+    results: List[Optional[Dict[str, Any]]] = [None] * len(records)
+
+    # duplicates inside the payload itself never reach the database
+    seen_usernames, seen_emails, pending = set(), set(), []
+    for i, r in enumerate(records):
+        username, email = r["username"], r["email"].lower()
+        err = {}
+        if username in seen_usernames:
+            err["username"] = "Duplicate username in request."
+        if email in seen_emails:
+            err["email"] = "Duplicate email in request."
+        if err:
+            results[i] = {"status": "duplicate", "errors": err}
+            continue
+        seen_usernames.add(username)
+        seen_emails.add(email)
+        pending.append((i, {"username": username, "email": email, "password": r["password"]}))
+
+    hashes = hashing.hash_many([rec["password"] for _, rec in pending])
+
+    for start in range(0, len(pending), batch_size):
+        batch = pending[start:start + batch_size]
+        rows = [
+            {
+                "username": rec["username"],
+                "email": rec["email"],
+                "password_hash": pw_hash,
+                "is_root": False,
+                "force_password_change": False,
+            }
+            for (_, rec), pw_hash in zip(batch, hashes[start:start + batch_size])
+        ]
+        try:
+            stmt = _insert_ignoring_conflicts(rows).returning(User.id, User.username)
+            inserted = {row.username: row.id for row in db.session.execute(stmt)}
+            db.session.commit()
+        except Exception:
+            logger.exception("Bulk insert failed for batch starting at record %s", batch[0][0])
+            db.session.rollback()
+            raise
+
+        skipped = [(i, rec) for i, rec in batch if rec["username"] not in inserted]
+        for i, rec in batch:
+            if rec["username"] in inserted:
+                results[i] = {"status": "created", "id": inserted[rec["username"]]}
+        if skipped:
+            for (i, _), err in zip(skipped, _conflict_errors([rec for _, rec in skipped])):
+                results[i] = {"status": "duplicate", "errors": err}
+
+    return results
+
+
 def reset_password(username:str, new_password:str):
     user = User.query.filter_by(username=username).first()
     if not user:
@@ -66,14 +571,33 @@ def hash_password(password: str) -> str:
     """Return a salted hash for the given password."""
     if password is None:
         raise ValueError("password required")
-    return generate_password_hash(password)
+    return hashing.hash_password(password)
 
 
 def verify_password(hashed: str, password: str) -> bool:
     """Verify that the password matches the given hash."""
     if not hashed or password is None:
         return False
-    return check_password_hash(hashed, password)
+    return hashing.check_password(hashed, password)
+
+
+def authenticate(username: str, password: str) -> Optional[User]:
+    """
+    Return the user if password is correct, else None. A hash made with
+    outdated parameters is upgraded by check_password and committed here.
+    The app has no login or password-confirmation route yet, so nothing in
+    app/ calls this; the one that checks credentials should use it rather
+    than User.check_password, so upgraded hashes are kept.
+    """
+    user = User.query.filter_by(username=username).first()
+    if not user or password is None:
+        return None
+    old_hash = user.password_hash
+    if not user.check_password(password):
+        return None
+    if user.password_hash != old_hash:
+        db.session.commit()
+    return user
 
 import logging
 
@@ -103,7 +627,7 @@ def update_user(user_id, updates: dict):
             if hasattr(user, "set_password") and callable(user.set_password):
                 user.set_password(value)
             else:
-                user.password = generate_password_hash(value)
+                user.password = hashing.hash_password(value)
             changed = True
         else:
             # optional validation: skip None/empty updates
@@ -0,0 +1,10 @@
+#asgi.py
+from app import create_app
+from app.asgi import create_asgi_app
+import os
+
+if not os.environ.get("APP_CONFIG"):
+    os.environ["APP_CONFIG"] = "production"
+
+# ASGI entry point: async users/health reads, everything else via the Flask app
+app = create_asgi_app(create_app())
@@ -25,6 +25,26 @@ def build_postgres_uri():
         return f"postgresql://{user}:{password}@{host}:{port}/{db_name}"
     return None
 
+def build_replica_binds():
+    """
+    SQLALCHEMY_BINDS entries ("replica_0", "replica_1", ...) for read replicas:
+    DATABASE_REPLICA_URLS (comma-separated URLs, e.g. a second SQLite file locally)
+    or POSTGRES_REPLICA_HOSTS (host[:port],... sharing the primary's POSTGRES_* credentials).
+    """
+    urls = [u.strip() for u in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if u.strip()]
+    if not urls:
+        user = os.getenv("POSTGRES_USER")
+        password = os.getenv("POSTGRES_PASSWORD")
+        port = os.getenv("POSTGRES_PORT", "5432")
+        db_name = os.getenv("POSTGRES_DB")
+        hosts = [h.strip() for h in os.getenv("POSTGRES_REPLICA_HOSTS", "").split(",") if h.strip()]
+        if hosts and all([user, password, db_name]):
+            urls = [
+                f"postgresql://{user}:{password}@{host if ':' in host else f'{host}:{port}'}/{db_name}"
+                for host in hosts
+            ]
+    return {f"replica_{i}": url for i, url in enumerate(urls)}
+
 def mask_db_uri(uri: str) -> str:
     """Return DB URI with password masked, safe for logging."""
     if not uri:
@@ -42,6 +62,21 @@ def mask_db_uri(uri: str) -> str:
     except Exception:
         return uri[:20] + "...(masked)"
 
+def engine_options(pool_size=5, max_overflow=10, pool_timeout=30, pool_recycle=1800, pool_pre_ping=True):
+    """
+    SQLALCHEMY_ENGINE_OPTIONS for a config class. Arguments are that class's
+    defaults; DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE
+    and DB_POOL_PRE_PING override them from the environment.
+    """
+    return {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", pool_size)),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", max_overflow)),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", pool_timeout)),
+        # recycle before server/proxy idle timeouts; pre-ping drops connections killed by a failover
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", pool_recycle)),
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", str(pool_pre_ping)).lower() == "true",
+    }
+
 class Config:
     """
     Base configuration:
@@ -50,6 +85,7 @@ class Config:
     """
     SECRET_KEY = SECRET_KEY
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options()
     SHOW_DEV_BANNER = False
     # Security Defaults
     SESSION_COOKIE_SECURE = True  # Cookies only sent over HTTPS
@@ -62,8 +98,110 @@ class Config:
     
     # Centralized logging level
     LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
-    
-    
+
+    # Users API pagination (GET /api/users?limit=&after=)
+    USERS_PAGE_DEFAULT_LIMIT = int(os.getenv("USERS_PAGE_DEFAULT_LIMIT", "50"))
+    USERS_PAGE_MAX_LIMIT = int(os.getenv("USERS_PAGE_MAX_LIMIT", "500"))
+    # Deprecated: answer a bare GET /api/users with every row as a plain list
+    # (the pre-pagination shape). Off by default; use ?stream=1 for full exports.
+    USERS_LIST_LEGACY_FULL = os.getenv("USERS_LIST_LEGACY_FULL", "false").lower() == "true"
+    # /ui user table: rows per page (?per_page= is clamped to UI_PAGE_MAX_SIZE)
+    UI_PAGE_SIZE = int(os.getenv("UI_PAGE_SIZE", "25"))
+    UI_PAGE_MAX_SIZE = int(os.getenv("UI_PAGE_MAX_SIZE", "100"))
+    # GET /api/users/search: result limit, max term length, and the cap on
+    # rows each index lookup may return before ranking
+    USERS_SEARCH_DEFAULT_LIMIT = int(os.getenv("USERS_SEARCH_DEFAULT_LIMIT", "20"))
+    USERS_SEARCH_MAX_LIMIT = int(os.getenv("USERS_SEARCH_MAX_LIMIT", "100"))
+    USERS_SEARCH_MAX_TERM = int(os.getenv("USERS_SEARCH_MAX_TERM", "100"))
+    USERS_SEARCH_CANDIDATES = int(os.getenv("USERS_SEARCH_CANDIDATES", "200"))
+    # Rows fetched per round trip when streaming GET /api/users?stream=1
+    USERS_STREAM_BATCH_SIZE = int(os.getenv("USERS_STREAM_BATCH_SIZE", "1000"))
+
+    # POST /api/users/bulk
+    BULK_MAX_RECORDS = int(os.getenv("BULK_MAX_RECORDS", "10000"))
+    BULK_INSERT_BATCH_SIZE = int(os.getenv("BULK_INSERT_BATCH_SIZE", "500"))
+    # Password hashing process pool size (unset = one per core, 0 = hash inline)
+    PASSWORD_HASH_WORKERS = int(os.environ["PASSWORD_HASH_WORKERS"]) if os.getenv("PASSWORD_HASH_WORKERS") else None
+    # Seconds a request waits for a pooled hash/verify before giving up (unset = no limit)
+    PASSWORD_HASH_TIMEOUT = float(os.environ["PASSWORD_HASH_TIMEOUT"]) if os.getenv("PASSWORD_HASH_TIMEOUT") else None
+    # Hash algorithm + cost as a werkzeug method string, e.g. "scrypt:32768:8:1"
+    # or "pbkdf2:sha256:600000". Hashes made with other parameters are
+    # upgraded on the next successful password check.
+    PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "scrypt")
+    PASSWORD_SALT_LENGTH = int(os.getenv("PASSWORD_SALT_LENGTH", "16"))
+    PASSWORD_REHASH_ON_VERIFY = os.getenv("PASSWORD_REHASH_ON_VERIFY", "true").lower() == "true"
+
+    # Dashboard system sampler (background thread + ring buffer)
+    SYSTEM_SAMPLER_ENABLED = os.getenv("SYSTEM_SAMPLER_ENABLED", "true").lower() == "true"
+    SYSTEM_SAMPLE_INTERVAL = float(os.getenv("SYSTEM_SAMPLE_INTERVAL", "5"))
+    SYSTEM_SAMPLE_HISTORY = int(os.getenv("SYSTEM_SAMPLE_HISTORY", "720"))
+    # In-process CPU/memory/DB latency/request rate history for /dashboard/data?range=
+    METRICS_HISTORY_ENABLED = os.getenv("METRICS_HISTORY_ENABLED", "true").lower() == "true"
+
+    # Dashboard API health probes: "inprocess" dispatches into the WSGI app
+    # directly, "http" calls APP_BASE_URL. Probes share one deadline and the
+    # result is cached for DASHBOARD_PROBE_TTL seconds.
+    DASHBOARD_PROBE_MODE = os.getenv("DASHBOARD_PROBE_MODE", "inprocess")
+    DASHBOARD_PROBE_ENDPOINTS = [
+        ep.strip() for ep in os.getenv("DASHBOARD_PROBE_ENDPOINTS", "/,/ui,/api/users?limit=1").split(",") if ep.strip()
+    ]
+    DASHBOARD_PROBE_DEADLINE = float(os.getenv("DASHBOARD_PROBE_DEADLINE", "2"))
+    DASHBOARD_PROBE_TTL = float(os.getenv("DASHBOARD_PROBE_TTL", "15"))
+    APP_BASE_URL = os.getenv("APP_BASE_URL")
+    # Dashboard user count source: exact | estimated | counter (see app/services/row_counts.py)
+    DASHBOARD_ROW_COUNT_MODE = os.getenv("DASHBOARD_ROW_COUNT_MODE", "estimated")
+    # Seconds an exact count is reused when estimated/counter has to fall back to COUNT(*)
+    DASHBOARD_ROW_COUNT_CACHE_TTL = float(os.getenv("DASHBOARD_ROW_COUNT_CACHE_TTL", "60"))
+    # Seconds a dashboard snapshot is reused; concurrent refreshes share one rebuild
+    DASHBOARD_SNAPSHOT_TTL = float(os.getenv("DASHBOARD_SNAPSHOT_TTL", "5"))
+    # Dashboard SSE push (/dashboard/stream): one producer per process rebuilds
+    # every INTERVAL seconds; each stream is closed after MAX_DURATION seconds
+    # (browsers reconnect) and at most MAX_CLIENTS streams are open per process.
+    # Every open stream holds a worker thread, so MAX_CLIENTS defaults to the
+    # worker's threads minus THREAD_HEADROOM (gthread with 2 threads: 1 stream);
+    # clients over the limit get a 503 and the page polls instead
+    DASHBOARD_STREAM_INTERVAL = float(os.getenv("DASHBOARD_STREAM_INTERVAL", "5"))
+    DASHBOARD_STREAM_HEARTBEAT = float(os.getenv("DASHBOARD_STREAM_HEARTBEAT", "15"))
+    DASHBOARD_STREAM_MAX_DURATION = float(os.getenv("DASHBOARD_STREAM_MAX_DURATION", "300"))
+    DASHBOARD_STREAM_MAX_CLIENTS = int(os.environ["DASHBOARD_STREAM_MAX_CLIENTS"]) if os.getenv("DASHBOARD_STREAM_MAX_CLIENTS") else None
+    DASHBOARD_STREAM_THREAD_HEADROOM = int(os.getenv("DASHBOARD_STREAM_THREAD_HEADROOM", "1"))
+
+    # Prometheus text exposition at METRICS_PATH. With METRICS_MULTIPROC_DIR
+    # set, every worker writes its numbers there every METRICS_FLUSH_INTERVAL
+    # seconds and a scrape reports all workers; unset, each worker only
+    # reports its own. gunicorn.conf.py empties the directory on start.
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    METRICS_PATH = os.getenv("METRICS_PATH", "/metrics")
+    METRICS_MULTIPROC_DIR = os.getenv("METRICS_MULTIPROC_DIR")
+    METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "1"))
+
+    # per-phase timing (db / tpl / hash): Server-Timing header + slow-request log
+    SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "true").lower() == "true"
+    SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "500"))
+    # X-DB-Query-Count / X-DB-Query-Time-Ms headers; warn when a request runs more than QUERY_BUDGET statements
+    QUERY_HEADERS_ENABLED = os.getenv("QUERY_HEADERS_ENABLED", "true").lower() == "true"
+    QUERY_BUDGET = int(os.getenv("QUERY_BUDGET", "50"))
+
+    # read replicas (see app/services/db_replicas.py): ejection period after a connection
+    # error, and how long a client that wrote keeps reading from the primary
+    REPLICA_EJECT_SECONDS = float(os.getenv("REPLICA_EJECT_SECONDS", "30"))
+    REPLICA_STICKY_SECONDS = float(os.getenv("REPLICA_STICKY_SECONDS", "5"))
+    REPLICA_STICKY_COOKIE = os.getenv("REPLICA_STICKY_COOKIE", "db_primary_until")
+
+    # ASGI mode (asgi.py): async engine URL (default: the sync database with asyncpg/aiosqlite)
+    # and the thread pool serving the routes that stay on the Flask app
+    ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL")
+    ASGI_WSGI_THREADS = int(os.getenv("ASGI_WSGI_THREADS", "32"))
+
+    # response compression (see app/services/compression.py): gzip level 1-9, brotli
+    # quality 0-11 (brotli only when the package is installed), bodies below
+    # COMPRESS_MIN_SIZE bytes are sent as is
+    COMPRESS_ENABLED = os.getenv("COMPRESS_ENABLED", "true").lower() == "true"
+    COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "500"))
+    COMPRESS_LEVEL = int(os.getenv("COMPRESS_LEVEL", "6"))
+    COMPRESS_BROTLI = os.getenv("COMPRESS_BROTLI", "true").lower() == "true"
+    COMPRESS_BR_LEVEL = int(os.getenv("COMPRESS_BR_LEVEL", "4"))
+
     ENV_NAME = "Base"
     # Add other security settings as needed
     # e.g., CSRF_COOKIE_SECURE, PERMANENT_SESSION_LIFETIME, etc.
@@ -88,6 +226,10 @@ class TestingConfig(Config):
     SQLALCHEMY_DATABASE_URI = build_postgres_uri() or f"sqlite:///{os.path.join(basedir, 'test_database.db')}"
     WTF_CSRF_ENABLED = False
     PRESERVE_CONTEXT_ON_EXCEPTION = False
+    PASSWORD_HASH_WORKERS = 0  # hash inline: no process pool in tests
+    PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "pbkdf2:sha256:1000")  # cheap for tests/CI
+    SYSTEM_SAMPLER_ENABLED = False  # dashboard takes one-off non-blocking readings instead
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(pool_size=2, max_overflow=5, pool_timeout=5, pool_pre_ping=False)
     
     
     
@@ -96,6 +238,11 @@ class ProductionConfig(Config):
     ENV_NAME = "Production"
     SHOW_DEV_BANNER = False
     SQLALCHEMY_DATABASE_URI = None 
+    # gunicorn workers x (pool_size + max_overflow) must stay under Postgres max_connections
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(pool_size=10, max_overflow=20, pool_timeout=10, pool_recycle=900)
+    # timing breakdown stays in the slow-request log instead of every response
+    SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "false").lower() == "true"
+    QUERY_HEADERS_ENABLED = os.getenv("QUERY_HEADERS_ENABLED", "false").lower() == "true"
     
     @classmethod
     def init_db_uri(cls):
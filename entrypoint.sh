@@ -10,6 +10,7 @@
 #     MIGRATE_IGNORE_FAILURE (default: false)  # if true, continue even if migration fails
 #     PG_STARTUP_TIMEOUT (seconds, default: 60)
 #     APP_CONFIG (production|anything_else)
+#     SERVER_MODE (wsgi|asgi, default: wsgi) — production server flavour
 #     If you run container with custom CMD/args, they will be executed (exec "$@")
 
 set -e
@@ -26,7 +27,7 @@ MIGRATE_ON_STARTUP=${MIGRATE_ON_STARTUP:-false}
 MIGRATE_IGNORE_FAILURE=${MIGRATE_IGNORE_FAILURE:-false}
 PG_STARTUP_TIMEOUT=${PG_STARTUP_TIMEOUT:-60}   # seconds
 APP_CONFIG=${APP_CONFIG:-development}
-GUNICORN_WORKERS=${GUNICORN_WORKERS:-3}
+# gunicorn sizing/preload/worker class: see gunicorn.conf.py (GUNICORN_* env vars)
 
 if [ -z "${DATABASE_URL:-}" ]; then
   DATABASE_URL="postgresql://${POSTGRES_USER}:${POSTGRES_PASSWORD}@${POSTGRES_HOST}:${POSTGRES_PORT}/${POSTGRES_DB}"
@@ -132,7 +133,12 @@ fi
 # Default behavior: decide based on APP_CONFIG
 if [ "$APP_CONFIG" = "production" ]; then
   printf "Starting app with gunicorn (production)...\n"
-  exec gunicorn --bind 0.0.0.0:8000 wsgi:app --workers "$GUNICORN_WORKERS" --threads 2
+  if [ "${SERVER_MODE:-wsgi}" = "asgi" ]; then
+    # async users/health reads on the async engine; everything else via the Flask app (app/asgi.py).
+    # Needs the asyncio drivers: build the image with --build-arg WITH_ASGI=true
+    exec gunicorn --config gunicorn.conf.py --worker-class asgi asgi:app
+  fi
+  exec gunicorn --config gunicorn.conf.py wsgi:app
 else
   printf "Starting Flask dev server (development)...\n"
   exec flask run --host=0.0.0.0 --port=5000
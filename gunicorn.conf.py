@@ -0,0 +1,187 @@
+# gunicorn.conf.py
+"""
+Gunicorn settings for wsgi:app (used by entrypoint.sh and the Dockerfile),
+and for asgi:app with GUNICORN_WORKER_CLASS=asgi.
+
+Worker and thread counts follow the container's cgroup limits rather than
+the host's core count: the CPU quota (cgroup v2 cpu.max, or v1
+cpu.cfs_quota_us / cpu.cfs_period_us) sets workers = 2 * cpus + 1, and the
+memory limit caps that at memory / GUNICORN_WORKER_MEMORY_MB.
+
+The app is preloaded in the master, so create_app() runs once and workers
+share its memory copy-on-write. create_app() starts no threads, so the
+master never forks with a lock held by one. Anything the master opened
+cannot be shared across processes, so post_fork drops the inherited
+database connections (without closing the master's sockets), gives the
+metrics history store and system sampler fresh locks and starts the
+sampler thread in the worker. It also sizes the dashboard SSE client limit
+from the worker's thread count (see app/services/dashboard_stream.py).
+
+With METRICS_MULTIPROC_DIR set, /metrics reports every worker (see
+app/services/metrics.py): the directory is emptied when the master starts,
+each worker writes its final numbers on exit, and the master folds an
+exited worker's numbers into the archive so counters survive recycling.
+
+Every setting can be overridden from the environment:
+    GUNICORN_BIND              (default 0.0.0.0:8000)
+    GUNICORN_WORKERS           (default: from cgroup CPU quota and memory)
+    GUNICORN_THREADS           (default 2; only used by gthread; also caps dashboard SSE clients)
+    GUNICORN_WORKER_CLASS      (default gthread; sync, asgi, gevent, ...)
+    GUNICORN_WORKER_MEMORY_MB  (default 150; per-worker budget for the memory cap)
+    GUNICORN_PRELOAD           (default true)
+    GUNICORN_MAX_REQUESTS      (default 1000; 0 disables worker recycling)
+    GUNICORN_MAX_REQUESTS_JITTER (default 100)
+    GUNICORN_TIMEOUT, GUNICORN_GRACEFUL_TIMEOUT, GUNICORN_KEEPALIVE
+    GUNICORN_ACCESS_LOG        (e.g. "-" for stdout; off by default)
+    GUNICORN_LOG_LEVEL         (default info)
+    METRICS_MULTIPROC_DIR      (shared by the app config; unset = per-worker /metrics)
+"""
+import math
+import os
+from pathlib import Path
+
+CGROUP_ROOT = Path("/sys/fs/cgroup")
+# cgroup v1 reports "no limit" as a huge page-aligned number
+UNLIMITED_MEMORY = 1 << 60
+
+
+def _env_bool(name, default):
+    return os.getenv(name, str(default)).lower() in ("1", "true", "yes")
+
+
+def _read(path: Path):
+    try:
+        return path.read_text().strip()
+    except OSError:
+        return None
+
+
+def cgroup_cpu_limit(root: Path = CGROUP_ROOT):
+    """CPUs allowed by the cgroup quota (may be fractional), or None when unlimited/unknown."""
+    cpu_max = _read(root / "cpu.max")  # v2: "<quota> <period>" or "max <period>"
+    if cpu_max:
+        quota, _, period = cpu_max.partition(" ")
+        if quota != "max" and period:
+            return int(quota) / int(period)
+        return None
+    quota = _read(root / "cpu" / "cpu.cfs_quota_us") or _read(root / "cpu.cfs_quota_us")
+    period = _read(root / "cpu" / "cpu.cfs_period_us") or _read(root / "cpu.cfs_period_us")
+    if quota and period and int(quota) > 0:
+        return int(quota) / int(period)
+    return None
+
+
+def cgroup_memory_limit(root: Path = CGROUP_ROOT):
+    """Memory limit in bytes, or None when unlimited/unknown."""
+    value = _read(root / "memory.max") or _read(root / "memory" / "memory.limit_in_bytes") \
+        or _read(root / "memory.limit_in_bytes")
+    if not value or value == "max" or int(value) >= UNLIMITED_MEMORY:
+        return None
+    return int(value)
+
+
+def available_cpus(root: Path = CGROUP_ROOT) -> float:
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # not on Linux
+        cpus = os.cpu_count() or 1
+    quota = cgroup_cpu_limit(root)
+    return min(cpus, quota) if quota else cpus
+
+
+def default_workers(root: Path = CGROUP_ROOT, worker_memory_mb: int = 150) -> int:
+    """2 * cpus + 1, capped by how many workers fit in the memory limit; never below 1."""
+    workers = 2 * math.ceil(available_cpus(root)) + 1
+    memory = cgroup_memory_limit(root)
+    if memory:
+        workers = min(workers, memory // (worker_memory_mb * 1024 * 1024))
+    return max(1, int(workers))
+
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+workers = int(os.getenv("GUNICORN_WORKERS") or default_workers(
+    worker_memory_mb=int(os.getenv("GUNICORN_WORKER_MEMORY_MB", "150"))))
+threads = int(os.getenv("GUNICORN_THREADS", "2"))
+
+preload_app = _env_bool("GUNICORN_PRELOAD", True)
+# recycle workers to bound slow leaks; the jitter keeps them from restarting together
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "1000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "100"))
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+# heartbeat files on tmpfs: a disk-backed /tmp can stall workers under I/O load
+worker_tmp_dir = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+accesslog = os.getenv("GUNICORN_ACCESS_LOG") or None
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
+
+METRICS_MULTIPROC_DIR = os.getenv("METRICS_MULTIPROC_DIR") or None
+
+
+def on_starting(server):
+    if METRICS_MULTIPROC_DIR:
+        from app.services import metrics
+        # numbers from a previous run would be added to this one's
+        metrics.reset_directory(METRICS_MULTIPROC_DIR)
+
+
+def when_ready(server):
+    cfg = server.cfg  # command-line flags may override this file
+    server.log.info(
+        "gunicorn ready: %s x %s worker(s), %s thread(s) each, preload=%s",
+        cfg.workers, cfg.worker_class_str, cfg.threads, cfg.preload_app,
+    )
+
+
+def post_fork(server, worker):
+    if not server.cfg.preload_app:
+        return
+    from app import db
+    from app.services import dashboard_stream, metrics, system_metrics, timeseries
+
+    # the application the master preloaded: the Flask app (wsgi:app) or its ASGI wrapper (asgi:app)
+    loaded = server.app.wsgi()
+    app = getattr(loaded, "flask_app", loaded)
+    broadcaster = app.extensions.get(dashboard_stream.EXTENSION_KEY)
+    if broadcaster is not None and loaded is app:
+        # each SSE client holds one of this worker's threads (asgi:app sizes it from its own pool)
+        broadcaster.fit_to_threads(server.cfg.threads)
+
+    with app.app_context():
+        # close=False: the sockets belong to the master; just forget them here
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+    # create_app() starts no threads, but reset the locks the worker inherited anyway:
+    # one held by a master thread at fork time would never be released here
+    store = timeseries.get_store(app)
+    if store is not None:
+        store.after_fork()
+    sampler = app.extensions.get(system_metrics.EXTENSION_KEY)
+    if sampler is not None:
+        sampler.after_fork()
+        if app.config.get("SYSTEM_SAMPLER_ENABLED", True):
+            sampler.start()
+    writer = metrics.snapshot_writer()
+    if writer is not None:
+        writer.after_fork()  # started on the worker's first request
+
+
+def worker_exit(server, worker):
+    # in the worker: leave its last numbers for child_exit to archive
+    if METRICS_MULTIPROC_DIR:
+        from app.services import metrics
+        writer = metrics.snapshot_writer()
+        if writer is not None:
+            writer.stop()
+            writer.flush()
+
+
+def child_exit(server, worker):
+    # in the master, once per exited worker
+    if METRICS_MULTIPROC_DIR:
+        from app.services import metrics
+        metrics.archive_process(METRICS_MULTIPROC_DIR, worker.pid)
@@ -0,0 +1,44 @@
+"""add row_counters with users triggers
+
+Revision ID: 5c9e1b7d2f64
+Revises: d41f6a8e07b2
+Create Date: 2026-10-18 13:41:09.372518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app import ddl
+
+
+# revision identifiers, used by Alembic.
+revision = '5c9e1b7d2f64'
+down_revision = 'd41f6a8e07b2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('row_counters',
+    sa.Column('table_name', sa.String(length=64), nullable=False),
+    sa.Column('row_count', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('table_name')
+    )
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        # lock out writers so the seed count and the triggers start in step
+        op.execute("LOCK TABLE users IN SHARE ROW EXCLUSIVE MODE")
+    # same triggers and seed as create_all() (app/ddl.py)
+    ddl.install_row_counters(bind)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    op.execute("DROP TRIGGER IF EXISTS users_row_count_ins ON users" if dialect == 'postgresql'
+               else "DROP TRIGGER IF EXISTS users_row_count_ins")
+    op.execute("DROP TRIGGER IF EXISTS users_row_count_del ON users" if dialect == 'postgresql'
+               else "DROP TRIGGER IF EXISTS users_row_count_del")
+    if dialect == 'postgresql':
+        op.execute("DROP FUNCTION IF EXISTS users_row_count_ins()")
+        op.execute("DROP FUNCTION IF EXISTS users_row_count_del()")
+    op.drop_table('row_counters')
@@ -0,0 +1,28 @@
+"""add users created_at index
+
+Revision ID: b7e4c2a91d3f
+Revises: 8c3d85d09116
+Create Date: 2026-10-18 10:12:40.118302
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e4c2a91d3f'
+down_revision = '8c3d85d09116'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # backs GET /api/users?sort=created_at keyset pagination and the
+    # "newest first" listings; username and id are already indexed
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.create_index('ix_users_created_at_id', ['created_at', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index('ix_users_created_at_id')
@@ -0,0 +1,27 @@
+"""add users updated_at index
+
+Revision ID: d41f6a8e07b2
+Revises: b7e4c2a91d3f
+Create Date: 2026-10-18 11:03:27.540961
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd41f6a8e07b2'
+down_revision = 'b7e4c2a91d3f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # max(updated_at) is the users collection validator (ETag / Last-Modified)
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_users_updated_at'), ['updated_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_users_updated_at'))
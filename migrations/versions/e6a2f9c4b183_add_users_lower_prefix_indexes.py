@@ -0,0 +1,33 @@
+"""add lower() prefix-search indexes on users.username / users.email
+
+Revision ID: e6a2f9c4b183
+Revises: 5c9e1b7d2f64
+Create Date: 2026-10-18 15:02:47.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6a2f9c4b183'
+down_revision = '5c9e1b7d2f64'
+branch_labels = None
+depends_on = None
+
+
+def _expr(column):
+    # text_pattern_ops makes LIKE 'prefix%' index-assisted on Postgres
+    if op.get_bind().dialect.name == 'postgresql':
+        return sa.text(f'lower({column}) text_pattern_ops')
+    return sa.text(f'lower({column})')
+
+
+def upgrade():
+    op.create_index('ix_users_username_lower', 'users', [_expr('username')], unique=False)
+    op.create_index('ix_users_email_lower', 'users', [_expr('email')], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_users_email_lower', table_name='users')
+    op.drop_index('ix_users_username_lower', table_name='users')
@@ -0,0 +1,36 @@
+"""add users substring search index (pg_trgm on Postgres, FTS5 on SQLite)
+
+Revision ID: f3b8d1a7c925
+Revises: e6a2f9c4b183
+Create Date: 2026-10-18 15:48:12.604931
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app import ddl
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3b8d1a7c925'
+down_revision = 'e6a2f9c4b183'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # same DDL as create_all() (app/ddl.py), in a savepoint: without pg_trgm (or the
+    # privilege to CREATE EXTENSION) or FTS5 it logs a warning and search stays unindexed
+    ddl.install_user_search(op.get_bind())
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_users_email_trgm")
+        op.execute("DROP INDEX IF EXISTS ix_users_username_trgm")
+    elif dialect == 'sqlite':
+        op.execute("DROP TRIGGER IF EXISTS users_search_upd")
+        op.execute("DROP TRIGGER IF EXISTS users_search_del")
+        op.execute("DROP TRIGGER IF EXISTS users_search_ins")
+        op.execute("DROP TABLE IF EXISTS users_search")
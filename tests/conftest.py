@@ -295,6 +295,12 @@ def client(app):
 def pg_client(pg_app, db_session):
     return pg_app.test_client()
 
+# N+1 guard: `with assert_max_queries(3): client.get(...)` fails listing the statements run
+@pytest.fixture
+def assert_max_queries(app):
+    from app.services.query_budget import assert_max_queries as _assert_max_queries
+    return _assert_max_queries
+
 # Simple user factory for tests (creates user in db_session by default)
 @pytest.fixture
 def user_factory(db_session):
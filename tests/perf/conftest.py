@@ -0,0 +1,206 @@
+# tests/perf/conftest.py
+"""
+Endpoint benchmark fixtures.
+
+The perf tests are deselected by default (pytest.ini); run them with
+`pytest -m perf tests/perf`. They use their own app, always on
+TestingConfig with the cheap pbkdf2 hash inline, and their own database (a
+throwaway SQLite file, or PERF_DATABASE_URL) seeded with PERF_USERS users,
+so they never touch the data other suites rely on. Each benchmark records
+latency percentiles and throughput; at the end of the session all results
+are written to PERF_RESULTS as JSON and every scenario is compared against
+tests/perf/baselines.json.
+
+Environment knobs:
+- PERF_USERS        users seeded before the run (default 1000; try 100000)
+- PERF_REQUESTS     timed requests per endpoint (default 200)
+- PERF_WARMUP       untimed requests per endpoint first (default 10)
+- PERF_RESULTS      results file (default reports/perf-results.json)
+- PERF_TOLERANCE    allowed slowdown vs baseline, as a fraction (default 1.0 = 2x)
+- PERF_SLACK_MS     absolute latency slack on top of it (default 5)
+- PERF_COMPRESSION_REQUESTS  timed requests per compression level (default 20)
+- PERF_UPDATE_BASELINE=1  store this run's numbers as the new baseline
+"""
+import json
+import os
+import statistics
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+from sqlalchemy import insert
+
+from app import create_app, db as _db
+from app.models import User
+from app.services import hashing
+from perf_stats import percentile
+
+BASELINES_PATH = Path(__file__).with_name("baselines.json")
+PASSWORD = "PerfPass1!"
+# the cheap TestingConfig hash, inline: the baselines measure the app, not scrypt
+PERF_HASH_METHOD = "pbkdf2:sha256:1000"
+SEED_BATCH = 5000
+
+
+def _env_int(name, default):
+    return int(os.getenv(name, default))
+
+
+def _env_float(name, default):
+    return float(os.getenv(name, default))
+
+
+def summarize(latencies_ms, wall_s):
+    return {
+        "requests": len(latencies_ms),
+        "p50_ms": round(percentile(latencies_ms, 50), 3),
+        "p95_ms": round(percentile(latencies_ms, 95), 3),
+        "p99_ms": round(percentile(latencies_ms, 99), 3),
+        "mean_ms": round(statistics.fmean(latencies_ms), 3),
+        "max_ms": round(max(latencies_ms), 3),
+        "rps": round(len(latencies_ms) / wall_s, 1) if wall_s else None,
+    }
+
+
+def regressions(name, stats, baseline, tolerance, slack_ms):
+    """Human-readable list of metrics where stats is worse than baseline allows."""
+    problems = []
+    for metric in ("p50_ms", "p95_ms"):
+        if metric in baseline:
+            limit = baseline[metric] * (1 + tolerance) + slack_ms
+            if stats[metric] > limit:
+                problems.append(f"{name} {metric} {stats[metric]} > {limit:.3f} (baseline {baseline[metric]})")
+    if baseline.get("rps") and stats["rps"] is not None:
+        floor = baseline["rps"] / (1 + tolerance)
+        if stats["rps"] < floor:
+            problems.append(f"{name} rps {stats['rps']} < {floor:.1f} (baseline {baseline['rps']})")
+    return problems
+
+
+@pytest.fixture(scope="session")
+def perf_settings():
+    return {
+        "users": _env_int("PERF_USERS", 1000),
+        "requests": _env_int("PERF_REQUESTS", 200),
+        "warmup": _env_int("PERF_WARMUP", 10),
+        "results_path": Path(os.getenv("PERF_RESULTS", "reports/perf-results.json")),
+        "tolerance": _env_float("PERF_TOLERANCE", 1.0),
+        "slack_ms": _env_float("PERF_SLACK_MS", 5),
+        "compression_requests": _env_int("PERF_COMPRESSION_REQUESTS", 20),
+        "update_baseline": os.getenv("PERF_UPDATE_BASELINE") == "1",
+    }
+
+
+@pytest.fixture(scope="session")
+def perf_app(tmp_path_factory, perf_settings):
+    """An app on its own database, seeded with perf_settings['users'] users."""
+    url = os.getenv("PERF_DATABASE_URL") or f"sqlite:///{tmp_path_factory.mktemp('perf') / 'perf.db'}"
+    # create_app() takes its config class and URI from the environment; the
+    # baselines were recorded under TestingConfig, whatever APP_CONFIG says
+    overrides = {"DATABASE_URL": url, "APP_CONFIG": "testing"}
+    previous = {name: os.environ.get(name) for name in overrides}
+    os.environ.update(overrides)
+    try:
+        app = create_app()
+    finally:
+        for name, value in previous.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+    app.config.update(TESTING=True, SLOW_REQUEST_MS=None, QUERY_BUDGET=None,
+                      # pinned as well: an exported PASSWORD_HASH_METHOD would override TestingConfig
+                      PASSWORD_HASH_METHOD=PERF_HASH_METHOD, PASSWORD_HASH_WORKERS=0)
+
+    with app.app_context():
+        _db.create_all()
+        # one real hash shared by every seeded row: seeding measures nothing
+        pw_hash = hashing.hash_password(PASSWORD)
+        total = perf_settings["users"]
+        for start in range(0, total, SEED_BATCH):
+            rows = [
+                {"username": f"perf_{i:07d}", "email": f"perf_{i:07d}@example.com",
+                 "password_hash": pw_hash, "is_root": False, "force_password_change": False}
+                for i in range(start, min(start + SEED_BATCH, total))
+            ]
+            _db.session.execute(insert(User), rows)
+        _db.session.commit()
+        _db.session.remove()
+
+    yield app
+
+    with app.app_context():
+        _db.session.remove()
+        if not os.getenv("PERF_DATABASE_URL"):
+            _db.drop_all()
+        _db.engine.dispose()
+
+
+@pytest.fixture(scope="session")
+def perf_client(perf_app):
+    return perf_app.test_client()
+
+
+@pytest.fixture(scope="session")
+def perf_results(perf_settings):
+    """Collects {scenario: stats}; written to PERF_RESULTS (and the baseline file, if asked) at session end."""
+    results = {}
+    yield results
+    if not results:
+        return
+    key = str(perf_settings["users"])
+    path = perf_settings["results_path"]
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "users": perf_settings["users"],
+        "requests_per_endpoint": perf_settings["requests"],
+        "scenarios": results,
+    }, indent=2) + "\n")
+
+    if perf_settings["update_baseline"]:
+        baselines = json.loads(BASELINES_PATH.read_text()) if BASELINES_PATH.exists() else {}
+        baselines[key] = {
+            name: {m: stats[m] for m in ("p50_ms", "p95_ms", "rps")} for name, stats in sorted(results.items())
+        }
+        BASELINES_PATH.write_text(json.dumps(baselines, indent=2, sort_keys=True) + "\n")
+
+
+@pytest.fixture
+def bench(perf_app, perf_settings, perf_results):
+    """
+    bench(name, call) runs call(i) PERF_WARMUP times untimed, then
+    PERF_REQUESTS times (or `requests` times) timed, records the summary
+    (plus process CPU time per request) under name and fails the test when
+    it regressed past the stored baseline for this PERF_USERS.
+    call(i) must return the response so its status can be checked.
+    """
+    baselines = json.loads(BASELINES_PATH.read_text()) if BASELINES_PATH.exists() else {}
+    baseline_set = baselines.get(str(perf_settings["users"]), {})
+
+    def run(name, call, expected_status=200, requests=None):
+        # no app context is held open: every request gets its own, as in production
+        for i in range(perf_settings["warmup"]):
+            assert call(-1 - i).status_code == expected_status
+
+        latencies = []
+        started = time.perf_counter()
+        cpu_started = time.process_time()
+        for i in range(requests or perf_settings["requests"]):
+            t0 = time.perf_counter()
+            res = call(i)
+            latencies.append((time.perf_counter() - t0) * 1000)
+            assert res.status_code == expected_status, res.get_data(as_text=True)[:500]
+        cpu_ms = (time.process_time() - cpu_started) * 1000
+        stats = summarize(latencies, time.perf_counter() - started)
+        stats["cpu_ms"] = round(cpu_ms / len(latencies), 3)
+        perf_results[name] = stats
+
+        if not perf_settings["update_baseline"] and name in baseline_set:
+            problems = regressions(name, stats, baseline_set[name],
+                                   perf_settings["tolerance"], perf_settings["slack_ms"])
+            assert not problems, "performance regression:\n" + "\n".join(problems)
+        return stats
+
+    return run
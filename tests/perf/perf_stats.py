@@ -0,0 +1,14 @@
+# tests/perf/perf_stats.py
+"""
+Latency statistics shared by the benchmark fixtures (conftest.py) and the
+gunicorn load test (loadtest.py). Standard library only: loadtest.py runs
+as a plain script, outside pytest and the app.
+"""
+from typing import List
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(samples)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
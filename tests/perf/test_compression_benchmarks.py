@@ -0,0 +1,73 @@
+"""
+Response size and CPU per request at each compression level.
+
+Every (endpoint, encoding, level) combination is benchmarked with the
+Accept-Encoding a browser would send for it; the results file gets
+bytes on the wire, the ratio to the identity body, zip_ms (compression
+time alone, from the "zip" Server-Timing phase) and cpu_ms (process CPU
+time of the whole request) next to the latencies:
+
+    PERF_USERS=1000 pytest -m perf tests/perf/test_compression_benchmarks.py
+    jq '.scenarios | with_entries(select(.key | startswith("compress_")))' reports/perf-results.json
+
+Brotli levels are skipped when the brotli package is not installed.
+Quality 10-11 take hundreds of milliseconds on the 1000-user list and
+are left out.
+"""
+import re
+import statistics
+
+import pytest
+
+from app.services import compression
+
+pytestmark = pytest.mark.perf
+
+ENDPOINTS = {"users_json": "/api/users", "ui_html": "/ui"}
+LEVELS = [("identity", None), ("gzip", 1), ("gzip", 6), ("gzip", 9), ("br", 1), ("br", 4), ("br", 9)]
+LEVEL_KEYS = {"gzip": "COMPRESS_LEVEL", "br": "COMPRESS_BR_LEVEL"}
+ZIP_TIMING = re.compile(r"\bzip;dur=([\d.]+)")
+
+
+def zip_ms(response) -> float:
+    match = ZIP_TIMING.search(response.headers.get("Server-Timing", ""))
+    return float(match.group(1)) if match else 0.0
+
+
+@pytest.fixture(scope="module")
+def identity_sizes(perf_client):
+    return {name: len(perf_client.get(path).data) for name, path in ENDPOINTS.items()}
+
+
+@pytest.mark.parametrize("encoding, level", LEVELS, ids=[f"{e}{l or ''}" for e, l in LEVELS])
+@pytest.mark.parametrize("endpoint", sorted(ENDPOINTS))
+def test_compression_level(bench, perf_app, perf_client, perf_settings, perf_results, identity_sizes,
+                           monkeypatch, endpoint, encoding, level):
+    if encoding == "br" and compression.brotli is None:
+        pytest.skip("brotli is not installed")
+    if level is not None:
+        monkeypatch.setitem(perf_app.config, LEVEL_KEYS[encoding], level)
+    monkeypatch.setitem(perf_app.config, "SERVER_TIMING_ENABLED", True)  # source of zip_ms
+    headers = {"Accept-Encoding": encoding}
+    path = ENDPOINTS[endpoint]
+    sizes, zip_times = [], []
+
+    def call(i):
+        res = perf_client.get(path, headers=headers)
+        if i >= 0:  # negative i: warmup
+            sizes.append(len(res.data))
+            zip_times.append(zip_ms(res))
+        return res
+
+    name = f"compress_{endpoint}_{encoding}{level or ''}"
+    bench(name, call, requests=perf_settings["compression_requests"])
+
+    res = perf_client.get(path, headers=headers)
+    assert res.headers.get("Content-Encoding", "identity") == encoding
+    perf_results[name].update(
+        bytes=sizes[-1],
+        ratio=round(identity_sizes[endpoint] / sizes[-1], 2),
+        zip_ms=round(statistics.fmean(zip_times), 3),
+    )
+    if encoding != "identity":
+        assert sizes[-1] < identity_sizes[endpoint] / 3
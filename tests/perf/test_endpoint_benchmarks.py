@@ -0,0 +1,53 @@
+import itertools
+
+import pytest
+from sqlalchemy import select
+
+from app import db as _db
+from app.models import User
+
+pytestmark = pytest.mark.perf
+
+NEW_PASSWORD = "PerfReset1!"
+
+
+@pytest.fixture(scope="module")
+def user_ids(perf_app):
+    with perf_app.app_context():
+        return _db.session.scalars(select(User.id).order_by(User.id).limit(100)).all()
+
+
+def test_list_users(bench, perf_client):
+    bench("list_users", lambda i: perf_client.get("/api/users"))
+
+
+def test_create_user(bench, perf_client):
+    seq = itertools.count()
+
+    def create(i):
+        n = next(seq)
+        return perf_client.post("/api/users", json={
+            "username": f"bench_{n:07d}", "email": f"bench_{n:07d}@example.com",
+            "password": NEW_PASSWORD, "confirm_password": NEW_PASSWORD,
+        })
+
+    bench("create_user", create, expected_status=201)
+
+
+def test_reset_password(bench, perf_client, user_ids):
+    bench("reset_password", lambda i: perf_client.post(
+        f"/api/users/{user_ids[i % len(user_ids)]}/reset_password",
+        json={"new_password": NEW_PASSWORD, "confirm_password": NEW_PASSWORD},
+    ))
+
+
+def test_ui(bench, perf_client):
+    bench("ui", lambda i: perf_client.get("/ui"))
+
+
+def test_dashboard_data(bench, perf_client):
+    bench("dashboard_data", lambda i: perf_client.get("/dashboard/data"))
+
+
+def test_ready(bench, perf_client):
+    bench("ready", lambda i: perf_client.get("/ready"))
@@ -0,0 +1,165 @@
+import asyncio
+import gzip
+import json
+
+import pytest
+
+pytest.importorskip("aiosqlite")
+
+from app import db as _db
+from app.asgi import AsyncAPI
+from app.models import User
+from app.services import async_db, users_service
+
+pytestmark = pytest.mark.unit
+
+PASSWORD = "StrongPass1!"
+
+
+async def call(api, method, path, query=b"", headers=(), body=b""):
+    """Drive one HTTP request through an ASGI app; returns (status, headers, body)."""
+    scope = {
+        "type": "http", "method": method, "path": path, "query_string": query,
+        "headers": [(k.lower().encode(), v.encode()) for k, v in headers],
+        "http_version": "1.1", "scheme": "http", "server": ("testserver", 80), "client": ("127.0.0.1", 1),
+    }
+    received = [{"type": "http.request", "body": body, "more_body": False}]
+    messages = []
+
+    async def receive():
+        return received.pop(0) if received else {"type": "http.disconnect"}
+
+    async def send(message):
+        messages.append(message)
+
+    await api(scope, receive, send)
+    start = messages[0]
+    headers = {k.decode(): v.decode() for k, v in start["headers"]}
+    return start["status"], headers, b"".join(m.get("body", b"") for m in messages[1:])
+
+
+@pytest.fixture
+def run(app):
+    """run(scenario) executes scenario(api) on a fresh AsyncAPI and event loop."""
+    def _run(scenario):
+        async def main():
+            api = AsyncAPI(app)
+            try:
+                return await scenario(api)
+            finally:
+                await api.aclose()
+                api.executor.shutdown(wait=True)
+        return asyncio.run(main())
+    return _run
+
+
+@pytest.fixture(autouse=True)
+def _cleanup():
+    yield
+    _db.session.rollback()
+    User.query.filter(User.username.like("as_%")).delete(synchronize_session=False)
+    _db.session.commit()
+
+
+def test_async_url_swaps_drivers():
+    assert str(async_db.async_url("sqlite:////tmp/x.db")) == "sqlite+aiosqlite:////tmp/x.db"
+    pg = async_db.async_url("postgresql+psycopg2://u:p@db/app?sslmode=require")
+    assert pg.drivername == "postgresql+asyncpg"
+    assert pg.query == {"ssl": "require"}
+    with pytest.raises(ValueError):
+        async_db.async_url("mysql://u@db/app")
+
+
+def test_missing_async_driver_is_reported(monkeypatch):
+    monkeypatch.setattr(async_db.importlib.util, "find_spec", lambda name: None)
+    with pytest.raises(RuntimeError, match="requirements-asgi.txt"):
+        async_db.require_driver(async_db.async_url("sqlite:////tmp/x.db"))
+
+
+def test_health_routes(run):
+    async def scenario(api):
+        return await call(api, "GET", "/healthz"), await call(api, "GET", "/ready")
+
+    (status, _, body), (ready_status, _, ready_body) = run(scenario)
+    assert status == 200 and json.loads(body) == {"status": "ok"}
+    assert ready_status == 200 and json.loads(ready_body)["status"] == "ready"
+
+
+def test_user_reads_match_the_flask_views(run, client):
+    user = users_service.create_user("as_reader", "as_reader@example.com", PASSWORD)
+
+    async def scenario(api):
+        return (
+            await call(api, "GET", "/api/users", b"limit=2&sort=id&order=desc"),
+            await call(api, "GET", f"/api/users/{user.id}"),
+            await call(api, "GET", "/api/users/999999"),
+            await call(api, "GET", "/api/users", b"sort=bogus"),
+        )
+
+    page, single, missing, bad = run(scenario)
+    wsgi_page = client.get("/api/users?limit=2&sort=id&order=desc")
+    wsgi_single = client.get(f"/api/users/{user.id}")
+
+    assert page[0] == 200
+    assert json.loads(page[2]) == wsgi_page.get_json()
+    assert page[1]["etag"] == wsgi_page.headers["ETag"]
+    assert single[0] == 200 and json.loads(single[2]) == wsgi_single.get_json()
+    assert single[1]["last-modified"] == wsgi_single.headers["Last-Modified"]
+    assert missing[0] == 404
+    assert bad[0] == 400 and "pagination" in json.loads(bad[2])["errors"]
+
+
+def test_conditional_get_returns_304(run):
+    user = users_service.create_user("as_cond", "as_cond@example.com", PASSWORD)
+
+    async def scenario(api):
+        _, headers, _ = await call(api, "GET", f"/api/users/{user.id}")
+        return await call(api, "GET", f"/api/users/{user.id}", headers=[("If-None-Match", headers["etag"])])
+
+    status, _, body = run(scenario)
+    assert status == 304 and body == b""
+
+
+def test_async_routes_are_compressed(run, app, monkeypatch):
+    users_service.create_user("as_zip", "as_zip@example.com", PASSWORD)
+    monkeypatch.setitem(app.config, "COMPRESS_MIN_SIZE", 0)
+
+    async def scenario(api):
+        return (await call(api, "GET", "/api/users"),
+                await call(api, "GET", "/api/users", headers=[("Accept-Encoding", "gzip")]))
+
+    (_, plain_headers, plain), (_, headers, body) = run(scenario)
+    assert "content-encoding" not in plain_headers
+    assert headers["content-encoding"] == "gzip" and headers["vary"] == "Accept-Encoding"
+    assert int(headers["content-length"]) == len(body)
+    assert gzip.decompress(body) == plain
+
+
+def test_other_routes_fall_through_to_flask(run):
+    payload = json.dumps({"username": "as_new", "email": "as_new@example.com",
+                          "password": PASSWORD, "confirm_password": PASSWORD}).encode()
+
+    async def scenario(api):
+        created = await call(api, "POST", "/api/users", headers=[("Content-Type", "application/json")], body=payload)
+        streamed = await call(api, "GET", "/api/users", b"stream=ndjson")
+        return created, streamed
+
+    created, streamed = run(scenario)
+    assert created[0] == 201
+    assert streamed[0] == 200 and streamed[1]["content-type"].startswith("application/x-ndjson")
+    assert any(json.loads(line)["username"] == "as_new" for line in streamed[2].splitlines())
+
+
+def test_async_routes_record_request_metrics(run):
+    from app.services import metrics
+
+    served = metrics.HTTP_REQUESTS.labels("user_bp", "user_bp.list_users_api", "GET", 200)
+    rejected = metrics.HTTP_REQUESTS.labels("user_bp", "user_bp.list_users_api", "GET", 400)
+    before = served.value, rejected.value
+
+    async def scenario(api):
+        await call(api, "GET", "/api/users", b"limit=1")
+        await call(api, "GET", "/api/users", b"limit=1&sort=password_hash")
+
+    run(scenario)
+    assert (served.value, rejected.value) == (before[0] + 1, before[1] + 1)
@@ -0,0 +1,113 @@
+import json
+
+import pytest
+from werkzeug.security import check_password_hash
+
+from app import db as _db
+from app.models import User
+from app.services import hashing
+
+pytestmark = pytest.mark.unit
+
+PW = "StrongPass1!"
+
+
+@pytest.fixture(autouse=True)
+def _cleanup():
+    yield
+    User.query.filter(User.username.like("bulk_%")).delete(synchronize_session=False)
+    _db.session.commit()
+
+
+def test_bulk_json_array_reports_per_record(client):
+    existing = User(username="bulk_existing", email="bulk_existing@example.com")
+    existing.password_hash = "x"
+    _db.session.add(existing)
+    _db.session.commit()
+
+    payload = [
+        {"username": "bulk_a", "email": "bulk_a@example.com", "password": PW},
+        {"username": "bulk_b", "email": "Bulk_B@example.com", "password": PW, "confirm_password": PW},
+        {"username": "bulk_existing", "email": "bulk_other@example.com", "password": PW},
+        {"username": "bulk_c", "email": "bulk_a@example.com", "password": PW},
+        {"username": "bulk_d", "email": "bulk_d@example.com", "password": "weak"},
+        {"username": "bulk_e", "email": "bulk_e@example.com", "password": PW, "confirm_password": "nope"},
+        "not-an-object",
+    ]
+    rv = client.post("/api/users/bulk", json=payload)
+    assert rv.status_code == 200
+    body = rv.get_json()
+    statuses = [r["status"] for r in body["results"]]
+    assert statuses == ["created", "created", "duplicate", "duplicate", "invalid", "invalid", "invalid"]
+    assert body["summary"] == {"created": 2, "duplicate": 2, "invalid": 3}
+    assert "username" in body["results"][2]["errors"]
+    assert "email" in body["results"][3]["errors"]
+
+    created = User.query.filter_by(username="bulk_b").one()
+    assert created.email == "bulk_b@example.com"
+    assert created.check_password(PW)
+
+
+def test_bulk_non_string_fields_are_invalid_records(client):
+    payload = [
+        {"username": 12345, "email": "bulk_int@example.com", "password": PW},
+        {"username": "bulk_pwint", "email": "bulk_pwint@example.com", "password": 12345678},
+        {"username": "bulk_list", "email": ["bulk_list@example.com"], "password": PW},
+        {"username": "bulk_ok", "email": "bulk_ok@example.com", "password": PW},
+    ]
+    rv = client.post("/api/users/bulk", json=payload)
+    assert rv.status_code == 200
+    body = rv.get_json()
+    assert [r["status"] for r in body["results"]] == ["invalid", "invalid", "invalid", "created"]
+    assert body["results"][0]["errors"] == ["username must be a string."]
+    assert body["results"][1]["errors"] == ["password must be a string."]
+    assert User.query.filter_by(username="bulk_ok").count() == 1
+
+
+def test_create_rejects_non_string_fields(client):
+    rv = client.post("/api/users", json={"username": 7, "email": "bulk_seven@example.com",
+                                         "password": 12345678, "confirm_password": 12345678})
+    assert rv.status_code == 422
+    assert rv.get_json()["errors"] == ["username must be a string.", "password must be a string.",
+                                       "confirm_password must be a string."]
+
+
+def test_bulk_ndjson_body(client, app):
+    lines = "\n".join(
+        json.dumps({"username": f"bulk_nd{i}", "email": f"bulk_nd{i}@example.com", "password": PW})
+        for i in range(5)
+    )
+    app.config["BULK_INSERT_BATCH_SIZE"] = 2
+    try:
+        rv = client.post("/api/users/bulk", data=lines, content_type="application/x-ndjson")
+    finally:
+        app.config["BULK_INSERT_BATCH_SIZE"] = 500
+    assert rv.status_code == 201
+    assert rv.get_json()["summary"]["created"] == 5
+    assert User.query.filter(User.username.like("bulk_nd%")).count() == 5
+
+
+@pytest.mark.parametrize("body", [{}, [], "garbage"])
+def test_bulk_rejects_bad_body(client, body):
+    assert client.post("/api/users/bulk", json=body).status_code == 400
+
+
+def test_bulk_record_limit(client, app):
+    app.config["BULK_MAX_RECORDS"] = 1
+    try:
+        rv = client.post("/api/users/bulk", json=[{}, {}])
+    finally:
+        app.config["BULK_MAX_RECORDS"] = 10000
+    assert rv.status_code == 413
+
+
+def test_hash_many_uses_process_pool(app):
+    previous = app.config.get("PASSWORD_HASH_WORKERS")
+    app.config["PASSWORD_HASH_WORKERS"] = 2
+    try:
+        hashes = hashing.hash_many(["Secret1!", "Secret2!", "Secret3!"])
+        assert hashing.get_executor() is not None
+    finally:
+        hashing.shutdown_executor()
+        app.config["PASSWORD_HASH_WORKERS"] = previous
+    assert [check_password_hash(h, p) for h, p in zip(hashes, ["Secret1!", "Secret2!", "Secret3!"])] == [True] * 3
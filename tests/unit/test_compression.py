@@ -0,0 +1,153 @@
+import gzip
+import json
+import zlib
+
+import pytest
+from flask import Flask, Response, jsonify
+
+from app.services import compression
+
+pytestmark = pytest.mark.unit
+
+ROWS = [{"id": i, "username": f"user_{i:05d}", "email": f"user_{i:05d}@example.com"} for i in range(200)]
+
+
+@pytest.fixture
+def small_app():
+    app = Flask(__name__)
+    app.config.update(COMPRESS_ENABLED=True, COMPRESS_MIN_SIZE=500, COMPRESS_LEVEL=6,
+                      COMPRESS_BROTLI=True, COMPRESS_BR_LEVEL=4)
+
+    @app.route("/big")
+    def big():
+        resp = jsonify(ROWS)
+        resp.set_etag("abc")
+        return resp
+
+    @app.route("/small")
+    def small():
+        return jsonify(ok=True)
+
+    @app.route("/png")
+    def png():
+        return Response(b"\x89PNG" + b"\0" * 2000, mimetype="image/png")
+
+    @app.route("/encoded")
+    def encoded():
+        return Response(gzip.compress(b"x" * 2000), mimetype="text/plain", headers={"Content-Encoding": "gzip"})
+
+    @app.route("/stream")
+    def stream():
+        return Response((json.dumps(row) + "\n" for row in ROWS * 20), mimetype="application/x-ndjson")
+
+    compression.init_app(app)
+    return app
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, None),
+    ("", None),
+    ("identity", None),
+    ("gzip", "gzip"),
+    ("gzip;q=0", None),
+    ("deflate, gzip;q=0.5", "gzip"),
+    ("*", "br" if compression.brotli else "gzip"),
+])
+def test_negotiate(header, expected):
+    assert compression.negotiate(header) == expected
+
+
+def test_negotiate_without_brotli():
+    assert compression.negotiate("br, gzip", use_brotli=False) == "gzip"
+    assert compression.negotiate("br") == ("br" if compression.brotli else None)
+
+
+def test_gzip_round_trip(small_app):
+    client = small_app.test_client()
+    plain = client.get("/big")
+    zipped = client.get("/big", headers={"Accept-Encoding": "gzip"})
+
+    assert "Content-Encoding" not in plain.headers
+    assert plain.headers["Vary"] == "Accept-Encoding"
+    assert zipped.headers["Content-Encoding"] == "gzip"
+    assert zipped.headers["Vary"] == "Accept-Encoding"
+    assert int(zipped.headers["Content-Length"]) == len(zipped.data) < len(plain.data) / 4
+    assert gzip.decompress(zipped.data) == plain.data
+    # the encoded bytes differ, so the strong validator becomes weak
+    assert plain.headers["ETag"] == '"abc"' and zipped.headers["ETag"] == 'W/"abc"'
+
+
+def test_brotli_preferred_when_installed(small_app):
+    brotli = pytest.importorskip("brotli")
+    res = small_app.test_client().get("/big", headers={"Accept-Encoding": "gzip, deflate, br"})
+    assert res.headers["Content-Encoding"] == "br"
+    assert json.loads(brotli.decompress(res.data)) == ROWS
+
+    small_app.config["COMPRESS_BROTLI"] = False
+    res = small_app.test_client().get("/big", headers={"Accept-Encoding": "gzip, deflate, br"})
+    assert res.headers["Content-Encoding"] == "gzip"
+
+
+@pytest.mark.parametrize("path", ["/small", "/png", "/encoded"])
+def test_skipped_responses(small_app, path):
+    res = small_app.test_client().get(path, headers={"Accept-Encoding": "gzip"})
+    original = small_app.test_client().get(path)
+    assert res.headers.get("Content-Encoding") == original.headers.get("Content-Encoding")
+    assert res.data == original.data
+
+
+def test_disabled(small_app):
+    small_app.config["COMPRESS_ENABLED"] = False
+    res = small_app.test_client().get("/big", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in res.headers and "Vary" not in res.headers
+
+
+def test_level_is_tunable(small_app):
+    sizes = {}
+    for level in (1, 9):
+        small_app.config["COMPRESS_LEVEL"] = level
+        sizes[level] = len(small_app.test_client().get("/big", headers={"Accept-Encoding": "gzip"}).data)
+    assert sizes[9] < sizes[1]
+
+
+def test_stream_is_compressed_incrementally(small_app):
+    res = small_app.test_client().get("/stream", headers={"Accept-Encoding": "gzip"}, buffered=False)
+    assert res.headers["Content-Encoding"] == "gzip"
+    assert "Content-Length" not in res.headers
+
+    chunks = list(res.response)
+    res.close()
+    body = "".join(json.dumps(row) + "\n" for row in ROWS * 20).encode()
+    # flushed chunk by chunk: the client can decode most of the body before the stream ends
+    decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    decoded, progress = b"", []
+    for chunk in chunks:
+        decoded += decoder.decompress(chunk)
+        progress.append(len(decoded))
+    assert decoded == body
+    assert len(chunks) > 2 and progress[-2] > len(body) // 2
+
+
+def test_stream_closes_the_source():
+    closed = []
+
+    def source():
+        try:
+            yield b"a" * 10
+            yield b"b" * 10
+        finally:
+            closed.append(True)
+
+    stream = compression.iter_compressed(source(), compression.GzipEncoder())
+    next(stream)
+    stream.close()
+    assert closed == [True]
+
+
+def test_ui_html_is_compressed(client):
+    plain = client.get("/ui")
+    zipped = client.get("/ui", headers={"Accept-Encoding": "gzip"})
+    assert plain.status_code == zipped.status_code == 200
+    assert zipped.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(zipped.data) == plain.data
+    assert "zip;dur=" in zipped.headers["Server-Timing"]
@@ -0,0 +1,91 @@
+import pytest
+
+from app import db as _db
+from app.models import User
+
+pytestmark = pytest.mark.unit
+
+ALL_USERS = "/api/users?limit=500"  # the whole test table fits in one max-size page
+
+
+@pytest.fixture
+def etag_user():
+    user = User(username="etag_user", email="etag_user@example.com")
+    user.password_hash = "x"
+    _db.session.add(user)
+    _db.session.commit()
+    yield user
+    User.query.filter_by(username="etag_user").delete(synchronize_session=False)
+    _db.session.commit()
+
+
+def test_collection_returns_304_for_matching_etag(client, etag_user):
+    first = client.get("/api/users")
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    # ETag only: a delete would not move a Last-Modified taken from max(updated_at)
+    assert "Last-Modified" not in first.headers
+
+    again = client.get("/api/users", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.data == b""
+    assert again.headers["ETag"] == etag
+
+
+def test_collection_etag_changes_when_a_row_is_added(client, etag_user):
+    etag = client.get("/api/users").headers["ETag"]
+    extra = User(username="etag_extra", email="etag_extra@example.com")
+    extra.password_hash = "x"
+    _db.session.add(extra)
+    _db.session.commit()
+    try:
+        rv = client.get("/api/users", headers={"If-None-Match": etag})
+        assert rv.status_code == 200
+        assert rv.headers["ETag"] != etag
+    finally:
+        _db.session.delete(extra)
+        _db.session.commit()
+
+
+def test_collection_ignores_if_modified_since_after_a_delete(client, etag_user):
+    doomed = User(username="etag_doomed", email="etag_doomed@example.com")
+    doomed.password_hash = "x"
+    _db.session.add(doomed)
+    _db.session.commit()
+    # the newest row stays, so max(updated_at) is the same before and after the delete
+    etag_user.email = "etag_user2@example.com"
+    _db.session.commit()
+
+    first = client.get(ALL_USERS)
+    before = {u["username"] for u in first.get_json()["items"]}
+    assert "etag_doomed" in before
+    _db.session.delete(doomed)
+    _db.session.commit()
+
+    since = "Fri, 31 Dec 9999 23:59:59 GMT"
+    rv = client.get(ALL_USERS, headers={"If-Modified-Since": since})
+    assert rv.status_code == 200
+    assert {u["username"] for u in rv.get_json()["items"]} == before - {"etag_doomed"}
+    rv = client.get(ALL_USERS, headers={"If-None-Match": first.headers["ETag"]})
+    assert rv.status_code == 200
+
+
+def test_etag_differs_per_page(client, etag_user):
+    full = client.get("/api/users").headers["ETag"]
+    paged = client.get("/api/users?limit=1").headers["ETag"]
+    assert full != paged
+
+
+def test_user_resource_etag_and_if_modified_since(client, etag_user):
+    rv = client.get(f"/api/users/{etag_user.id}")
+    assert rv.status_code == 200
+    assert rv.get_json()["username"] == "etag_user"
+
+    assert client.get(f"/api/users/{etag_user.id}", headers={"If-None-Match": rv.headers["ETag"]}).status_code == 304
+    assert client.get(
+        f"/api/users/{etag_user.id}", headers={"If-Modified-Since": rv.headers["Last-Modified"]}
+    ).status_code == 304
+
+
+def test_unknown_user_is_404(client):
+    assert client.get("/api/users/987654").status_code == 404
@@ -0,0 +1,94 @@
+import pytest
+from sqlalchemy import event
+
+from app import db as _db
+from app.models import User
+from app.services import users_service
+
+pytestmark = pytest.mark.unit
+
+PASSWORD = "StrongPass1!"
+
+
+@pytest.fixture(autouse=True)
+def _cleanup():
+    yield
+    _db.session.rollback()
+    User.query.filter(User.username.like("cc_%")).delete(synchronize_session=False)
+    _db.session.commit()
+
+
+@pytest.fixture
+def statements():
+    seen = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        seen.append(statement)
+
+    engine = _db.engine
+    event.listen(engine, "before_cursor_execute", _record)
+    yield seen
+    event.remove(engine, "before_cursor_execute", _record)
+
+
+def test_create_user_is_one_insert(statements):
+    user = users_service.create_user("cc_one", "CC_One@example.com", PASSWORD)
+    # no existence pre-check: the INSERT is the only statement
+    sql = [s for s in statements if s.lstrip().upper().startswith(("SELECT", "INSERT"))]
+    assert len(sql) == 1 and sql[0].lstrip().upper().startswith("INSERT")
+    assert user.id is not None and user.email == "cc_one@example.com"
+
+
+@pytest.mark.parametrize("username, email, field", [
+    ("cc_taken", "cc_other@example.com", "username"),
+    ("cc_other", "cc_taken@example.com", "email"),
+    ("cc_other", "CC_TAKEN@example.com", "email"),
+])
+def test_conflicts_name_the_field(username, email, field):
+    users_service.create_user("cc_taken", "cc_taken@example.com", PASSWORD)
+    with pytest.raises(users_service.UserAlreadyExists) as info:
+        users_service.create_user(username, email, PASSWORD)
+    assert set(info.value.errors) == {field}
+    assert User.query.filter(User.username.like("cc_%")).count() == 1
+
+
+def test_api_reports_colliding_field(client):
+    payload = {"username": "cc_api", "email": "cc_api@example.com",
+               "password": PASSWORD, "confirm_password": PASSWORD}
+    assert client.post("/api/users", json=payload).status_code == 201
+
+    res = client.post("/api/users", json={**payload, "username": "cc_api2"})
+    assert res.status_code == 422
+    assert res.get_json()["errors"] == {"email": "Email already exists."}
+
+
+def test_conflict_keeps_the_callers_pending_work():
+    users_service.create_user("cc_taken", "cc_taken@example.com", PASSWORD)
+    keep = User(username="cc_keep", email="cc_keep@example.com", password_hash="x")
+    _db.session.add(keep)
+    _db.session.flush()
+    with pytest.raises(users_service.UserAlreadyExists):
+        users_service.insert_user("cc_taken", "cc_x@example.com", "x")
+    # only the INSERT's savepoint was rolled back
+    _db.session.commit()
+    assert User.query.filter_by(username="cc_keep").count() == 1
+
+
+@pytest.mark.parametrize("message, field", [
+    ("UNIQUE constraint failed: users.email", "email"),
+    ("NOT NULL constraint failed: users.email", None),
+    ("CHECK constraint failed: email_lowercase", None),
+])
+def test_only_unique_violations_are_conflicts(message, field):
+    from sqlalchemy.exc import IntegrityError
+
+    exc = IntegrityError("INSERT INTO users ...", {}, Exception(message))
+    assert users_service._conflict_field(exc) == field
+
+
+def test_postgres_not_null_on_email_is_not_a_conflict():
+    from sqlalchemy.exc import IntegrityError
+
+    orig = type("NotNullViolation", (Exception,), {"pgcode": "23502"})(
+        'null value in column "email" of relation "users" violates not-null constraint')
+    assert users_service._conflict_field(IntegrityError("INSERT ...", {}, orig)) is None
@@ -0,0 +1,67 @@
+import threading
+import time
+
+import pytest
+
+from app.services.dashboard import SingleFlightCache, read_container_id
+
+pytestmark = pytest.mark.unit
+
+
+def test_concurrent_misses_share_one_build():
+    cache = SingleFlightCache(ttl=60)
+    calls = []
+    gate = threading.Event()
+
+    def build():
+        calls.append(1)
+        gate.wait(1)
+        return {"n": len(calls)}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get(build))) for _ in range(10)]
+    for t in threads:
+        t.start()
+    time.sleep(0.05)
+    gate.set()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert results == [{"n": 1}] * 10
+
+
+def test_value_is_rebuilt_after_ttl():
+    cache = SingleFlightCache(ttl=0.05)
+    counter = iter(range(100))
+    first = cache.get(lambda: next(counter))
+    assert cache.get(lambda: next(counter)) == first
+    time.sleep(0.06)
+    assert cache.get(lambda: next(counter)) == first + 1
+
+
+def test_failed_build_is_not_cached():
+    cache = SingleFlightCache(ttl=60)
+
+    def boom():
+        raise RuntimeError("db down")
+
+    with pytest.raises(RuntimeError):
+        cache.get(boom)
+    assert cache.get(lambda: "ok") == "ok"
+
+
+def test_read_container_id(tmp_path):
+    cgroup = tmp_path / "cgroup"
+    cgroup.write_text("12:cpu:/docker/0123456789abcdef0123\n")
+    assert read_container_id(str(cgroup)) == "0123456789ab"
+    assert read_container_id(str(tmp_path / "missing")) == "N/A"
+
+
+def test_dashboard_data_serves_cached_snapshot(client, app):
+    app.extensions["dashboard"]["cache"].clear()
+    first = client.get("/dashboard/data").get_json()
+    second = client.get("/dashboard/data").get_json()
+    assert first["db_status"] == second["db_status"]
+    assert set(first) >= {"env_name", "server_time", "hostname", "db_status",
+                          "container_info", "system_usage", "api_health", "app_health"}
+    assert client.get("/dashboard").status_code == 200
@@ -0,0 +1,148 @@
+import json
+import time
+
+import pytest
+from flask import Flask
+
+from app.services import dashboard_stream
+from app.services.dashboard_stream import SnapshotBroadcaster, TooManySubscribers, diff
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture
+def builds(monkeypatch):
+    calls = {"n": 0}
+
+    def fake_snapshot(app):
+        calls["n"] += 1
+        return {"server_time": str(calls["n"]), "db_status": {"status": "Up"}}
+
+    monkeypatch.setattr(dashboard_stream.dashboard, "get_snapshot", fake_snapshot)
+    return calls
+
+
+@pytest.fixture
+def make_broadcaster(builds):
+    created = []
+
+    def make(**kwargs):
+        broadcaster = SnapshotBroadcaster(Flask(__name__), **kwargs)
+        created.append(broadcaster)
+        return broadcaster
+
+    yield make
+    # let producers exit while get_snapshot is still patched
+    for broadcaster in created:
+        producer = broadcaster._producer
+        if producer is not None:
+            producer.join(timeout=2)
+
+
+def _events(gen, count):
+    """Next `count` named events (skips retry/keepalive lines)."""
+    out = []
+    for chunk in gen:
+        if chunk.startswith("event:"):
+            name, data = chunk.split("\n")[:2]
+            out.append((name[len("event: "):], json.loads(data[len("data: "):])))
+            if len(out) == count:
+                return out
+    return out
+
+
+def test_diff_keeps_only_changed_keys():
+    assert diff(None, {"a": 1}) == {"a": 1}
+    assert diff({"a": 1, "b": 2}, {"a": 1, "b": 3}) == {"b": 3}
+
+
+def test_first_event_is_snapshot_then_deltas(make_broadcaster):
+    broadcaster = make_broadcaster(interval=0.05, max_duration=5)
+    gen = broadcaster.stream()
+    try:
+        (first, snap), (second, delta) = _events(gen, 2)
+    finally:
+        gen.close()
+    assert first == "snapshot" and set(snap) == {"server_time", "db_status"}
+    # db_status did not change, so only server_time is pushed
+    assert second == "delta" and set(delta) == {"server_time"}
+
+
+def test_clients_share_one_producer(make_broadcaster, builds):
+    broadcaster = make_broadcaster(interval=0.2, max_duration=5)
+    gens = [broadcaster.stream() for _ in range(5)]
+    try:
+        for gen in gens:
+            _events(gen, 1)
+        assert broadcaster.subscribers == 5
+        # five clients, but snapshots are built per tick, not per client
+        assert builds["n"] <= 2
+    finally:
+        for gen in gens:
+            gen.close()
+
+
+def test_producer_stops_when_last_client_leaves(make_broadcaster, builds):
+    broadcaster = make_broadcaster(interval=0.05, max_duration=5)
+    gen = broadcaster.stream()
+    _events(gen, 1)
+    gen.close()
+    assert broadcaster.subscribers == 0
+    time.sleep(0.2)
+    assert broadcaster._producer is None
+    settled = builds["n"]
+    time.sleep(0.2)
+    assert builds["n"] == settled
+
+
+def test_stream_ends_after_max_duration(make_broadcaster):
+    broadcaster = make_broadcaster(interval=0.05, max_duration=0.2)
+    start = time.perf_counter()
+    list(broadcaster.stream())
+    assert time.perf_counter() - start < 1
+    assert broadcaster.subscribers == 0
+
+
+def test_client_limit(make_broadcaster):
+    broadcaster = make_broadcaster(interval=0.05, max_clients=1)
+    gen = broadcaster.stream()
+    try:
+        with pytest.raises(TooManySubscribers):
+            broadcaster.stream()
+    finally:
+        gen.close()
+    # closing a stream that was never iterated still releases its slot
+    assert broadcaster.subscribers == 0
+
+
+def test_client_limit_follows_worker_threads(make_broadcaster):
+    assert dashboard_stream.clients_for_threads(2) == 1
+    assert dashboard_stream.clients_for_threads(1) == 0  # sync worker: no streams, the page polls
+    sized = make_broadcaster(headroom=2)
+    sized.fit_to_threads(8)
+    assert sized.max_clients == 6
+    # DASHBOARD_STREAM_MAX_CLIENTS set explicitly: no headroom, limit stays as configured
+    pinned = make_broadcaster(max_clients=20)
+    pinned.fit_to_threads(2)
+    assert pinned.max_clients == 20
+
+
+def test_stream_endpoint(client, app, monkeypatch):
+    broadcaster = app.extensions[dashboard_stream.EXTENSION_KEY]
+    monkeypatch.setattr(broadcaster, "interval", 0.05)
+    monkeypatch.setattr(broadcaster, "max_duration", 0.3)
+    res = client.get("/dashboard/stream")
+    assert res.status_code == 200
+    assert res.mimetype == "text/event-stream"
+    assert res.headers["Cache-Control"] == "no-cache"
+    body = res.get_data(as_text=True)
+    assert "event: snapshot" in body
+    assert '"db_status"' in body
+    assert broadcaster.subscribers == 0
+
+
+def test_stream_endpoint_rejects_past_client_limit(client, app, monkeypatch):
+    broadcaster = app.extensions[dashboard_stream.EXTENSION_KEY]
+    monkeypatch.setattr(broadcaster, "max_clients", 0)
+    res = client.get("/dashboard/stream")
+    assert res.status_code == 503
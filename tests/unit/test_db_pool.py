@@ -0,0 +1,85 @@
+import pytest
+from flask import Flask
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+
+import config
+from app.services import db_pool
+from app.services.db_pool import InstrumentedQueuePool, pool_stats
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture
+def engine(tmp_path):
+    eng = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool, pool_size=1, max_overflow=0, pool_timeout=0.1,
+    )
+    yield eng
+    eng.dispose()
+
+
+def test_engine_options_env_overrides_class_defaults(monkeypatch):
+    monkeypatch.setenv("DB_POOL_SIZE", "7")
+    monkeypatch.setenv("DB_POOL_PRE_PING", "false")
+    opts = config.engine_options(pool_size=3, max_overflow=4)
+    assert opts["pool_size"] == 7
+    assert opts["max_overflow"] == 4
+    assert opts["pool_pre_ping"] is False
+
+
+def test_configure_adapts_options_to_uri():
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = config.engine_options()
+
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+    db_pool.configure(app)
+    assert "pool_size" not in app.config["SQLALCHEMY_ENGINE_OPTIONS"]
+    assert "poolclass" not in app.config["SQLALCHEMY_ENGINE_OPTIONS"]
+
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = config.engine_options()
+    app.config["SQLALCHEMY_DATABASE_URI"] = "postgresql://u:p@db/app"
+    db_pool.configure(app)
+    assert app.config["SQLALCHEMY_ENGINE_OPTIONS"]["poolclass"] is InstrumentedQueuePool
+    assert app.config["SQLALCHEMY_ENGINE_OPTIONS"]["pool_size"] == 5
+
+
+def test_stats_track_checkouts_connects_and_timeouts(engine):
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        busy = pool_stats(engine)
+        assert busy["checked_out"] == 1
+        with pytest.raises(PoolTimeout):
+            engine.connect()
+
+    stats = pool_stats(engine)
+    assert stats["pool"] == "InstrumentedQueuePool"
+    assert stats["checked_out"] == 0
+    assert stats["checkouts"] == 1
+    assert stats["connects"] == 1
+    assert stats["timeouts"] == 1
+    assert stats["wait_ms_max"] >= stats["wait_ms_avg"] >= 0
+
+
+def test_stats_survive_dispose(engine):
+    with engine.connect():
+        pass
+    engine.dispose()
+    with engine.connect():
+        pass
+    stats = pool_stats(engine)
+    assert stats["checkouts"] == 2
+    assert stats["connects"] == 2
+
+
+def test_ready_reports_pool(client):
+    res = client.get("/ready")
+    assert res.status_code == 200
+    body = res.get_json()
+    assert body["status"] == "ready"
+    assert "pool" in body["pool"]
+
+
+def test_dashboard_data_reports_pool(client):
+    assert "pool" in client.get("/dashboard/data").get_json()["db_pool"]
@@ -0,0 +1,194 @@
+import time
+
+import pytest
+from sqlalchemy import insert, select
+from sqlalchemy.exc import OperationalError
+
+from app import create_app, db as _db
+from app.models import User
+from app.services import db_replicas
+from config import build_replica_binds
+
+pytestmark = pytest.mark.unit
+
+PASSWORD = "StrongPass1!"
+
+
+def _row(username):
+    return {"username": username, "email": f"{username}@example.com", "password_hash": "x",
+            "is_root": False, "force_password_change": False}
+
+
+@pytest.fixture
+def make_app(tmp_path, monkeypatch):
+    """make_app(replicas=1, schema=True) -> app on a primary SQLite file plus replica files."""
+    apps = []
+
+    def _make(replicas=1, schema=True, replica_dir=None, **config):
+        primary = f"sqlite:///{tmp_path / 'primary.db'}"
+        replica_dir = replica_dir or tmp_path
+        urls = [f"sqlite:///{replica_dir / f'replica{i}.db'}" for i in range(replicas)]
+        monkeypatch.setenv("DATABASE_URL", primary)
+        monkeypatch.setenv("DATABASE_REPLICA_URLS", ",".join(urls))
+        app = create_app()
+        app.config.update(TESTING=True, **config)
+        router = app.extensions[db_replicas.EXTENSION_KEY]
+        router.eject_seconds = app.config["REPLICA_EJECT_SECONDS"]
+        with app.app_context():
+            _db.create_all()
+            _db.session.execute(insert(User), [_row("rr_primary")])
+            _db.session.commit()
+            if schema:
+                for key in sorted(router.engines):
+                    engine = router.engines[key]
+                    _db.metadata.create_all(engine)
+                    with engine.begin() as conn:
+                        conn.execute(insert(User), [_row(f"rr_{key}")])
+            _db.session.remove()
+        apps.append(app)
+        return app
+
+    yield _make
+
+    for app in apps:
+        with app.app_context():
+            _db.session.remove()
+            for engine in _db.engines.values():
+                engine.dispose()
+
+
+def _usernames(response):
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return {u["username"] for u in response.get_json()["items"]}
+
+
+def test_build_replica_binds(monkeypatch):
+    monkeypatch.setenv("DATABASE_REPLICA_URLS", "sqlite:///a.db, sqlite:///b.db")
+    assert build_replica_binds() == {"replica_0": "sqlite:///a.db", "replica_1": "sqlite:///b.db"}
+
+    monkeypatch.delenv("DATABASE_REPLICA_URLS")
+    monkeypatch.setenv("POSTGRES_USER", "u")
+    monkeypatch.setenv("POSTGRES_PASSWORD", "p")
+    monkeypatch.setenv("POSTGRES_DB", "app")
+    monkeypatch.setenv("POSTGRES_PORT", "5432")
+    monkeypatch.setenv("POSTGRES_REPLICA_HOSTS", "r1,r2:6432")
+    assert build_replica_binds() == {
+        "replica_0": "postgresql://u:p@r1:5432/app",
+        "replica_1": "postgresql://u:p@r2:6432/app",
+    }
+
+
+def test_no_replicas_is_a_noop(app):
+    assert db_replicas.EXTENSION_KEY not in app.extensions
+    assert "replicas" not in app.test_client().get("/ready").get_json()
+
+
+def test_reads_go_to_the_replica(make_app):
+    app = make_app()
+    client = app.test_client()
+
+    assert _usernames(client.get("/api/users")) == {"rr_replica_0"}
+    ready = client.get("/ready").get_json()
+    assert ready["replicas"]["replica_0"]["healthy"] is True
+    assert ready["replicas"]["replica_0"]["reads"] > 0
+
+
+def test_writes_go_to_the_primary_and_stick(make_app):
+    app = make_app()
+    client = app.test_client()
+
+    created = client.post("/api/users", json={"username": "rr_new", "email": "rr_new@example.com",
+                                              "password": PASSWORD, "confirm_password": PASSWORD})
+    assert created.status_code == 201
+    assert client.get_cookie("db_primary_until") is not None
+
+    # inside the sticky window the client reads its own write from the primary
+    assert _usernames(client.get("/api/users")) == {"rr_primary", "rr_new"}
+
+    client.delete_cookie("db_primary_until")
+    assert _usernames(client.get("/api/users")) == {"rr_replica_0"}
+
+
+def test_session_reads_from_primary_after_a_write(make_app):
+    app = make_app()
+    with app.app_context():
+        assert _db.session.scalars(select(User.username)).all() == ["rr_replica_0"]
+        _db.session.add(User(**_row("rr_flushed")))
+        _db.session.flush()
+        assert set(_db.session.scalars(select(User.username))) == {"rr_primary", "rr_flushed"}
+        _db.session.rollback()
+        _db.session.remove()
+
+
+def test_non_get_requests_use_the_primary(make_app):
+    app = make_app()
+    seen = []
+
+    @app.route("/_rr_probe", methods=["GET", "POST"])
+    def probe():
+        seen.append(_db.session.scalars(select(User.username)).all())
+        return "", 204
+
+    client = app.test_client()
+    client.get("/_rr_probe")
+    client.post("/_rr_probe")
+    assert seen == [["rr_replica_0"], ["rr_primary"]]
+    # nothing was written, so no sticky cookie
+    assert client.get_cookie("db_primary_until") is None
+
+
+def test_round_robin_across_replicas(make_app):
+    app = make_app(replicas=2)
+    with app.app_context():
+        names = [_db.session.scalars(select(User.username)).one() for _ in range(4)]
+        _db.session.remove()
+    assert names == ["rr_replica_0", "rr_replica_1", "rr_replica_0", "rr_replica_1"]
+
+
+def test_unreachable_replica_is_ejected_and_readmitted(make_app, tmp_path):
+    down = tmp_path / "down"  # SQLite cannot open a file in a missing directory
+    app = make_app(schema=False, replica_dir=down, REPLICA_EJECT_SECONDS=0.2)
+    router = app.extensions[db_replicas.EXTENSION_KEY]
+
+    with app.app_context():
+        with pytest.raises(OperationalError):
+            _db.session.scalars(select(User.username)).all()
+        _db.session.rollback()
+        assert router.status()["replica_0"]["healthy"] is False
+        assert _db.session.scalars(select(User.username)).all() == ["rr_primary"]
+        _db.session.remove()
+
+        down.mkdir()
+        _db.metadata.create_all(router.engines["replica_0"])
+        time.sleep(0.25)
+        # the SELECT 1 probe passes, so the replica takes reads again
+        assert _db.session.scalars(select(User.username)).all() == []
+        assert router.status()["replica_0"]["healthy"] is True
+        _db.session.remove()
+
+
+def test_statement_errors_do_not_eject(make_app):
+    app = make_app(schema=False)
+    router = app.extensions[db_replicas.EXTENSION_KEY]
+
+    with app.app_context():
+        # reachable replica, failing statement (no such table): like a statement timeout
+        with pytest.raises(OperationalError):
+            _db.session.scalars(select(User.username)).all()
+        _db.session.rollback()
+        assert router.status()["replica_0"]["healthy"] is True
+        _db.session.remove()
+
+
+@pytest.mark.parametrize("pgcode, ejected", [
+    ("08006", True),   # connection_failure
+    ("57P01", True),   # admin_shutdown
+    ("57014", False),  # query_canceled (statement_timeout)
+    ("55P03", False),  # lock_not_available (lock_timeout)
+])
+def test_only_connection_class_sqlstates_eject(pgcode, ejected):
+    from types import SimpleNamespace
+
+    error = type("PgError", (Exception,), {"pgcode": pgcode})("boom")
+    context = SimpleNamespace(is_disconnect=False, original_exception=error)
+    assert db_replicas.is_connection_failure(context) is ejected
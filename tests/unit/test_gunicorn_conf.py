@@ -0,0 +1,80 @@
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+pytestmark = pytest.mark.unit
+
+CONF_PATH = Path(__file__).resolve().parents[2] / "gunicorn.conf.py"
+
+
+@pytest.fixture(scope="module")
+def conf():
+    spec = importlib.util.spec_from_file_location("gunicorn_conf", CONF_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _write(root, name, value):
+    path = root / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(value + "\n")
+
+
+def test_cgroup_v2_limits(conf, tmp_path):
+    _write(tmp_path, "cpu.max", "150000 100000")
+    _write(tmp_path, "memory.max", str(512 * 1024 * 1024))
+    assert conf.cgroup_cpu_limit(tmp_path) == 1.5
+    assert conf.cgroup_memory_limit(tmp_path) == 512 * 1024 * 1024
+
+
+def test_cgroup_v2_unlimited(conf, tmp_path):
+    _write(tmp_path, "cpu.max", "max 100000")
+    _write(tmp_path, "memory.max", "max")
+    assert conf.cgroup_cpu_limit(tmp_path) is None
+    assert conf.cgroup_memory_limit(tmp_path) is None
+
+
+def test_cgroup_v1_limits(conf, tmp_path):
+    _write(tmp_path, "cpu/cpu.cfs_quota_us", "200000")
+    _write(tmp_path, "cpu/cpu.cfs_period_us", "100000")
+    _write(tmp_path, "memory/memory.limit_in_bytes", str(conf.UNLIMITED_MEMORY))
+    assert conf.cgroup_cpu_limit(tmp_path) == 2
+    assert conf.cgroup_memory_limit(tmp_path) is None
+
+
+def test_workers_follow_cpu_quota_and_memory(conf, tmp_path, monkeypatch):
+    monkeypatch.setattr(conf.os, "sched_getaffinity", lambda pid: set(range(16)), raising=False)
+    _write(tmp_path, "cpu.max", "150000 100000")
+    assert conf.default_workers(tmp_path) == 5  # 2 * ceil(1.5) + 1
+
+    _write(tmp_path, "memory.max", str(300 * 1024 * 1024))
+    assert conf.default_workers(tmp_path, worker_memory_mb=150) == 2
+
+    _write(tmp_path, "memory.max", str(64 * 1024 * 1024))
+    assert conf.default_workers(tmp_path, worker_memory_mb=150) == 1
+
+
+def test_post_fork_resets_inherited_locks(conf, tmp_path, monkeypatch):
+    from types import SimpleNamespace
+
+    from app import create_app
+    from app.services import dashboard_stream, system_metrics, timeseries
+
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'fork.db'}")
+    app = create_app()
+    sampler = app.extensions[system_metrics.EXTENSION_KEY]
+    store = timeseries.get_store(app)
+    assert not sampler.running()  # create_app() starts no threads
+
+    # a lock some master thread held at fork time
+    store._lock.acquire()
+    server = SimpleNamespace(cfg=SimpleNamespace(preload_app=True, threads=4),
+                             app=SimpleNamespace(wsgi=lambda: app))
+    conf.post_fork(server, worker=None)
+
+    store.incr("requests")  # would block forever on the inherited lock
+    assert not store._lock.locked()
+    # SSE clients sized from the worker's threads, one kept free for requests
+    assert app.extensions[dashboard_stream.EXTENSION_KEY].max_clients == 3
@@ -0,0 +1,122 @@
+import pytest
+
+from app.models import User
+from app.services import hashing
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture
+def pool_workers(app):
+    previous = app.config.get("PASSWORD_HASH_WORKERS")
+
+    def _set(n):
+        app.config["PASSWORD_HASH_WORKERS"] = n
+
+    yield _set
+    hashing.shutdown_executor()
+    app.config["PASSWORD_HASH_WORKERS"] = previous
+
+
+def test_inline_when_no_workers(pool_workers):
+    pool_workers(0)
+    assert hashing.get_executor() is None
+    h = hashing.hash_password("Secret123!")
+    assert hashing.check_password(h, "Secret123!")
+    assert not hashing.check_password(h, "wrong")
+
+
+def test_model_hashes_and_verifies_on_pool(pool_workers):
+    pool_workers(1)
+    u = User(username="pooled", email="pooled@example.com")
+    u.set_password("Secret123!")
+    assert hashing.get_executor() is not None
+    assert u.check_password("Secret123!")
+    assert not u.check_password("Secret124!")
+
+
+def test_timeout_raises_busy(app, pool_workers, monkeypatch):
+    import time
+
+    pool_workers(1)
+    monkeypatch.setitem(app.config, "PASSWORD_HASH_TIMEOUT", 0.2)
+    with pytest.raises(hashing.HashingBusy) as busy:
+        hashing._run(time.sleep, 2)
+    assert busy.value.retry_after == 1
+
+
+def test_busy_pool_answers_503_with_retry_after(client, monkeypatch):
+    def saturated(password):
+        raise hashing.HashingBusy(2.5)
+
+    monkeypatch.setattr(hashing, "hash_password", saturated)
+    res = client.post("/api/users", json={"username": "busy_user", "email": "busy@example.com",
+                                          "password": "Secret123!", "confirm_password": "Secret123!"})
+    assert res.status_code == 503
+    assert res.headers["Retry-After"] == "3"
+
+
+
+@pytest.fixture
+def hash_method(app):
+    previous = app.config.get("PASSWORD_HASH_METHOD")
+
+    def _set(method):
+        app.config["PASSWORD_HASH_METHOD"] = method
+
+    yield _set
+    app.config["PASSWORD_HASH_METHOD"] = previous
+
+
+def test_configured_method_is_used(hash_method):
+    hash_method("pbkdf2:sha256:1200")
+    assert hashing.hash_password("Secret123!").startswith("pbkdf2:sha256:1200$")
+
+
+def test_check_password_rehashes_outdated_hash(hash_method):
+    hash_method("pbkdf2:sha256:1100")
+    u = User(username="legacy", email="legacy@example.com")
+    u.set_password("Secret123!")
+    legacy_hash = u.password_hash
+
+    hash_method("pbkdf2:sha256:1300")
+    assert not u.check_password("wrong")
+    assert u.password_hash == legacy_hash  # failed checks never touch the hash
+    assert u.check_password("Secret123!")
+    assert u.password_hash.startswith("pbkdf2:sha256:1300$")
+    assert not hashing.needs_rehash(u.password_hash)
+
+
+def test_rehash_can_be_disabled(app, hash_method):
+    hash_method("pbkdf2:sha256:1100")
+    old = hashing.hash_password("Secret123!")
+    hash_method("pbkdf2:sha256:1300")
+    app.config["PASSWORD_REHASH_ON_VERIFY"] = False
+    try:
+        assert hashing.verify_and_update(old, "Secret123!") == (True, None)
+    finally:
+        app.config["PASSWORD_REHASH_ON_VERIFY"] = True
+
+
+def test_authenticate_stores_upgraded_hash(app, hash_method):
+    from app import db
+    from app.services import users_service
+
+    hash_method("pbkdf2:sha256:1100")
+    u = User(username="rehash_me", email="rehash_me@example.com")
+    u.set_password("Secret123!")
+    db.session.add(u)
+    db.session.commit()
+    legacy_hash = u.password_hash
+    try:
+        hash_method("pbkdf2:sha256:1300")
+        assert users_service.authenticate("rehash_me", "wrong") is None
+        assert users_service.authenticate("rehash_me", "Secret123!") is not None
+        db.session.expire_all()
+        stored = db.session.get(User, u.id).password_hash
+        assert stored != legacy_hash
+        assert stored.startswith("pbkdf2:sha256:1300$")
+        assert users_service.verify_password(stored, "Secret123!")
+    finally:
+        db.session.delete(db.session.get(User, u.id))
+        db.session.commit()
\ No newline at end of file
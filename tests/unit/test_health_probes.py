@@ -0,0 +1,80 @@
+import time
+
+import pytest
+from flask import Flask
+
+from app.services.health_probes import ProbeEngine
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture
+def tiny_app():
+    tiny = Flask(__name__)
+    calls = {"n": 0}
+
+    @tiny.route("/ok")
+    def ok():
+        calls["n"] += 1
+        return "ok"
+
+    @tiny.route("/slow")
+    def slow():
+        time.sleep(0.5)
+        return "late"
+
+    @tiny.route("/boom")
+    def boom():
+        return "nope", 503
+
+    tiny.calls = calls
+    return tiny
+
+
+def test_inprocess_probes_report_status(tiny_app):
+    engine = ProbeEngine(tiny_app, ["/ok", "/boom", "/missing"], deadline=1.0, ttl=0)
+    assert engine.run() == {"/ok": "Healthy", "/boom": "Error 503", "/missing": "Error 404"}
+
+
+def test_probes_share_one_deadline(tiny_app):
+    engine = ProbeEngine(tiny_app, ["/ok", "/slow", "/slow"], deadline=0.1, ttl=0)
+    start = time.perf_counter()
+    results = engine.run()
+    assert time.perf_counter() - start < 0.4
+    assert results["/ok"] == "Healthy"
+    assert results["/slow"] == "Down (timeout)"
+
+
+def test_results_are_cached_for_ttl(tiny_app):
+    engine = ProbeEngine(tiny_app, ["/ok"], ttl=60)
+    engine.results()
+    engine.results()
+    assert tiny_app.calls["n"] == 1
+
+
+def test_http_mode_reports_connection_errors(tiny_app):
+    engine = ProbeEngine(tiny_app, ["/ok"], mode="http", base_url="http://127.0.0.1:9", deadline=1.0, ttl=0)
+    assert engine.run()["/ok"].startswith("Down")
+
+
+def test_dashboard_data_uses_inprocess_probes(client):
+    body = client.get("/dashboard/data").get_json()
+    assert body["api_health"]["/"] == "Healthy"
+
+
+def test_probe_requests_are_left_out_of_traffic_metrics(app, monkeypatch):
+    from app.services import metrics, timeseries
+
+    served = metrics.HTTP_REQUESTS.labels("health", "health.healthz", "GET", 200)
+    before = served.value
+    counted = []
+    monkeypatch.setattr(timeseries.get_store(app), "incr", lambda name, *a, **kw: counted.append(name))
+
+    assert ProbeEngine(app, ["/healthz"], ttl=0).run() == {"/healthz": "Healthy"}
+    assert served.value == before
+    assert counted == []
+
+    with app.test_client() as client:
+        client.get("/healthz")
+    assert served.value == before + 1
+    assert "requests" in counted
@@ -0,0 +1,106 @@
+import multiprocessing
+import os
+import re
+
+import pytest
+
+from app.services import metrics
+from app.services.metrics import Counter, Histogram, Registry, SnapshotWriter, _Metric
+
+pytestmark = pytest.mark.unit
+
+
+def _sample(text, name, **labels):
+    """Value of one exposition line matching name and (a subset of) labels, or None."""
+    for line in text.splitlines():
+        if line.startswith("#") or not line.startswith(name + "{"):
+            continue
+        if all(f'{k}="{v}"' in line for k, v in labels.items()):
+            return float(line.rsplit(" ", 1)[1])
+    return None
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    hist = registry.register(Histogram("h_seconds", "help text", ("route",), buckets=(0.1, 1.0)))
+    child = hist.labels("x")
+    for v in (0.05, 0.1, 0.5, 3):
+        child.observe(v)
+    text = registry.render()
+    assert "# TYPE h_seconds histogram" in text
+    assert _sample(text, "h_seconds_bucket", route="x", le="0.1") == 2
+    assert _sample(text, "h_seconds_bucket", route="x", le="1") == 3
+    assert _sample(text, "h_seconds_bucket", route="x", le="+Inf") == 4
+    assert _sample(text, "h_seconds_count", route="x") == 4
+    assert _sample(text, "h_seconds_sum", route="x") == pytest.approx(3.65)
+
+
+def test_counter_children_are_reused_and_labels_escaped():
+    registry = Registry()
+    counter = registry.register(Counter("c_total", "help", ("path",)))
+    assert counter.labels('a"b') is counter.labels('a"b')
+    counter.labels('a"b').inc()
+    counter.labels('a"b').inc(2)
+    assert 'c_total{path="a\\"b"} 3' in registry.render()
+
+
+def test_metrics_endpoint_reports_routes_and_queries(client):
+    client.get("/api/users")
+    client.get("/does-not-exist")
+    res = client.get("/metrics")
+    assert res.status_code == 200
+    assert res.content_type.startswith("text/plain; version=0.0.4")
+    text = res.get_data(as_text=True)
+
+    assert _sample(text, "http_requests_total", blueprint="user_bp",
+                   endpoint="user_bp.list_users_api", method="GET", status="200") >= 1
+    # unknown URLs collapse into one series instead of one per path
+    assert _sample(text, "http_requests_total", endpoint="unmatched", status="404") >= 1
+    assert _sample(text, "http_request_duration_seconds_count", endpoint="user_bp.list_users_api") >= 1
+    assert _sample(text, "db_queries_total", operation="SELECT") >= 1
+    assert _sample(text, "db_queries_per_request_count", endpoint="user_bp.list_users_api") >= 1
+    assert not re.search(r"does-not-exist", text)
+
+
+def test_metric_base_class_is_abstract():
+    with pytest.raises(TypeError):
+        _Metric("m", "help")
+
+
+def _worker_registry():
+    registry = Registry()
+    counter = registry.register(Counter("w_total", "help", ("route",)))
+    hist = registry.register(Histogram("w_seconds", "help", ("route",), buckets=(1.0,)))
+    return registry, counter, hist
+
+
+registry, counter, hist = _worker_registry()
+
+
+def _record_and_flush(directory):
+    # runs in a forked child: the module-level metrics below are its own copy
+    counter.labels("x").inc(2)
+    hist.labels("x").observe(5)
+    SnapshotWriter(registry, directory).flush()
+
+
+def test_scrape_merges_other_processes_and_archives_exited_ones(tmp_path):
+    directory = str(tmp_path)
+    child = multiprocessing.get_context("fork").Process(target=_record_and_flush, args=(directory,))
+    child.start()
+    child.join(10)
+    assert child.exitcode == 0
+
+    before = counter.labels("x").value
+    counter.labels("x").inc()
+    hist.labels("x").observe(0.5)
+    writer = SnapshotWriter(registry, directory)
+    text = registry.render(writer.collect())
+    assert _sample(text, "w_total", route="x") == before + 3
+    assert _sample(text, "w_seconds_bucket", route="x", le="1") >= 1
+    assert _sample(text, "w_seconds_count", route="x") == sum(hist.labels("x").snapshot()[0]) + 1
+
+    # the exited worker's numbers move into the archive; the total does not drop
+    metrics.archive_process(directory, child.pid, registry)
+    assert not os.path.exists(writer.path(child.pid))
+    assert _sample(registry.render(writer.collect()), "w_total", route="x") == before + 3
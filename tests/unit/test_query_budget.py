@@ -0,0 +1,65 @@
+import logging
+
+import pytest
+from sqlalchemy import text
+
+from app import db as _db
+from app.services import query_budget
+
+pytestmark = pytest.mark.unit
+
+
+def test_headers_report_statement_count_and_time(client):
+    res = client.get("/api/users")
+    assert int(res.headers[query_budget.COUNT_HEADER]) >= 1
+    assert float(res.headers[query_budget.TIME_HEADER]) >= 0
+
+    res = client.get("/healthz")
+    assert res.headers[query_budget.COUNT_HEADER] == "0"
+
+
+def test_headers_can_be_disabled(app, client, monkeypatch):
+    monkeypatch.setitem(app.config, "QUERY_HEADERS_ENABLED", False)
+    assert query_budget.COUNT_HEADER not in client.get("/api/users").headers
+
+
+def test_budget_overrun_is_logged(app, client, monkeypatch, caplog):
+    monkeypatch.setitem(app.config, "QUERY_BUDGET", 0)
+    with caplog.at_level(logging.WARNING, logger=query_budget.__name__):
+        client.get("/api/users")
+    messages = [r.getMessage() for r in caplog.records if r.name == query_budget.__name__]
+    assert len(messages) == 1
+    assert "user_bp.list_users_api" in messages[0] and "budget 0" in messages[0]
+
+
+def test_one_timer_feeds_headers_server_timing_and_metrics(app, client):
+    from app.services import metrics, query_timing
+
+    with app.app_context():
+        engine = _db.engine
+    # metrics, request_timing and query_budget share one listener pair per engine
+    assert len(list(engine.dispatch.before_cursor_execute)) == 1
+    assert list(engine.dispatch.after_cursor_execute) == [query_timing._after_cursor_execute]
+
+    before = metrics.DB_QUERIES.labels("SELECT").value
+    res = client.get("/api/users")
+    count = int(res.headers[query_budget.COUNT_HEADER])
+    assert count >= 1
+    assert f"Database ({count})" in res.headers["Server-Timing"]
+    assert metrics.DB_QUERIES.labels("SELECT").value - before == count
+
+
+def test_assert_max_queries_lists_statements_on_failure(assert_max_queries):
+    with pytest.raises(AssertionError, match=r"at most 1 queries, 2 executed:\n  1\. SELECT 1"):
+        with assert_max_queries(1):
+            _db.session.execute(text("SELECT 1"))
+            _db.session.execute(text("SELECT 2"))
+    _db.session.rollback()
+
+
+def test_user_table_error_render_is_bounded(client, assert_max_queries):
+    # the /api/users form re-renders the paged table on validation errors
+    with assert_max_queries(2) as counter:
+        res = client.post("/api/users", data={"username": "", "email": "", "password": ""})
+    assert res.status_code == 422
+    assert counter.count >= 1
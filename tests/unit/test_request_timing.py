@@ -0,0 +1,76 @@
+import json
+import logging
+
+import pytest
+
+from app import db as _db
+from app.models import User
+from app.services import request_timing
+
+pytestmark = pytest.mark.unit
+
+
+def _server_timing(res):
+    """{metric: (dur, desc)} parsed from the Server-Timing header."""
+    metrics = {}
+    for part in res.headers["Server-Timing"].split(", "):
+        name, *params = part.split(";")
+        values = dict(p.split("=", 1) for p in params)
+        metrics[name] = (float(values["dur"]), values.get("desc", "").strip('"'))
+    return metrics
+
+
+@pytest.fixture(autouse=True)
+def _cleanup():
+    yield
+    _db.session.rollback()
+    User.query.filter(User.username.like("rt_%")).delete(synchronize_session=False)
+    _db.session.commit()
+
+
+def test_header_reports_db_and_template_phases(client):
+    metrics = _server_timing(client.get("/ui"))
+    assert "db" in metrics and "tpl" in metrics
+    assert "hash" not in metrics  # phases that did not run are left out
+    assert metrics["total"][0] >= metrics["tpl"][0] >= 0
+    assert metrics["db"][1].startswith("Database (")
+
+
+def test_header_reports_hashing(client):
+    res = client.post("/api/users", json={
+        "username": "rt_hash", "email": "rt_hash@example.com",
+        "password": "StrongPass1!", "confirm_password": "StrongPass1!",
+    })
+    assert res.status_code == 201
+    metrics = _server_timing(res)
+    assert metrics["hash"][1] == "Password hashing (1)"
+
+
+def test_header_can_be_disabled(app, client, monkeypatch):
+    monkeypatch.setitem(app.config, "SERVER_TIMING_ENABLED", False)
+    res = client.get("/healthz")
+    assert res.status_code == 200
+    assert "Server-Timing" not in res.headers
+
+
+def test_slow_request_is_logged_as_json(app, client, monkeypatch, caplog):
+    monkeypatch.setitem(app.config, "SLOW_REQUEST_MS", 0)
+    with caplog.at_level(logging.WARNING, logger=request_timing.__name__):
+        client.get("/ui")
+    record = next(r for r in caplog.records if r.name == request_timing.__name__)
+    entry = json.loads(record.getMessage().split(" ", 2)[2])
+    assert entry == record.timing
+    assert entry["event"] == "slow_request"
+    assert entry["path"] == "/ui" and entry["status"] == 200
+    assert entry["db_count"] >= 1 and entry["tpl_count"] == 1
+
+
+def test_fast_request_is_not_logged(client, caplog):
+    with caplog.at_level(logging.WARNING, logger=request_timing.__name__):
+        assert client.get("/healthz").status_code == 200
+    assert not [r for r in caplog.records if r.name == request_timing.__name__]
+
+
+def test_phase_outside_request_is_a_noop():
+    with request_timing.phase("hash"):
+        pass
@@ -0,0 +1,84 @@
+import pytest
+from sqlalchemy import delete, insert
+
+from app import db as _db
+from app.models import RowCounter, User
+from app.services import row_counts
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture(autouse=True)
+def _cleanup():
+    yield
+    User.query.filter(User.username.like("count_%")).delete(synchronize_session=False)
+    _db.session.commit()
+
+
+def _exact():
+    return row_counts.count_rows("users", "exact")[0]
+
+
+@pytest.mark.parametrize("mode", ["exact", "estimated", "counter"])
+def test_every_mode_matches_exact_count_on_sqlite(mode):
+    count, source = row_counts.count_rows("users", mode)
+    assert count == _exact()
+    # SQLite has no planner estimate, so "estimated" reports its counter fallback
+    assert source == ("counter" if mode == "estimated" else mode)
+
+
+def test_missing_counter_falls_back_to_a_cached_exact_count(app, monkeypatch):
+    monkeypatch.setitem(app.config, "DASHBOARD_ROW_COUNT_CACHE_TTL", 60)
+    monkeypatch.setattr(row_counts, "_exact_cache", {})
+    _db.session.execute(delete(RowCounter).where(RowCounter.table_name == "users"))
+    _db.session.commit()
+    try:
+        count, source = row_counts.count_rows("users", "estimated")
+        assert (count, source) == (_exact(), "exact")
+
+        u = User(username="count_cached", email="count_cached@example.com")
+        u.password_hash = "x"
+        _db.session.add(u)
+        _db.session.commit()
+        # served from the cache: no second COUNT(*) within the TTL
+        assert row_counts.count_rows("users", "counter") == (count, "exact")
+        monkeypatch.setitem(app.config, "DASHBOARD_ROW_COUNT_CACHE_TTL", 0)
+        assert row_counts.count_rows("users", "counter") == (count + 1, "exact")
+    finally:
+        # reseed the trigger-maintained counter for the other tests
+        _db.session.execute(insert(RowCounter), [{"table_name": "users", "row_count": _exact()}])
+        _db.session.commit()
+
+
+def test_counter_follows_orm_and_bulk_writes():
+    before = row_counts.count_rows("users", "counter")[0]
+
+    u = User(username="count_orm", email="count_orm@example.com")
+    u.password_hash = "x"
+    _db.session.add(u)
+    _db.session.commit()
+    _db.session.execute(insert(User), [
+        {"username": f"count_bulk{i}", "email": f"count_bulk{i}@example.com", "password_hash": "x"}
+        for i in range(3)
+    ])
+    _db.session.commit()
+    assert row_counts.count_rows("users", "counter")[0] == before + 4
+
+    _db.session.execute(delete(User).where(User.username.like("count_bulk%")))
+    _db.session.commit()
+    assert row_counts.count_rows("users", "counter") == (before + 1, "counter")
+    assert row_counts.count_rows("users", "counter")[0] == _exact()
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        row_counts.count_rows("users", "psychic")
+
+
+def test_dashboard_reports_count_source(client, app, monkeypatch):
+    monkeypatch.setitem(app.config, "DASHBOARD_ROW_COUNT_MODE", "counter")
+    app.extensions["dashboard"]["cache"].clear()
+    db_status = client.get("/dashboard/data").get_json()["db_status"]
+    assert db_status["status"] == "Up"
+    assert db_status["rows_source"] == "counter"
+    assert db_status["rows"] == _exact()
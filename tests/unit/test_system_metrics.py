@@ -0,0 +1,53 @@
+import time
+
+import pytest
+from flask import Flask
+
+from app.services import system_metrics
+from app.services.system_metrics import SystemSampler
+
+pytestmark = pytest.mark.unit
+
+
+def test_sampler_fills_bounded_ring_buffer():
+    sampler = SystemSampler(interval=0.01, history=3)
+    sampler.start()
+    try:
+        deadline = time.time() + 2
+        while len(sampler.history()) < 3 and time.time() < deadline:
+            time.sleep(0.02)
+        time.sleep(0.05)
+    finally:
+        sampler.stop()
+    assert len(sampler.history()) == 3
+    latest = sampler.latest()
+    assert set(latest) == {"ts", "cpu", "memory", "uptime_hours"}
+    assert latest is sampler.history()[-1]
+
+
+def test_current_usage_falls_back_without_blocking(app):
+    start = time.perf_counter()
+    usage = system_metrics.current_usage(app)
+    assert time.perf_counter() - start < 0.5
+    assert 0 <= usage["memory"] <= 100
+
+
+def test_current_usage_reads_latest_sample(app, monkeypatch):
+    sampler = SystemSampler()
+    sampler._samples.append({"ts": 1.0, "cpu": 12.5, "memory": 40.0, "uptime_hours": 3.0})
+    monkeypatch.setitem(app.extensions, system_metrics.EXTENSION_KEY, sampler)
+    monkeypatch.setitem(app.config, "SYSTEM_SAMPLER_ENABLED", True)
+    assert system_metrics.current_usage(app)["cpu"] == 12.5
+
+
+def test_sampler_starts_on_first_request_not_at_init():
+    app = Flask(__name__)
+    app.config.update(SYSTEM_SAMPLER_ENABLED=True, SYSTEM_SAMPLE_INTERVAL=60)
+    app.add_url_rule("/", "index", lambda: "ok")
+    sampler = system_metrics.init_app(app)
+    try:
+        assert not sampler.running()
+        app.test_client().get("/")
+        assert sampler.running()
+    finally:
+        sampler.stop()
@@ -0,0 +1,69 @@
+import pytest
+
+from app.services.timeseries import MetricsStore
+
+pytestmark = pytest.mark.unit
+
+NOW = 1_700_000_400  # multiple of 600, so every tier's bucket starts here
+
+
+def test_gauges_average_within_a_bucket():
+    store = MetricsStore()
+    store.record("cpu", 10, ts=NOW)
+    store.record("cpu", 30, ts=NOW + 0.5)
+    store.record("cpu", 50, ts=NOW + 30)
+
+    fine = store.query("15m", now=NOW + 30)
+    assert fine["resolution"] == 1
+    assert len(fine["t"]) == len(fine["series"]["cpu"]) == 900
+    assert fine["series"]["cpu"][-31] == 20
+    assert fine["series"]["cpu"][-1] == 50
+    assert fine["series"]["cpu"][-2] is None  # empty bucket -> gap, not zero
+
+    # the same readings roll up into one 1 min / 10 min bucket
+    assert store.query("1h", now=NOW + 30)["series"]["cpu"][-1] == 30
+    assert store.query("24h", now=NOW + 30)["series"]["cpu"][-1] == 30
+
+
+def test_counters_are_reported_as_rate():
+    store = MetricsStore()
+    for i in range(120):
+        store.incr("requests", ts=NOW + i / 2)  # 2 req/s for a minute
+    hour = store.query("1h", now=NOW + 59)
+    assert hour["resolution"] == 60
+    assert hour["series"]["requests"][-1] == 2.0
+    assert hour["series"]["requests"][-2] == 0.0
+
+
+def test_ring_is_fixed_size_and_overwrites_old_buckets():
+    store = MetricsStore(tiers=((1, 900),))
+    ring = store._rings["cpu"][0]
+    store.record("cpu", 1, ts=NOW)
+    store.record("cpu", 2, ts=NOW + 900)  # same slot, one lap later
+    assert len(ring.epoch) == 900
+    series = store.query("15m", now=NOW + 900)["series"]["cpu"]
+    assert series[-1] == 2
+    assert series.count(None) == 899
+
+
+def test_unknown_range_is_rejected():
+    with pytest.raises(ValueError):
+        MetricsStore().query("1y")
+
+
+def test_dashboard_data_range(client):
+    client.get("/api/users")
+    body = client.get("/dashboard/data?range=15m").get_json()
+    history = body["history"]
+    assert history["range"] == "15m"
+    assert set(history["series"]) == {"cpu", "memory", "db_latency_ms", "requests"}
+    # snapshot built for this request recorded a DB latency sample
+    assert any(v is not None for v in history["series"]["db_latency_ms"])
+    assert sum(history["series"]["requests"]) >= 1
+    assert body["db_status"]["status"] == "Up"
+
+
+def test_dashboard_data_bad_range(client):
+    res = client.get("/dashboard/data?range=forever")
+    assert res.status_code == 400
+    assert "range" in res.get_json()["errors"]
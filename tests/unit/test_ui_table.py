@@ -0,0 +1,101 @@
+import pytest
+from sqlalchemy import insert
+
+from app import db as _db
+from app.models import User
+from app.services.users_service import search_users_page
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture
+def directory():
+    names = [f"uit_{c}{i}" for c in "ab" for i in range(6)] + ["UIT_Mixed", "uit%_odd", "Émile_uit"]
+    _db.session.execute(insert(User), [
+        {"username": n, "email": f"{n.lower().replace('%', '')}@uit.example.com", "password_hash": "x"}
+        for n in names
+    ])
+    _db.session.commit()
+    yield names
+    User.query.filter(User.email.like("%@uit.example.com")).delete(synchronize_session=False)
+    _db.session.commit()
+
+
+def test_prefix_search_is_case_insensitive(directory):
+    users, next_cursor, prev_cursor = search_users_page("UIT_A", per_page=50)
+    assert [u.username for u in users] == [f"uit_a{i}" for i in range(6)]
+    assert next_cursor is None and prev_cursor is None
+    assert [u.username for u in search_users_page("uit_mix")[0]] == ["UIT_Mixed"]
+
+
+def test_prefix_search_matches_email(directory):
+    users = search_users_page("uit_b3@uit")[0]
+    assert [u.username for u in users] == ["uit_b3"]
+
+
+def test_prefix_wildcards_are_literal(directory):
+    assert [u.username for u in search_users_page("uit%")[0]] == ["uit%_odd"]
+
+
+def test_non_ascii_prefix_matches_on_every_backend(directory):
+    # SQLite's lower() leaves É alone, so the prefix must not be folded to é either
+    assert [u.username for u in search_users_page("Émi")[0]] == ["Émile_uit"]
+    assert [u.username for u in search_users_page("ÉMILE_")[0]] == ["Émile_uit"]
+
+
+def test_pages_do_not_overlap(directory):
+    seen, pages, after = [], 0, None
+    while True:
+        users, after, _ = search_users_page("uit_", sort="email", order="desc", per_page=5, after=after)
+        seen += [u.email for u in users]
+        pages += 1
+        if after is None:
+            break
+    assert pages == 3
+    assert seen == sorted(seen, reverse=True)
+    assert len(seen) == len(set(seen)) == 14  # uit%_odd matches by email
+
+
+def test_previous_cursor_walks_back(directory):
+    first, after, prev = search_users_page("uit_", per_page=5)
+    assert prev is None
+    second, _, prev = search_users_page("uit_", per_page=5, after=after)
+    assert [u.id for u in second] != [u.id for u in first]
+    back, next_cursor, prev = search_users_page("uit_", per_page=5, before=prev)
+    assert [u.id for u in back] == [u.id for u in first]
+    assert prev is None and next_cursor is not None
+
+
+def test_invalid_arguments_are_rejected(directory):
+    with pytest.raises(ValueError):
+        search_users_page(sort="password_hash")
+    with pytest.raises(ValueError):
+        search_users_page(per_page=0)
+    with pytest.raises(ValueError):
+        search_users_page(after="not-a-cursor")
+    first = search_users_page(sort="email", per_page=1)[1]
+    with pytest.raises(ValueError):  # issued for another sort
+        search_users_page(sort="username", after=first)
+
+
+def test_ui_renders_one_page_with_navigation(client, app, directory, monkeypatch):
+    monkeypatch.setitem(app.config, "UI_PAGE_MAX_SIZE", 4)
+    res = client.get("/ui?q=uit_a&sort=username&order=desc&per_page=1000")
+    assert res.status_code == 200
+    html = res.get_data(as_text=True)
+    # per_page clamped to UI_PAGE_MAX_SIZE: a5..a2 on page one
+    assert "uit_a5" in html and "uit_a2" in html and "uit_a1" not in html
+    assert "page=2" in html and "after=" in html and "Page 1" in html
+
+
+def test_ui_bad_cursor_falls_back_to_first_page(client, directory):
+    res = client.get("/ui?q=uit_a&after=garbage&page=7")
+    assert res.status_code == 200
+    html = res.get_data(as_text=True)
+    assert "uit_a0" in html and "Page 7" not in html
+
+
+def test_ui_ignores_bad_parameters(client, directory):
+    res = client.get("/ui?sort=password_hash&order=sideways&page=abc&q=uit_b0")
+    assert res.status_code == 200
+    assert "uit_b0" in res.get_data(as_text=True)
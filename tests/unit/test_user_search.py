@@ -0,0 +1,114 @@
+import pytest
+from sqlalchemy import insert, text
+
+from app import db as _db
+from app.models import User
+from app.services.users_service import search_users
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture
+def people():
+    rows = [
+        ("srch_ann", "ann@srch.example.com"),
+        ("srch_annabel", "annabel@srch.example.com"),
+        ("srch_joanna", "jo@srch.example.com"),
+        ("srch_bob", "bob.annex@srch.example.com"),
+        ("srch_zed", "zed@srch.example.com"),
+    ]
+    _db.session.execute(insert(User), [
+        {"username": u, "email": e, "password_hash": "x"} for u, e in rows
+    ])
+    _db.session.commit()
+    yield rows
+    User.query.filter(User.email.like("%@srch.example.com")).delete(synchronize_session=False)
+    _db.session.commit()
+
+
+def _names(matches):
+    # only this module's rows; other tests may leave users behind
+    return [(user.username, kind) for user, kind in matches if user.username.startswith("srch_")]
+
+
+def test_ranks_exact_then_prefix_then_substring(people):
+    assert _names(search_users("SRCH_ANN")) == [
+        ("srch_ann", "exact"),
+        ("srch_annabel", "prefix"),
+    ]
+    assert _names(search_users("ann")) == [
+        ("srch_ann", "prefix"),        # email prefix, shorter name first
+        ("srch_annabel", "prefix"),
+        ("srch_bob", "substring"),     # bob.annex@: match at position 4
+        ("srch_joanna", "substring"),  # match at position 7
+    ]
+
+
+def test_short_terms_only_match_prefixes(people):
+    # two characters: no substring lookup, so srch_joanna is not a hit for "an"
+    assert _names(search_users("an")) == [("srch_ann", "prefix"), ("srch_annabel", "prefix")]
+    assert [u.username for u, _ in search_users("zed@")] == ["srch_zed"]
+
+
+def test_fts_index_follows_updates_and_deletes(people):
+    user = User.query.filter_by(username="srch_zed").one()
+    user.username = "srch_zanzibar"
+    _db.session.commit()
+    assert _names(search_users("nzib")) == [("srch_zanzibar", "substring")]
+
+    _db.session.delete(user)
+    _db.session.commit()
+    assert search_users("nzib") == []
+
+
+def test_substring_search_uses_fts_on_sqlite(people):
+    hits = _db.session.execute(
+        text("SELECT count(*) FROM users_search WHERE users_search MATCH :m"), {"m": '"oann"'}
+    ).scalar()
+    assert hits == 1
+
+
+def test_limit_and_validation(people):
+    assert len(search_users("srch", limit=2)) == 2
+    with pytest.raises(ValueError):
+        search_users("   ")
+
+
+def test_search_endpoint(client, people):
+    res = client.get("/api/users/search?q=annab")
+    assert res.status_code == 200
+    body = res.get_json()
+    assert [item["username"] for item in body["items"]] == ["srch_annabel"]
+    assert body["items"][0]["match"] == "prefix"
+    assert "password" not in body["items"][0] and "password_hash" not in body["items"][0]
+
+
+def test_search_endpoint_requires_term(client):
+    res = client.get("/api/users/search?q=")
+    assert res.status_code == 400
+    assert "q" in res.get_json()["errors"]
+
+
+def test_fts_presence_is_looked_up_once(people, assert_max_queries):
+    search_users("nnab")  # first search on this engine may look the table up
+    with assert_max_queries(10) as counter:
+        search_users("nnab")
+    assert not [s for s in counter.statements if "sqlite_master" in s]
+
+
+def test_missing_search_index_only_warns(tmp_path, monkeypatch, caplog):
+    from sqlalchemy import create_engine
+
+    from app import ddl
+
+    monkeypatch.setitem(ddl.USERS_SEARCH_DDL, "sqlite", ["CREATE VIRTUAL TABLE users_search USING nope(x)"])
+    engine = create_engine(f"sqlite:///{tmp_path / 'nofts.db'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE kept (id INTEGER)"))
+        assert ddl.install_user_search(conn) is False
+        # only the savepoint was rolled back: the surrounding migration carries on
+        conn.execute(text("INSERT INTO kept VALUES (1)"))
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT count(*) FROM kept")).scalar() == 1
+    assert "User search index not installed" in caplog.text
+    engine.dispose()
@@ -0,0 +1,99 @@
+import pytest
+
+from app import db as _db
+from app.models import User
+from app.services import users_service
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture
+def seeded_users():
+    users = [User(username=f"page_user_{i:02d}", email=f"page_user_{i:02d}@example.com") for i in range(7)]
+    for u in users:
+        u.password_hash = "x"
+    _db.session.add_all(users)
+    _db.session.commit()
+    yield users
+    User.query.filter(User.username.like("page_user_%")).delete(synchronize_session=False)
+    _db.session.commit()
+
+
+def _walk(client, **params):
+    seen, after = [], None
+    while True:
+        query = dict(params)
+        if after:
+            query["after"] = after
+        rv = client.get("/api/users", query_string=query)
+        assert rv.status_code == 200
+        body = rv.get_json()
+        assert len(body["items"]) <= body["limit"]
+        seen.extend(body["items"])
+        after = body["next_cursor"]
+        if not after:
+            return seen
+
+
+@pytest.mark.parametrize("sort,order", [
+    ("username", "asc"),
+    ("username", "desc"),
+    ("id", "asc"),
+    ("created_at", "asc"),
+    ("created_at", "desc"),
+])
+def test_keyset_walk_returns_every_user_once(client, seeded_users, sort, order):
+    items = _walk(client, limit=3, sort=sort, order=order)
+    ids = [i["id"] for i in items]
+    assert len(ids) == len(set(ids)) == User.query.count()
+    if sort == "username":
+        names = [i["username"] for i in items]
+        assert names == sorted(names, reverse=(order == "desc"))
+
+
+def test_limit_is_capped_by_server(client, app, seeded_users):
+    app.config["USERS_PAGE_MAX_LIMIT"] = 2
+    try:
+        rv = client.get("/api/users?limit=1000")
+    finally:
+        app.config["USERS_PAGE_MAX_LIMIT"] = 500
+    assert rv.get_json()["limit"] == 2
+    assert len(rv.get_json()["items"]) == 2
+
+
+def test_bare_request_returns_the_default_page(client, app, monkeypatch, seeded_users):
+    monkeypatch.setitem(app.config, "USERS_PAGE_DEFAULT_LIMIT", 3)
+    body = client.get("/api/users").get_json()
+    assert body["limit"] == 3 and len(body["items"]) == 3
+    assert body["next_cursor"]
+
+
+def test_default_limit_is_capped_by_server(client, app, monkeypatch, seeded_users):
+    monkeypatch.setitem(app.config, "USERS_PAGE_DEFAULT_LIMIT", 1000)
+    monkeypatch.setitem(app.config, "USERS_PAGE_MAX_LIMIT", 2)
+    assert len(client.get("/api/users").get_json()["items"]) == 2
+
+
+def test_legacy_full_list_is_opt_in_and_deprecated(client, app, monkeypatch, seeded_users):
+    monkeypatch.setitem(app.config, "USERS_LIST_LEGACY_FULL", True)
+    rv = client.get("/api/users")
+    assert isinstance(rv.get_json(), list) and len(rv.get_json()) == User.query.count()
+    assert rv.headers["Deprecation"] == "true"
+    # paging args still get the envelope
+    assert client.get("/api/users?limit=2").get_json()["limit"] == 2
+
+
+@pytest.mark.parametrize("query", [
+    "limit=2&sort=password_hash",
+    "limit=2&order=sideways",
+    "limit=2&after=not-a-cursor",
+])
+def test_bad_paging_params_return_400(client, query):
+    rv = client.get(f"/api/users?{query}")
+    assert rv.status_code == 400
+
+
+def test_cursor_is_bound_to_its_sort(client, seeded_users):
+    _, cursor = users_service.list_users_page(limit=2, sort="username")
+    rv = client.get("/api/users", query_string={"limit": 2, "sort": "id", "after": cursor})
+    assert rv.status_code == 400
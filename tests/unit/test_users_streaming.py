@@ -0,0 +1,46 @@
+import json
+
+import pytest
+
+from app import db as _db
+from app.models import User
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture
+def seeded_users():
+    users = [User(username=f"stream_user_{i:02d}", email=f"stream_user_{i:02d}@example.com") for i in range(5)]
+    for u in users:
+        u.password_hash = "x"
+    _db.session.add_all(users)
+    _db.session.commit()
+    yield users
+    User.query.filter(User.username.like("stream_user_%")).delete(synchronize_session=False)
+    _db.session.commit()
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"query_string": {"stream": "1"}},
+    {"headers": {"Accept": "application/x-ndjson"}},
+])
+def test_ndjson_stream_emits_one_user_per_line(client, seeded_users, kwargs):
+    rv = client.get("/api/users", **kwargs)
+    assert rv.status_code == 200
+    assert rv.mimetype == "application/x-ndjson"
+    assert rv.is_streamed
+    rows = [json.loads(line) for line in rv.get_data(as_text=True).splitlines()]
+    assert len(rows) == User.query.count()
+    assert [r["id"] for r in rows] == sorted(r["id"] for r in rows)
+    assert all("password" not in key for r in rows for key in r)
+
+
+def test_chunked_json_array_stream(client, seeded_users, app):
+    app.config["USERS_STREAM_BATCH_SIZE"] = 2
+    try:
+        rv = client.get("/api/users?stream=json")
+    finally:
+        app.config["USERS_STREAM_BATCH_SIZE"] = 1000
+    assert rv.mimetype == "application/json"
+    body = json.loads(rv.get_data(as_text=True))
+    assert {u.username for u in seeded_users} <= {r["username"] for r in body}